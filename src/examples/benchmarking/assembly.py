@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+## 
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ # 
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #  
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ # 
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #  
+ # ###################################################################
+ ##
+
+
+"""
+Time the assembly of the sparse matrix for an equation with five terms
+and four boundary conditions. Compare
+
+    $ python examples/benchmarking/assembly.py --numberOfElements=1000000
+    $ python examples/benchmarking/assembly.py --numberOfElements=1000000 --triplet-assembly
+
+to see the effect of accumulating every contribution in one buffer
+rather than shifting a separate `ll_mat` for each term.
+"""
+
+import time
+
+from fipy import *
+from fipy.tools.parser import parse
+from fipy.tools.memoryUsage import _VmB
+
+numberOfElements = parse('--numberOfElements', action='store',
+                         type='int', default=10000)
+
+sweeps = parse('--numberOfSweeps', action='store',
+               type='int', default=10)
+
+N = int(numerix.sqrt(numberOfElements))
+
+mesh = Grid2D(nx=N, ny=N, dx=1. / N, dy=1. / N)
+var = CellVariable(mesh=mesh, value=0.5, hasOld=1)
+
+eq = (TransientTerm() 
+      == DiffusionTerm(coeff=1.) 
+      + PowerLawConvectionTerm(coeff=(1., 0.5)) 
+      + ImplicitSourceTerm(coeff=-1.) 
+      + 0.5)
+
+BCs = (FixedValue(faces=mesh.getFacesLeft(), value=1.),
+       FixedValue(faces=mesh.getFacesRight(), value=0.),
+       FixedFlux(faces=mesh.getFacesTop(), value=0.),
+       FixedFlux(faces=mesh.getFacesBottom(), value=1.))
+
+SparseMatrix = DefaultSolver()._getMatrixClass()
+
+cpu0 = time.clock()
+
+for sweep in range(sweeps):
+    matrix, RHSvector = eq._buildMatrix(var, SparseMatrix, BCs, dt=1.)
+    matrix._getMatrix()
+
+cpu = time.clock() - cpu0
+
+print "matrix class: %s" % SparseMatrix.__name__
+print "           cpu time: %.9f s / step / cell" % (cpu / sweeps / N**2)
+print "max resident memory: %.2f B / cell" % (_VmB('VmHWM:') / N**2)
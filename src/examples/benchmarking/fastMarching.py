@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+## 
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ # 
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #  
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ # 
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #  
+ # ###################################################################
+ ##
+
+
+"""
+Time the fast marching reinitialization of a `DistanceVariable` for a
+circular interface as the number of cells grows. Each accepted cell
+costs a heap operation, so the time per cell should only grow
+logarithmically with the mesh size.
+
+    $ python examples/benchmarking/fastMarching.py --numberOfElements=1000000
+"""
+
+import time
+
+from fipy import *
+from fipy.tools.parser import parse
+
+numberOfElements = parse('--numberOfElements', action='store',
+                         type='int', default=100000)
+
+narrowBandWidth = parse('--narrowBandWidth', action='store',
+                        type='float', default=1e+10)
+
+print "cells\tcpu / s\tcpu / (s / cell)"
+
+for size in numerix.arange(2, numerix.log10(numberOfElements) + 0.25, 0.5):
+    N = int(numerix.sqrt(10**size))
+    dx = 1. / N
+    mesh = Grid2D(dx=dx, dy=dx, nx=N, ny=N)
+    x, y = mesh.getCellCenters()
+    var = DistanceVariable(mesh=mesh, 
+                           value=numerix.where((x - .5)**2 + (y - .5)**2 < .25**2, -1., 1.),
+                           narrowBandWidth=narrowBandWidth)
+
+    t = time.clock()
+    var.calcDistanceFunction()
+    cpu = time.clock() - t
+
+    print "%d\t%g\t%g" % (N**2, cpu, cpu / N**2)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+
+## 
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ # 
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #  
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ # 
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #  
+ # ###################################################################
+ ##
+
+
+"""
+Time the construction of an unstructured mesh and measure the memory it
+occupies, then solve a diffusion problem on it. Compare
+
+    $ python examples/benchmarking/meshGeometry.py --numberOfElements=1000000
+    $ python examples/benchmarking/meshGeometry.py --numberOfElements=1000000 --eager-geometry
+
+to see the effect of calculating the geometry that diffusion does not
+need, such as the cell normals and the face tangents, only when it is
+first used.
+"""
+
+import time
+
+from fipy import *
+from fipy.tools.parser import parse
+from fipy.tools.memoryUsage import _VmB
+
+numberOfElements = parse('--numberOfElements', action='store',
+                         type='int', default=10000)
+
+eager = parse('--eager-geometry', action='store_true', default=False)
+
+## four triangles per square
+N = int(numerix.sqrt(numberOfElements / 4))
+
+memory0 = _VmB('VmRSS:')
+cpu0 = time.clock()
+
+mesh = Tri2D(nx=N, ny=N, dx=1. / N, dy=1. / N)
+if eager:
+    ## calculate everything, as the mesh used to when it was created
+    for name in mesh._lazyGeometry.keys():
+        getattr(mesh, name)
+
+cpu = time.clock() - cpu0
+memory = _VmB('VmRSS:') - memory0
+
+var = CellVariable(mesh=mesh, value=0.)
+eq = TransientTerm() == DiffusionTerm(coeff=1.)
+BCs = (FixedValue(faces=mesh.getFacesLeft(), value=1.),
+       FixedValue(faces=mesh.getFacesRight(), value=0.))
+
+cpu0 = time.clock()
+eq.solve(var=var, boundaryConditions=BCs, dt=1.)
+solve = time.clock() - cpu0
+
+computed = [name for name in mesh._lazyGeometry.keys() if mesh.__dict__.has_key(name)]
+computed.sort()
+
+print "               cells: %d" % mesh.getNumberOfCells()
+print "   mesh construction: %.3f s" % cpu
+print "         mesh memory: %.2f B / cell" % (memory / mesh.getNumberOfCells())
+print "          solve time: %.3f s" % solve
+print "lazy geometry in use: %s" % ", ".join(computed)
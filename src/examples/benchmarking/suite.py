@@ -0,0 +1,379 @@
+#!/usr/bin/env python
+
+## 
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ # 
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #  
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ # 
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #  
+ # ###################################################################
+ ##
+
+
+
+"""
+Benchmark cases run by ``python setup.py efficiency_test``.
+
+Each case times the phases of a typical calculation (mesh construction,
+variable evaluation, term assembly, solution, level set reinitialization
+and I/O) and records the CPU time and the peak resident memory of each
+phase as tab-separated rows. Every number of elements is run in a fresh
+process, so that each case starts from the same memory
+
+    $ python examples/benchmarking/suite.py --cases=mesh,solve \\
+    >   --minimumElements=1000 --maximumElements=100000 --output=after.tsv
+
+and two result files can be compared for regressions, which are listed
+if the time or memory of any phase has grown by more than the tolerance
+
+    $ python examples/benchmarking/suite.py --compare=before.tsv,after.tsv --tolerance=0.2
+
+The peak memory of each phase is only its own where the kernel can
+reset the high-water mark (Linux 4.0 and later), and is otherwise the
+peak of the process so far.
+"""
+
+__docformat__ = 'restructuredtext'
+
+import os
+import sys
+import time
+
+from fipy.tools import numerix
+from fipy.tools.memoryUsage import _VmB
+
+columns = ("case", "phase", "elements", "cpu (s)", "peak memory (B)", "--inline", "--cache", "date")
+
+def _resetPeak():
+    try:
+        f = open('/proc/self/clear_refs', 'w')
+        f.write('5')
+        f.close()
+    except IOError:
+        pass
+        
+class _Recorder:
+    def __init__(self, case, numberOfElements, inline=False, cache=False):
+        self.case = case
+        self.numberOfElements = numberOfElements
+        self.flags = (str(int(inline)), str(int(cache)))
+        self.rows = []
+        
+    def start(self, phase):
+        _resetPeak()
+        self.phase = phase
+        self.cpu0 = time.clock()
+
+    def stop(self):
+        cpu = time.clock() - self.cpu0
+        self.rows.append((self.case, self.phase, str(self.numberOfElements), 
+                          "%g" % cpu, "%d" % _VmB('VmHWM:')) + self.flags + (time.ctime(),))
+
+def _getGrid(numberOfElements):
+    from fipy import Grid2D
+    N = int(numerix.sqrt(numberOfElements))
+    return Grid2D(nx=N, ny=N, dx=1. / N, dy=1. / N)
+    
+def mesh(recorder, numberOfElements, steps):
+    from fipy import Grid2D
+    N = int(numerix.sqrt(numberOfElements))
+    
+    recorder.start('uniform')
+    _getGrid(numberOfElements)
+    recorder.stop()
+    
+    recorder.start('construction')
+    mesh = Grid2D(dx=(1. / N,) * N, dy=(1. / N,) * N)
+    recorder.stop()
+    
+    recorder.start('geometry')
+    mesh._getCellToCellDistances()
+    mesh._getCellNormals()
+    mesh._getCellAreas()
+    mesh._getNearestCellID(mesh.getCellCenters())
+    recorder.stop()
+
+def variables(recorder, numberOfElements, steps):
+    from fipy import CellVariable
+    mesh = _getGrid(numberOfElements)
+    x, y = mesh.getCellCenters()
+
+    recorder.start('creation')
+    var = CellVariable(mesh=mesh, value=x * y)
+    expression = (var**2 + 2 * var).getFaceGrad().getDivergence() + var.getGrad().getMag()
+    recorder.stop()
+    
+    recorder.start('evaluation')
+    for step in range(steps):
+        var.setValue(var.getValue() + 1.)
+        numerix.array(expression)
+    recorder.stop()
+
+def _getEquation(mesh):
+    from fipy import TransientTerm, DiffusionTerm, PowerLawConvectionTerm, \
+      ImplicitSourceTerm, FixedValue, FixedFlux
+    eq = (TransientTerm() 
+          == DiffusionTerm(coeff=1.) 
+          + PowerLawConvectionTerm(coeff=(1., 0.5)) 
+          + ImplicitSourceTerm(coeff=-1.) 
+          + 0.5)
+    BCs = (FixedValue(faces=mesh.getFacesLeft(), value=1.),
+           FixedValue(faces=mesh.getFacesRight(), value=0.),
+           FixedFlux(faces=mesh.getFacesTop(), value=0.),
+           FixedFlux(faces=mesh.getFacesBottom(), value=1.))
+    return eq, BCs
+    
+def terms(recorder, numberOfElements, steps):
+    from fipy import CellVariable, DefaultSolver
+    mesh = _getGrid(numberOfElements)
+    var = CellVariable(mesh=mesh, value=0.5, hasOld=1)
+    eq, BCs = _getEquation(mesh)
+    SparseMatrix = DefaultSolver()._getMatrixClass()
+    
+    recorder.start('assembly')
+    for step in range(steps):
+        matrix, RHSvector = eq._buildMatrix(var, SparseMatrix, BCs, dt=1.)
+    recorder.stop()
+
+def solve(recorder, numberOfElements, steps):
+    from fipy import CellVariable
+    mesh = _getGrid(numberOfElements)
+    var = CellVariable(mesh=mesh, value=0.5, hasOld=1)
+    eq, BCs = _getEquation(mesh)
+    
+    recorder.start('solve')
+    for step in range(steps):
+        var.updateOld()
+        eq.solve(var, boundaryConditions=BCs, dt=1.)
+    recorder.stop()
+
+def levelSet(recorder, numberOfElements, steps):
+    from fipy import DistanceVariable, buildAdvectionEquation
+    mesh = _getGrid(numberOfElements)
+    x, y = mesh.getCellCenters()
+    var = DistanceVariable(mesh=mesh, 
+                           value=numerix.where((x - .5)**2 + (y - .5)**2 < .25**2, -1., 1.),
+                           hasOld=1)
+    
+    recorder.start('reinitialization')
+    var.calcDistanceFunction()
+    recorder.stop()
+
+    eq = buildAdvectionEquation(advectionCoeff=1.)
+    dt = 0.1 / int(numerix.sqrt(numberOfElements))
+    
+    recorder.start('advection')
+    for step in range(steps):
+        var.updateOld()
+        eq.solve(var, dt=dt)
+    recorder.stop()
+
+    recorder.start('interfaceAreas')
+    numerix.array(var.getCellInterfaceAreas())
+    recorder.stop()
+
+def io(recorder, numberOfElements, steps):
+    import tempfile
+    from fipy import CellVariable
+    from fipy.tools import dump, checkpoint
+    mesh = _getGrid(numberOfElements)
+    x, y = mesh.getCellCenters()
+    var = CellVariable(mesh=mesh, name='var', value=x * y, hasOld=1)
+    
+    (f, filename) = tempfile.mkstemp('.fipy')
+    os.close(f)
+
+    recorder.start('checkpointWrite')
+    checkpoint.write(filename, mesh, var=var)
+    recorder.stop()
+    
+    recorder.start('checkpointRead')
+    newMesh, newVariables = checkpoint.read(filename)
+    numerix.array(newVariables['var'])
+    recorder.stop()
+    
+    recorder.start('dumpWrite')
+    dump.write((mesh, var), filename)
+    recorder.stop()
+
+    recorder.start('dumpRead')
+    newMesh, newVar = dump.read(filename)
+    numerix.array(newVar)
+    recorder.stop()
+    
+    os.remove(filename)
+
+cases = ('mesh', 'variables', 'terms', 'solve', 'levelSet', 'io')
+
+def _runCase(case, numberOfElements, steps, inline=False, cache=False):
+    ## run `case` in this process and return its rows
+    recorder = _Recorder(case, numberOfElements, inline=inline, cache=cache)
+    globals()[case](recorder, numberOfElements, steps)
+    return recorder.rows
+
+def run(cases=cases, sizes=(1000, 10000), steps=10, inline=False, cache=False, output=None):
+    """
+    Run each of the `cases` for each of the numbers of elements in
+    `sizes`, each in a process of its own, and return the rows of the
+    results. If `output` is given, the rows are appended to it.
+    """
+    from subprocess import Popen, PIPE
+    import fipy
+
+    script = os.path.splitext(os.path.abspath(__file__))[0] + '.py'
+    env = os.environ.copy()
+    path = os.path.dirname(os.path.dirname(os.path.abspath(fipy.__file__)))
+    env['PYTHONPATH'] = os.pathsep.join([path] + [p for p in [env.get('PYTHONPATH')] if p])
+    
+    flags = []
+    if inline:
+        flags.append('--inline')
+    if cache:
+        flags.append('--cache')
+    else:
+        flags.append('--no-cache')
+
+    rows = []
+    for case in cases:
+        for numberOfElements in sizes:
+            process = Popen([sys.executable, script, '--benchmark=%s' % case, 
+                             '--numberOfElements=%d' % numberOfElements,
+                             '--numberOfSteps=%d' % steps] + flags,
+                            stdout=PIPE, env=env)
+            out = process.communicate()[0]
+            if process.returncode != 0:
+                print >>sys.stderr, "case %s with %d elements failed" % (case, numberOfElements)
+            for line in out.splitlines():
+                row = tuple(line.split('\t'))
+                if len(row) == len(columns):
+                    rows.append(row)
+                    
+    if output is not None:
+        _write(output, rows)
+        
+    return rows
+
+def _write(filename, rows):
+    new = not os.path.isfile(filename)
+    f = open(filename, 'a')
+    if new:
+        f.write('\t'.join(columns) + '\n')
+    for row in rows:
+        f.write('\t'.join(row) + '\n')
+    f.close()
+    
+def _read(filename):
+    ## the latest cpu time and peak memory of each case, phase and
+    ## number of elements
+    results = {}
+    f = open(filename, 'r')
+    for line in f.readlines()[1:]:
+        row = line.rstrip('\n').split('\t')
+        if len(row) == len(columns):
+            results[tuple(row[:3])] = (float(row[3]), float(row[4]))
+    f.close()
+    return results
+
+def compare(before, after, tolerance=0.1):
+    """
+    Return a list of the phases whose CPU time or peak memory in the
+    results file `after` exceed those in `before` by more than
+    `tolerance`, as tuples of the case, phase, number of elements,
+    quantity and the two values.
+
+        >>> import tempfile
+        >>> (f, before) = tempfile.mkstemp('.tsv')
+        >>> (f, after) = tempfile.mkstemp('.tsv')
+        >>> os.remove(before)
+        >>> os.remove(after)
+        >>> _write(before, [('solve', 'solve', '100', '1', '2000', '0', '0', ''),
+        ...                 ('io', 'dumpRead', '100', '1', '2000', '0', '0', '')])
+        >>> _write(after, [('solve', 'solve', '100', '1.05', '3000', '0', '0', ''),
+        ...                ('io', 'dumpRead', '100', '0.5', '2000', '0', '0', '')])
+        >>> for regression in compare(before, after):
+        ...     print regression
+        ('solve', 'solve', '100', 'peak memory (B)', 2000.0, 3000.0)
+
+    Only the latest results are compared
+
+        >>> _write(after, [('solve', 'solve', '100', '1.05', '2000', '0', '0', '')])
+        >>> print compare(before, after)
+        []
+        >>> os.remove(before)
+        >>> os.remove(after)
+    """
+    before = _read(before)
+    after = _read(after)
+    
+    keys = [key for key in after.keys() if before.has_key(key)]
+    keys.sort()
+    
+    regressions = []
+    for key in keys:
+        for name, old, new in zip(columns[3:5], before[key], after[key]):
+            if new > old * (1 + tolerance):
+                regressions.append(key + (name, old, new))
+                
+    return regressions
+
+def _test():
+    import doctest
+    return doctest.testmod()
+    
+if __name__ == "__main__":
+    from fipy.tools.parser import parse
+    
+    comparison = parse('--compare', action='store', type='string', default=None)
+    case = parse('--benchmark', action='store', type='string', default=None)
+    inline = parse('--inline', action='store_true', default=False)
+    cache = parse('--cache', action='store_true', default=False)
+    steps = parse('--numberOfSteps', action='store', type='int', default=10)
+    
+    if comparison is not None:
+        before, after = comparison.split(',')
+        tolerance = parse('--tolerance', action='store', type='float', default=0.1)
+        regressions = compare(before, after, tolerance=tolerance)
+        for regression in regressions:
+            print "%s\t%s\t%s\t%s\t%g\t%g" % regression
+        sys.exit(len(regressions) > 0)
+    elif case is not None:
+        numberOfElements = parse('--numberOfElements', action='store', type='int', default=10000)
+        for row in _runCase(case, numberOfElements, steps, inline=inline, cache=cache):
+            print '\t'.join(row)
+    else:
+        selected = parse('--cases', action='store', type='string', default=','.join(cases)).split(',')
+        minimum = parse('--minimumElements', action='store', type='int', default=100)
+        maximum = parse('--maximumElements', action='store', type='int', default=10000)
+        factor = parse('--factor', action='store', type='int', default=10)
+        output = parse('--output', action='store', type='string', default=None)
+
+        sizes = []
+        numberOfElements = minimum
+        while numberOfElements <= maximum:
+            sizes.append(numberOfElements)
+            numberOfElements *= factor
+
+        for row in run(cases=selected, sizes=sizes, steps=steps, 
+                       inline=inline, cache=cache, output=output):
+            print '\t'.join(row)
@@ -42,6 +42,21 @@ from fipy.tools.numerix import MA
 
 from fipy.tools.dimensions.physicalField import PhysicalField
 
+def _getIDType(count):
+    """
+    Return the integer type for the IDs of `count` vertices, faces or
+    cells: 32 bits, unless there are too many of them.
+
+        >>> print numerix.dtype(_getIDType(1000)).itemsize
+        4
+        >>> print numerix.dtype(_getIDType(2**32)).itemsize >= 8
+        True
+    """
+    if count < 2**31:
+        return numerix.int32
+    else:
+        return 'l'
+
 class Mesh:
     """
     Generic mesh class defining implementation-agnostic behavior.
@@ -50,8 +65,52 @@ class Mesh:
     `pyMesh` and `numMesh`.
 
     Meshes contain cells, faces, and vertices.
+
+    The geometric quantities that only some terms need, such as the face
+    tangents, face aspect ratios, cell normals, cell areas and
+    cell-to-cell distances, are calculated when they are first used
+    rather than when the mesh is created
+
+        >>> from fipy.meshes.numMesh.grid2D import Grid2D
+        >>> mesh = Grid2D(nx=3, ny=2)
+        >>> print mesh.__dict__.has_key('cellNormals')
+        False
+        >>> print numerix.allclose(mesh._getCellNormals()[..., 0],
+        ...                        ((0, 1, 0, -1), (-1, 0, 1, 0)))
+        True
+        >>> print mesh.__dict__.has_key('cellNormals')
+        True
+
+    and can be released with :meth:`releaseGeometry` when they are no
+    longer needed; they are calculated again if they are used again
+
+        >>> mesh.releaseGeometry()
+        >>> print mesh.__dict__.has_key('cellNormals')
+        False
+        >>> print numerix.allclose(mesh._getCellToCellDistances()[..., 4],
+        ...                        (1., 1., .5, 1.))
+        True
     """
 
+    ## geometry that is calculated when it is first used, by the method
+    ## that calculates it
+    _lazyGeometry = {
+        'faceCellToCellNormals': '_calcFaceCellToCellNormals',
+        'faceTangents1': '_calcFaceTangents',
+        'faceTangents2': '_calcFaceTangents',
+        'cellToCellDistances': '_calcCellToCellDistances',
+        'scaledCellToCellDistances': '_calcScaledCellToCellDistances',
+        'faceAspectRatios': '_calcFaceAspectRatios',
+        'cellAreas': '_calcCellAreas',
+        'cellNormals': '_calcCellNormals'
+    }
+
+    ## the lazy geometry that changes with the scale of the mesh
+    _scaledLazyGeometry = ('scaledCellToCellDistances', 'faceAspectRatios', 'cellAreas')
+
+    ## other geometry kept by the mesh once it is used
+    _cachedGeometry = ('cellCenterTree', 'leastSquaresGradMatrices')
+
     def __init__(self):
         self.scale = {
             'length': 1.,
@@ -201,6 +260,14 @@ class Mesh:
         
     def __repr__(self):
         return "%s()" % self.__class__.__name__
+
+    def __getattr__(self, name):
+        ## only called for attributes that have not been set, such as lazy
+        ## geometry that has not been calculated yet
+        if self._lazyGeometry.has_key(name):
+            getattr(self, self._lazyGeometry[name])()
+            return self.__dict__[name]
+        raise AttributeError, name
         
     """topology methods"""
     
@@ -244,9 +311,10 @@ class Mesh:
     def _calcCellToCellIDsFilled(self):
         N = self.getNumberOfCells()
         M = self._getMaxFacesPerCell()
-        cellIDs = numerix.repeat(numerix.arange(N)[numerix.newaxis, ...], M, axis=0)
         cellToCellIDs = self._getCellToCellIDs()
-        self.cellToCellIDsFilled = MA.where(MA.getmaskarray(cellToCellIDs), cellIDs, cellToCellIDs)
+        cellIDs = numerix.repeat(numerix.arange(N, dtype=cellToCellIDs.dtype)[numerix.newaxis, ...], M, axis=0)
+        self.cellToCellIDsFilled = numerix.where(MA.getmaskarray(cellToCellIDs), 
+                                                 cellIDs, MA.filled(cellToCellIDs, 0))
 
     
     """get topology methods"""
@@ -586,9 +654,21 @@ class Mesh:
     def _getCellToCellIDsFilled(self):
         return self.cellToCellIDsFilled
         
+    def _getSparsityPattern(self):
+        """
+        Return the `_SparsityPattern` of the matrices that couple the cells
+        of this mesh through their interior faces. The pattern only depends
+        on the connectivity of the mesh, so it is calculated once.
+        """
+        if not hasattr(self, 'sparsityPattern'):
+            from fipy.tools.sparseMatrix import _SparsityPattern
+            self.sparsityPattern = _SparsityPattern(self)
+        return self.sparsityPattern
+
     """geometry methods"""
     
     def _calcGeometry(self):
+        ## the geometry needed by every term; the rest is `_lazyGeometry`
         self._calcFaceAreas()
         self._calcCellCenters()
         self._calcFaceToCellDistances()
@@ -596,14 +676,22 @@ class Mesh:
         self._calcFaceNormals()
         self._calcOrientedFaceNormals()
         self._calcCellVolumes()
-        self._calcCellCenters()
-        self._calcFaceCellToCellNormals()
-        self._calcFaceToCellDistances()
-        self._calcCellDistances()        
-        self._calcFaceTangents()
-        self._calcCellToCellDistances()
         self._calcScaledGeometry()
-        self._calcCellAreas()
+
+    def releaseGeometry(self):
+        """
+        Discard the geometric quantities that are calculated when they are
+        first used, such as the cell normals, and those kept by the mesh
+        once they are used, such as the spatial index of the cell centers.
+        Each is calculated again if it is used again.
+        """
+        self._releaseGeometry(self._lazyGeometry.keys())
+        self._releaseGeometry(self._cachedGeometry)
+
+    def _releaseGeometry(self, names):
+        for name in names:
+            if self.__dict__.has_key(name):
+                del self.__dict__[name]
        
     """calc geometry methods"""
     
@@ -646,6 +734,9 @@ class Mesh:
     def _calcCellToCellDistances(self):
         pass
 
+    def _calcScaledCellToCellDistances(self):
+        self.scaledCellToCellDistances = self.scale['length'] * self.cellToCellDistances
+
     def _calcCellAreas(self):
         from fipy.tools.numerix import take
         self.cellAreas =  take(self._getFaceAreas(), self.cellFaceIDs)
@@ -704,6 +795,175 @@ class Mesh:
     def _getCellNormals(self):
         return self.cellNormals
 
+    def _getCellToFaceOperator(self, name, values):
+        ## a `_SparseOperator` from the two cells adjacent to each face
+        ## to the face, kept as the attribute `name`
+        if not hasattr(self, name):
+            from fipy.tools.sparseMatrix import _SparseOperator
+            setattr(self, name, _SparseOperator(cols=self._getAdjacentCellIDs(), values=values()))
+        return getattr(self, name)
+
+    def _getCellToFaceInterpolationOperator(self):
+        """
+        Return the `_SparseOperator` that interpolates cell values
+        arithmetically to the faces, calculated once.
+
+            >>> from fipy import Grid1D
+            >>> print Grid1D(nx=3)._getCellToFaceInterpolationOperator() * numerix.array((1., 2., 4.))
+            [ 1.   1.5  3.   4. ]
+        """
+        def values():
+            alpha = numerix.array(self._getFaceToCellDistanceRatio())
+            return (1 - alpha, alpha)
+        return self._getCellToFaceOperator('cellToFaceInterpolationOperator', values)
+
+    def _getCellToFaceMeanOperator(self):
+        """
+        Return the `_SparseOperator` that averages the values of the two
+        cells adjacent to each face, calculated once.
+
+            >>> from fipy import Grid1D
+            >>> print Grid1D(nx=3)._getCellToFaceMeanOperator() * numerix.array((1., 2., 4.))
+            [ 1.   1.5  3.   4. ]
+        """
+        def values():
+            half = numerix.zeros((self._getNumberOfFaces(),), 'd') + 0.5
+            return (half, half)
+        return self._getCellToFaceOperator('cellToFaceMeanOperator', values)
+
+    def _getCellToFaceNormalGradOperator(self):
+        """
+        Return the `_SparseOperator` that takes the difference between the
+        values of the two cells adjacent to each face over the distance
+        between them, calculated once.
+
+            >>> from fipy import Grid1D
+            >>> print Grid1D(nx=3, dx=0.5)._getCellToFaceNormalGradOperator() * numerix.array((1., 2., 4.))
+            [ 0.  2.  4.  0.]
+        """
+        def values():
+            inverseDistances = 1. / numerix.array(self._getCellDistances())
+            return (-inverseDistances, inverseDistances)
+        return self._getCellToFaceOperator('cellToFaceNormalGradOperator', values)
+
+    def _getCellFaceSumValues(self):
+        ## orientation / volume for every face of every cell, zero where a
+        ## cell has fewer faces
+        if not hasattr(self, 'cellFaceSumValues'):
+            ids = self._getCellFaceIDs()
+            orientations = self._getCellFaceOrientations()
+            exists = ~(MA.getmaskarray(ids) | MA.getmaskarray(orientations))
+            self.cellFaceSumValues = (exists * numerix.array(MA.filled(orientations, 0)) 
+                                      / numerix.array(self.getCellVolumes()))
+        return self.cellFaceSumValues
+
+    def _getFaceToCellDivergenceOperator(self):
+        """
+        Return the `_SparseOperator` that sums the values on the faces of
+        each cell, signed by whether the face normal points out of the cell,
+        and divides by its volume, calculated once.
+
+            >>> from fipy import Grid1D
+            >>> print Grid1D(nx=3, dx=0.5)._getFaceToCellDivergenceOperator() * numerix.array((1., 2., 4., 8.))
+            [ 6.  4.  8.]
+        """
+        if not hasattr(self, 'faceToCellDivergenceOperator'):
+            from fipy.tools.sparseMatrix import _SparseOperator
+            self.faceToCellDivergenceOperator = _SparseOperator(cols=MA.filled(self._getCellFaceIDs(), 0),
+                                                                values=self._getCellFaceSumValues())
+        return self.faceToCellDivergenceOperator
+
+    def _getFaceToCellGradOperator(self):
+        """
+        Return the `_SparseOperator` that forms the Gauss gradient of each
+        cell from the values on its faces, calculated once.
+
+            >>> from fipy import Grid2D
+            >>> mesh = Grid2D(nx=2, ny=1, dx=0.5)
+            >>> x, y = mesh.getFaceCenters()
+            >>> print mesh._getFaceToCellGradOperator() * numerix.array(3 * x + y)
+            [[ 3.  3.]
+             [ 1.  1.]]
+        """
+        if not hasattr(self, 'faceToCellGradOperator'):
+            from fipy.tools.sparseMatrix import _SparseOperator
+            ids = MA.filled(self._getCellFaceIDs(), 0)
+            areaProjections = numerix.take(numerix.array(self._getAreaProjections()), ids, axis=1)
+            self.faceToCellGradOperator = _SparseOperator(cols=ids,
+                                                          values=areaProjections * self._getCellFaceSumValues())
+        return self.faceToCellGradOperator
+
+    def _getCellGaussGradAt(self, values, ids):
+        """
+        Return the Gauss gradient of the cell `values` at the cells `ids`
+        alone, as `CellVariable.getGaussGrad()` gives it, interpolating
+        only the faces of those cells.
+
+            >>> from fipy import Grid2D
+            >>> from fipy.variables.cellVariable import CellVariable
+            >>> mesh = Grid2D(nx=4, ny=3)
+            >>> x, y = mesh.getCellCenters()
+            >>> var = CellVariable(mesh=mesh, value=x * x * y)
+            >>> ids = numerix.array((1, 6, 11))
+            >>> print numerix.allclose(mesh._getCellGaussGradAt(numerix.array(var), ids),
+            ...                        numerix.take(numerix.array(var.getGrad()), ids, axis=-1))
+            True
+        """
+        gradOp = self._getFaceToCellGradOperator()._take(ids)
+        faceIDs = numerix.unique(gradOp.cols)
+        faceValues = numerix.zeros((self._getNumberOfFaces(),), 'd')
+        faceValues[faceIDs] = self._getCellToFaceInterpolationOperator()._take(faceIDs) * values
+        return gradOp * faceValues
+
+    def _getLeastSquaresGradMatrices(self):
+        r"""
+        Return the cell-to-cell distances times the cell normals,
+        :math:`d_{AP} \vec{n}_{AP}`, and the inverse of the normal matrix
+        :math:`\sum_f d_{AP}^2 \vec{n}_{AP} \otimes \vec{n}_{AP}` of every
+        cell, used by `CellVariable.getLeastSquaresGrad()`. They only depend
+        on the geometry of the mesh, so they are calculated once.
+
+            >>> from fipy import Grid2D
+            >>> distanceNormals, inverse = Grid2D(nx=2, ny=1, dx=0.5, dy=2.)._getLeastSquaresGradMatrices()
+            >>> print numerix.allclose(inverse, [[[3.2, 3.2], [0., 0.]],
+            ...                                  [[0., 0.], [0.5, 0.5]]])
+            True
+        """
+        if not hasattr(self, 'leastSquaresGradMatrices'):
+            distanceNormals = self._getCellToCellDistances() * self._getCellNormals()
+
+            N = self.getNumberOfCells()
+            M = self._getMaxFacesPerCell()
+            D = self.getDim()
+
+            mat = numerix.zeros((D, D, M, N), 'd')
+            for i in range(D):
+                for j in range(D):
+                    mat[i,j] = distanceNormals[i] * distanceNormals[j]
+            mat = numerix.sum(mat, axis=2)
+
+            inverse = numerix.zeros((D, D, N), 'd')
+            if D == 1:
+                inverse[0,0] = 1. / mat[0,0]
+            elif D == 2:
+                inverse[0,0] = mat[1,1]
+                inverse[0,1] = -mat[0,1]
+                inverse[1,0] = -mat[1,0]
+                inverse[1,1] = mat[0,0]
+                inverse /= mat[0,0] * mat[1,1] - mat[0,1] * mat[1,0]
+            else:
+                ## transposed cofactors, then the determinant by expansion 
+                ## along the first row
+                for i in range(3):
+                    for j in range(3):
+                        inverse[j,i] = (mat[(i + 1) % 3, (j + 1) % 3] * mat[(i + 2) % 3, (j + 2) % 3]
+                                        - mat[(i + 1) % 3, (j + 2) % 3] * mat[(i + 2) % 3, (j + 1) % 3])
+                inverse /= numerix.sum(mat[0] * inverse[:,0], axis=0)
+
+            self.leastSquaresGradMatrices = (distanceNormals, inverse)
+
+        return self.leastSquaresGradMatrices
+
     def _getCellAreas(self):
         return self.cellAreas
 
@@ -730,12 +990,11 @@ class Mesh:
         
         self.scaledFaceToCellDistances = self.scale['length'] * self.faceToCellDistances
         self.scaledCellDistances = self.scale['length'] * self.cellDistances
-        self.scaledCellToCellDistances = self.scale['length'] * self.cellToCellDistances
         
         self._calcAreaProjections()
         self._calcOrientedAreaProjections()
         self._calcFaceToCellDistanceRatio()
-        self._calcFaceAspectRatios()
+        self._releaseGeometry(self._scaledLazyGeometry)
         
     """point to cell distances"""
     
@@ -756,20 +1015,35 @@ class Mesh:
            >>> m1 = Grid2D(nx=2, ny=2, dx=5., dy=5.)
            >>> print m0._getNearestCellID(m1.getCellCenters().getGlobalValue())
            [4 5 7 8]
+
+        The lookup uses a spatial index of the cell centers, so it agrees
+        with the analytic lookup of a uniform grid
+
+           >>> m = Grid2D(nx=30, ny=20, dx=.5, dy=.5)
+           >>> from fipy.tools.numerix import random
+           >>> points = random.random((2, 100)) * ((16.,), (11.,)) - 0.5
+           >>> print (Mesh._getNearestCellID(m, points) 
+           ...        == m._getNearestCellID(points)).all()
+           True
            
         """
         if self.globalNumberOfCells == 0:
             return numerix.arange(0)
             
-        points = numerix.resize(points, (self.globalNumberOfCells, len(points), len(points[0]))).swapaxes(0,1)
-
-        centers = self.getCellCenters().getGlobalValue()[...,numerix.newaxis]
-        try:
-            tmp = centers - points
-        except TypeError:
-            tmp = centers - PhysicalField(points)
-
-        return numerix.argmin(numerix.dot(tmp, tmp, axis = 0), axis=0)
+        if isinstance(points, PhysicalField):
+            points = points.getNumericValue()
+
+        return self._getCellCenterTree().getNearestIDs(points)
+
+    def _getCellCenterTree(self):
+        ## spatial index of the global cell centers, built once
+        if not hasattr(self, 'cellCenterTree'):
+            from fipy.tools.kdTree import _KDTree
+            centers = self.getCellCenters().getGlobalValue()
+            if isinstance(centers, PhysicalField):
+                centers = centers.getNumericValue()
+            self.cellCenterTree = _KDTree(centers)
+        return self.cellCenterTree
 
 ## pickling
 
@@ -176,11 +176,59 @@ import mesh2D
 ## from fipy.tools.profiler.profiler import Profiler
 ## from fipy.tools.profiler.profiler import calibrate_profiler
 import os
+import itertools
 
 class MeshImportError(Exception):
     pass
 
 class _DataGetter:
+    """
+    Reads the vertices, faces and cells of a `.msh` file.
+
+        >>> import tempfile
+        >>> (f, filename) = tempfile.mkstemp('.msh')
+        >>> mshFile = open(filename, 'w')
+        >>> mshFile.writelines(['$MeshFormat\\n', '2 0 8\\n', '$EndMeshFormat\\n',
+        ...                     '$Nodes\\n', '4\\n', 
+        ...                     '1 0 0 0\\n', '2 1 0 0\\n', '4 0 1 0\\n', '7 1 1 0\\n',
+        ...                     '$EndNodes\\n', '$Elements\\n', '4\\n',
+        ...                     '1 15 2 0 1 1\\n', '2 1 2 0 1 1 2\\n',
+        ...                     '3 2 2 0 6 1 2 4\\n', '4 2 3 0 6 0 2 7 4\\n',
+        ...                     '$EndElements\\n'])
+        >>> mshFile.close()
+        
+    Only the triangles are cells of a two-dimensional mesh, and faces
+    shared by cells are only counted once
+    
+        >>> data = _DataGetter(filename, dimensions=2).getData()
+        >>> print data['vertexCoords']
+        [[ 0.  1.  0.  1.]
+         [ 0.  0.  1.  1.]]
+        >>> print data['faceVertexIDs']
+        [[1 0 2 3 2]
+         [0 2 1 1 3]]
+        >>> print data['cellFaceIDs']
+        [[0 3]
+         [1 2]
+         [2 4]]
+         
+    The number of elements must match the number promised
+    
+        >>> lines = open(filename).readlines()
+        >>> lines[11] = '5\\n'
+        >>> open(filename, 'w').writelines(lines)
+        >>> data = _DataGetter(filename, dimensions=2).getData()
+        Traceback (most recent call last):
+            ...
+        IndexError: Number of elements (4) does not match number promised (5)
+        
+        >>> import os
+        >>> os.close(f)
+        >>> os.remove(filename)
+    """
+    ## number of lines of a node or element block parsed at a time
+    _chunkSize = 100000
+    
     def __init__(self, filename, dimensions, coordDimensions = None):
         self.coordDimensions = coordDimensions or dimensions
 
@@ -190,74 +238,90 @@ class _DataGetter:
         self.filename = filename
         
     def getData(self):
-        self.inFile = open(self.filename)
-        self.fileType = self.getFileType() #gets version of gmsh, I think
+        self._readFile()
         #vertexCoords are x,y coords of nodes/vertices from gmsh file 
         vertexCoords = self._calcVertexCoords(self.coordDimensions)
 
         self._calcCellVertexIDs()
         self._calcBaseFaceVertexIDs()
-        faceVertexIDs = self._calcFaceVertexIDs()#reads nodes/vertices from gmsh file 
+        faceVertexIDs = self._calcFaceVertexIDs()
         cellFaceIDs = self._calcCellFaceIDs()
 
-        self.inFile.close()
-
         return {
             'vertexCoords': vertexCoords,
             'faceVertexIDs': faceVertexIDs,
             'cellFaceIDs': cellFaceIDs
             }
             
-    def getFileType(self):
-        data = self.getTagData("$MeshFormat", "$EndMeshFormat")
-        if data is None:
-            return 1.0
-        else:
-            return float(data[0].split()[0])
+    def _readFile(self):
+        """
+        Read the format, nodes and elements of the file in a single pass,
+        parsing the node and element blocks straight into arrays.
+        """
+        self.fileType = 1.0 #gets version of gmsh, I think
+        self.nodeIDs = None
+        self.cellNodeIDs = None
         
-    def getTagData(self, begin, end):
-        self.inFile.seek(0)
+        inFile = open(self.filename)
+        try:
+            for line in inFile:
+                tag = line.strip()
+                if tag == "$MeshFormat":
+                    self.fileType = float(inFile.next().split()[0])
+                    self._skipTo(inFile, "$MeshFormat", "$EndMeshFormat")
+                elif tag == "$NOD":
+                    self._readNodes(inFile, tag, "$ENDNOD")
+                elif tag == "$Nodes":
+                    self._readNodes(inFile, tag, "$EndNodes")
+                elif tag == "$ELM":
+                    self._readElements(inFile, tag, "$ENDELM")
+                elif tag == "$Elements":
+                    self._readElements(inFile, tag, "$EndElements")
+        finally:
+            inFile.close()
+            
+        if self.nodeIDs is None or self.cellNodeIDs is None:
+            raise MeshImportError, "No nodes or no elements in '%s'" % self.filename
+
+    def _skipTo(self, inFile, begin, end):
+        for line in inFile:
+            if end in line:
+                return
+        raise EOFError, "No matching '%s' for '%s'" % (end, begin)
         
-        for line in self.inFile:
-            if begin in line:
-                data = []
-                for subline in self.inFile:
-                    if end in subline:
-                        return data
-                    data.append(subline)
+    def _readBlock(self, inFile, begin, end, kind):
+        ## yield the lines of a block of a promised number of lines in chunks
+        number = int(inFile.next())
+        read = 0
+        while read < number:
+            lines = list(itertools.islice(inFile, min(self._chunkSize, number - read)))
+            tags = [i for i, line in enumerate(lines) if line.startswith('$')]
+            if len(tags) > 0:
+                raise IndexError, "Number of %s (%d) does not match number promised (%d)" % (kind, read + tags[0], number)
+            if len(lines) == 0:
                 raise EOFError, "No matching '%s' for '%s'" % (end, begin)
+            read += len(lines)
+            yield lines
+            
+        for line in inFile:
+            if end in line:
+                return
+            raise IndexError, "Number of %s (more than %d) does not match number promised (%d)" % (kind, number, number)
+        raise EOFError, "No matching '%s' for '%s'" % (end, begin)
                 
-        return None
-
-    def _calcVertexCoords(self, coordDimensions):
-        if self.fileType == 1:
-            nodeLines = self.getTagData("$NOD", "$ENDNOD")
-        else:
-            nodeLines = self.getTagData("$Nodes", "$EndNodes")
-
-    ## get the vertex coordinates
-        nodeToVertexIDdict = {}
-        
-        numVertices = int(nodeLines[0])
-        if numVertices != len(nodeLines[1:]):
-            raise IndexError, "Number of nodes (%d) does not match number promised (%d)" % (numVertices, len(nodeLines[1:]))
-
-        vertexCoords = []
-        for node, i in zip(nodeLines[1:], range(len(nodeLines[1:]))):
-            nodeInfo = node.split()
-            nodeToVertexIDdict[int(nodeInfo[0])] = i
-            vertexCoords.append([float(n) for n in nodeInfo[1:]])
+    def _readNodes(self, inFile, begin, end):
+        nodeIDs = []
+        coords = []
+        for lines in self._readBlock(inFile, begin, end, "nodes"):
+            nodeInfo = numerix.reshape(numerix.fromstring(''.join(lines), dtype='d', sep=' '), 
+                                       (len(lines), -1))
+            nodeIDs.append(nodeInfo[:,0].astype('l'))
+            coords.append(nodeInfo[:,1:])
+            
+        self.nodeIDs = numerix.concatenate(nodeIDs)
+        self.nodeCoords = numerix.concatenate(coords)
 
-        vertexCoords = numerix.array(vertexCoords, 'd')
-        
-        maxNode = max(nodeToVertexIDdict.keys())
-        nodeToVertexIDs = numerix.zeros((maxNode + 1,))
-        for i in nodeToVertexIDdict.keys():
-            nodeToVertexIDs[i] = nodeToVertexIDdict[i]
-        self.nodeToVertexIDs = nodeToVertexIDs
-        return vertexCoords[:,:coordDimensions].swapaxes(0,1)
-        
-    def _calcCellVertexIDs(self):
+    def _readElements(self, inFile, begin, end):
         """
         Get the elements.
         
@@ -265,53 +329,61 @@ class _DataGetter:
         
         .. note:: so far this only supports tetrahedral and triangular meshes.
         """
-        if self.fileType == 1:
-            elementLines = self.getTagData("$ELM", "$ENDELM")
-        else:
-            elementLines = self.getTagData("$Elements", "$EndElements")
-
-        numElements = int(elementLines[0])
-        if numElements != len(elementLines[1:]):
-            raise IndexError, "Number of elements (%d) does not match number promised (%d)" % (numElements, len(elementLines[1:]))
-                            
         cellNodeIDs = []
-        for element in elementLines[1:]:
-            elementInfo = [int(x) for x in element.split()]
-            elementType = elementInfo[1]
-            if elementType in (1, 15):
-                continue
-            elif elementType in (2, 4):
-                if ((self.dimensions == 2 and elementType == 4) 
-                    or (self.dimensions == 3 and elementType == 2)):
-                    continue
-                                  
-                if self.fileType == 1:
-                    numNodes = elementInfo[4]
-                    skip = 5
-                else:
-                    if elementType == 2:
-                        numNodes = 3
-                    else:
-                        numNodes = 4
-                    skip = 3 + elementInfo[2] 
-                    
-                if len(elementInfo) != skip + numNodes:
-                    raise IndexError, "Number of nodes (%d) not as expected (%d) for element type %d" % (len(elementInfo) - skip, numNodes, elementType)
-
-                cellNodeIDs.append(elementInfo[skip:])
-            elif elementType in (3,):
-                if self.fileType == 2:
-                    numNodes = 4
-                    #skip is the number of columns to pass over to get to vertex info.
-                    skip = 3 + elementInfo[2]
-                else:
+        for lines in self._readBlock(inFile, begin, end, "elements"):
+            counts = numerix.array([len(line.split()) for line in lines])
+            elementInfo = numerix.fromstring(''.join(lines), dtype='l', sep=' ')
+            starts = numerix.cumsum(counts) - counts
+            elementTypes = elementInfo[starts + 1]
+            
+            unknown = ((elementTypes != 1) & (elementTypes != 15) & (elementTypes != 2) 
+                       & (elementTypes != 3) & (elementTypes != 4))
+            if unknown.any():
+                raise TypeError, "Can't understand element type %d. Only triangle (2) or tetrahedron (4) are allowed" % elementTypes[unknown][0]
+                
+            if self.dimensions == 2:
+                cells = (elementTypes == 2) | (elementTypes == 3)
+            else:
+                cells = (elementTypes == 4) | (elementTypes == 3)
+                
+            if self.fileType == 1:
+                if (elementTypes == 3).any():
                     raise TypeError, "don't know how to handle quadralaterals in version 1. files"
-                cellNodeIDs.append(elementInfo[skip:])
+                numNodes = elementInfo[starts + 4]
+                skip = 5
             else:
-                raise TypeError, "Can't understand element type %d. Only triangle (2) or tetrahedron (4) are allowed" % elementInfo[1]
+                numNodes = numerix.where(elementTypes == 2, 3, 4)
+                #skip is the number of columns to pass over to get to vertex info.
+                skip = 3 + elementInfo[starts + 2]
+                
+            skip = (skip + numerix.zeros(counts.shape, 'l'))[cells]
+            starts = starts[cells]
+            numNodes = numNodes[cells]
+            elementTypes = elementTypes[cells]
+            
+            wrong = counts[cells] != skip + numNodes
+            if wrong.any():
+                raise IndexError, "Number of nodes (%d) not as expected (%d) for element type %d" % ((counts[cells] - skip)[wrong][0], numNodes[wrong][0], elementTypes[wrong][0])
+            
+            if len(starts) > 0:
+                if (numNodes != numNodes[0]).any():
+                    raise MeshImportError, "All cells must have the same number of vertices"
+                ids = (starts + skip)[:, numerix.newaxis] + numerix.arange(numNodes[0])
+                cellNodeIDs.append(numerix.take(elementInfo, ids))
                 
+        if len(cellNodeIDs) > 0 and len(set([ids.shape[1] for ids in cellNodeIDs])) > 1:
+            raise MeshImportError, "All cells must have the same number of vertices"
+        self.cellNodeIDs = numerix.concatenate(cellNodeIDs)
+
+    def _calcVertexCoords(self, coordDimensions):
+        nodeToVertexIDs = numerix.zeros((self.nodeIDs.max() + 1,), 'l')
+        nodeToVertexIDs[self.nodeIDs] = numerix.arange(len(self.nodeIDs))
+        self.nodeToVertexIDs = nodeToVertexIDs
+        return self.nodeCoords[:,:coordDimensions].swapaxes(0,1)
+        
+    def _calcCellVertexIDs(self):
         self.cellVertexIDs = numerix.take(self.nodeToVertexIDs, 
-                                          numerix.array(cellNodeIDs)).swapaxes(0,1)       
+                                          self.cellNodeIDs).swapaxes(0,1)       
         self.numCells = self.cellVertexIDs.shape[-1]
 
     def _calcBaseFaceVertexIDs(self):
@@ -320,8 +392,7 @@ class _DataGetter:
     ## compute the face vertex IDs.
         ### this assumes triangular grid
         #cellFaceVertexIDs = numerix.ones((self.dimensions, self.dimensions + 1, self.numCells))
-        cellFaceVertexIDs = numerix.ones((self.dimensions,len(cellVertexIDs), self.numCells))
-        cellFaceVertexIDs = -1 * cellFaceVertexIDs
+        cellFaceVertexIDs = -numerix.ones((self.dimensions,len(cellVertexIDs), self.numCells), 'l')
 
         if (self.dimensions == 3):
             cellFaceVertexIDs[:, 0, :] = cellVertexIDs[:3]
@@ -359,37 +430,28 @@ class _DataGetter:
         self.cellFaceVertexIDs = cellFaceVertexIDs
 
     def _calcFaceVertexIDs(self):
+        ## faces are numbered in the order they first appear; sorting the
+        ## sorted vertex IDs of every face of every cell brings the copies
+        ## of each face together
+        baseIDs = self.baseFaceVertexIDs
+        N = baseIDs.shape[-1]
+        order = numerix.lexsort((numerix.arange(N),) + tuple(baseIDs[::-1]))
+        sortedIDs = numerix.take(baseIDs, order, axis=1)
+        new = numerix.concatenate(((True,), (sortedIDs[:,1:] != sortedIDs[:,:-1]).any(axis=0)))
+        groups = numerix.cumsum(new) - 1
+        firsts = order[new]
+        
+        faceOrder = numerix.argsort(firsts)
+        faceIDs = numerix.zeros((len(firsts),), 'l')
+        faceIDs[faceOrder] = numerix.arange(len(firsts))
+        
+        self.baseFaceIDs = numerix.zeros((N,), 'l')
+        self.baseFaceIDs[order] = faceIDs[groups]
 
-        self.faceStrToFaceIDs = {}
-        faceStrToFaceIDsUnsorted = {}
-
-        currIndex = 0
-
-        for i in range(self.baseFaceVertexIDs.shape[-1]):
-            listI = self.baseFaceVertexIDs[:,i]
-            listJ = self.unsortedBaseIDs[:,i]
-
-            key = ' '.join([str(i) for i in listI])
-            if(not (self.faceStrToFaceIDs.has_key(key))):
-                self.faceStrToFaceIDs[key] = currIndex
-                faceStrToFaceIDsUnsorted[' '.join([str(j) for j in listJ])] = currIndex
-
-                currIndex = currIndex + 1
-        numFaces = currIndex
-        faceVertexIDs = numerix.zeros((self.dimensions, numFaces))
-        for i in faceStrToFaceIDsUnsorted.keys():
-            faceVertexIDs[:, faceStrToFaceIDsUnsorted[i]] = [int(x) for x in i.split(' ')]
-
-        return faceVertexIDs
+        return numerix.take(self.unsortedBaseIDs, firsts[faceOrder], axis=1)
 
     def _calcCellFaceIDs(self):
-
-        cellFaceIDs = numerix.zeros(self.cellFaceVertexIDs.shape[1:])
-        for j in range(self.cellFaceVertexIDs.shape[-1]):
-            cell = self.cellFaceVertexIDs[...,j]
-            for i in range(cell.shape[-1]):
-                cellFaceIDs[i, j] = self.faceStrToFaceIDs[' '.join([str(k) for k in self.cellFaceVertexIDs[:,i, j]])]
-        return cellFaceIDs
+        return numerix.reshape(self.baseFaceIDs, self.cellFaceVertexIDs.shape[:0:-1]).swapaxes(0,1)
 
 class MshFile:
     def __init__(self, arg):
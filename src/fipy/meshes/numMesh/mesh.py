@@ -42,6 +42,7 @@ from fipy.tools import numerix
 from fipy.tools.numerix import MA
 
 from fipy.meshes.common.mesh import Mesh as _CommonMesh
+from fipy.meshes.common.mesh import _getIDType
 
 from fipy.meshes.numMesh.cell import Cell
 
@@ -62,8 +63,14 @@ class Mesh(_CommonMesh):
         """faceVertexIds and cellFacesIds must be padded with minus ones."""
 
         self.vertexCoords = vertexCoords
-        self.faceVertexIDs = MA.masked_values(faceVertexIDs, -1)
-        self.cellFaceIDs = MA.masked_values(cellFaceIDs, -1)
+
+        ## the connectivity is held in the smallest integer type that can
+        ## index every vertex, face and cell
+        IDType = _getIDType(max(numerix.shape(vertexCoords)[-1], 
+                                numerix.shape(faceVertexIDs)[-1], 
+                                numerix.shape(cellFaceIDs)[-1]))
+        self.faceVertexIDs = MA.masked_values(numerix.array(MA.filled(faceVertexIDs, -1), IDType), -1)
+        self.cellFaceIDs = MA.masked_values(numerix.array(MA.filled(cellFaceIDs, -1), IDType), -1)
 
         _CommonMesh.__init__(self)
         
@@ -180,10 +187,8 @@ class Mesh(_CommonMesh):
         _CommonMesh._calcTopology(self)
 
         ## calculate new geometry
-        self._calcFaceToCellDistanceRatio()
-        self._calcCellToCellDistances()
+        self.releaseGeometry()
         self._calcScaledGeometry()
-        self._calcFaceAspectRatios()
         
     def _getConcatenableMesh(self):
         return self
@@ -329,9 +334,10 @@ class Mesh(_CommonMesh):
     """calc Topology methods"""
 
     def _calcFaceCellIDs(self):
-        array = MA.array(MA.indices(self.cellFaceIDs.shape, 'l')[1], 
+        IDType = self.cellFaceIDs.dtype
+        array = MA.array(MA.indices(self.cellFaceIDs.shape, IDType)[1], 
                          mask=MA.getmask(self.cellFaceIDs))
-        self.faceCellIDs = MA.zeros((2, self.numberOfFaces), 'l')
+        self.faceCellIDs = MA.zeros((2, self.numberOfFaces), IDType)
 
         ## Nasty bug: MA.put(arr, ids, values) fills its ids and
         ## values arguments when masked!  This was not the behavior
@@ -456,7 +462,6 @@ class Mesh(_CommonMesh):
     def _calcGeometry(self):
         self._calcFaceCenters()
         _CommonMesh._calcGeometry(self)
-        self._calcCellNormals()
         
     """calc geometry methods"""
 
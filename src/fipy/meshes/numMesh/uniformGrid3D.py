@@ -230,8 +230,8 @@ class UniformGrid3D(Grid3D):
         indices = numerix.indices((self.nx, self.ny, self.nz))
         ids[0] = indices[0] + (indices[1] + indices[2] * self.ny) * self.nx - 1
         ids[1] = indices[0] + (indices[1] + indices[2] * self.ny) * self.nx + 1
-        ids[2] = indices[0] + (indices[1] + indices[2] * self.ny - self.nz) * self.nx
-        ids[3] = indices[0] + (indices[1] + indices[2] * self.ny + self.nz) * self.nx
+        ids[2] = indices[0] + (indices[1] - 1 + indices[2] * self.ny) * self.nx
+        ids[3] = indices[0] + (indices[1] + 1 + indices[2] * self.ny) * self.nx
         ids[4] = indices[0] + (indices[1] + (indices[2] - 1) * self.ny) * self.nx
         ids[5] = indices[0] + (indices[1] + (indices[2] + 1) * self.ny) * self.nx
         
@@ -424,7 +424,7 @@ class UniformGrid3D(Grid3D):
         distances[4,...,      0] = self.dz / 2.
         distances[5,...,     -1] = self.dz / 2.
 
-        return numerix.reshape(distances.swapaxes(1,3), (self.numberOfCells, 6))
+        return numerix.reshape(distances.swapaxes(1,3), (6, self.numberOfCells))
         
     def _getCellNormals(self):
         normals = numerix.zeros((3, 6, self.numberOfCells), 'd')
@@ -1,2 +1,3 @@
 from advectionEquation import buildAdvectionEquation
 from higherOrderAdvectionEquation import buildHigherOrderAdvectionEquation
+from advectionStepper import AdvectionStepper
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+
+## -*-Pyth-*-
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ # 
+ #  FILE: "advectionStepper.py"
+ #
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #  
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ # 
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #  
+ # ###################################################################
+ ##
+ 
+__docformat__ = 'restructuredtext'
+
+from fipy.tools import numerix
+from fipy.tools.numerix import MA
+from advectionTerm import _AdvectionTerm
+
+class AdvectionStepper:
+    r"""
+    Advances a `DistanceVariable` with an advection equation over a time
+    step, in as many substeps as the Courant-Friedrichs-Lewy condition
+    requires, and reinitializes it as a distance function only when needed.
+
+    The stable substep is
+
+    .. math::
+
+       \Delta t = C \min_P \frac{\min_A d_{AP}}{\abs{u_P}}
+
+    where :math:`C` is the `cflNumber`, :math:`u_P` is the advection
+    coefficient of the equation in cell :math:`P` and :math:`d_{AP}` the
+    distances to its neighbors.
+
+        >>> from fipy.meshes.grid1D import Grid1D
+        >>> from fipy.models.levelSet.distanceFunction.distanceVariable import DistanceVariable
+        >>> from fipy.models.levelSet.advection.advectionEquation import buildAdvectionEquation
+        >>> mesh = Grid1D(nx=40, dx=1.)
+        >>> x = mesh.getCellCenters()[0]
+        >>> distanceVar = DistanceVariable(mesh=mesh, value=x - 10.2, hasOld=1)
+        >>> stepper = AdvectionStepper(distanceVar, buildAdvectionEquation(advectionCoeff=2.),
+        ...                            cflNumber=0.5)
+        >>> print stepper.getStableTimeStep()
+        0.25
+
+    A time step of `1.` then takes four substeps, which carry the zero
+    level set two cells to the right
+
+        >>> print stepper.step(dt=1.)
+        4
+        >>> print numerix.allclose(distanceVar[5:], (x - 12.2)[5:])
+        True
+
+    The `DistanceVariable` is reinitialized after every
+    `reinitializationInterval` substeps, if given, and whenever the zero
+    level set may have moved `bandFraction` of the way out of the narrow
+    band, i.e., by `bandFraction * narrowBandWidth / 2`
+
+        >>> distanceVar = DistanceVariable(mesh=mesh, value=x - 10.2, hasOld=1,
+        ...                                narrowBandWidth=4.)
+        >>> stepper = AdvectionStepper(distanceVar, buildAdvectionEquation(advectionCoeff=2.),
+        ...                            cflNumber=0.5)
+        >>> print stepper.step(dt=1.), stepper.reinitializations
+        4 1
+        >>> print stepper.step(dt=1.), stepper.reinitializations
+        4 2
+        >>> stepper = AdvectionStepper(distanceVar, buildAdvectionEquation(advectionCoeff=2.),
+        ...                            cflNumber=0.5, reinitializationInterval=1)
+        >>> print stepper.step(dt=1.), stepper.reinitializations
+        4 4
+
+    A time step shorter than the stable substep is taken whole
+
+        >>> print stepper.step(dt=0.1)
+        1
+    """
+    def __init__(self, distanceVar, advectionEquation, cflNumber=0.2, 
+                 reinitializationInterval=None, bandFraction=0.8):
+        """
+        :Parameters:
+          - `distanceVar`: The `DistanceVariable` to advect.
+          - `advectionEquation`: An equation from `buildAdvectionEquation()`
+            or `buildHigherOrderAdvectionEquation()`.
+          - `cflNumber`: The fraction of the stable time step to take.
+          - `reinitializationInterval`: The number of substeps between
+            reinitializations, or `None` to reinitialize only as the
+            narrow band requires.
+          - `bandFraction`: The fraction of half the narrow band the zero
+            level set may cross before the `distanceVar` is reinitialized.
+        """
+        self.distanceVar = distanceVar
+        self.advectionEquation = advectionEquation
+        self.cflNumber = cflNumber
+        self.reinitializationInterval = reinitializationInterval
+        self.bandFraction = bandFraction
+        
+        self.advectionTerms = [term for term in advectionEquation._getTerms() 
+                               if isinstance(term, _AdvectionTerm)]
+        if len(self.advectionTerms) == 0:
+            raise TypeError, "`advectionEquation` has no advection term"
+
+        self.substeps = 0
+        self.travel = 0.
+        self.reinitializations = 0
+        
+    def _getMaxSpeed(self):
+        mesh = self.distanceVar.getMesh()
+        speed = 0.
+        for term in self.advectionTerms:
+            speed = speed + abs(numerix.array(term._getGeomCoeff(mesh)))
+        return numerix.ones((mesh.getNumberOfCells(),), 'd') * speed
+
+    def _getCellSizes(self):
+        ## the distance from each cell to its nearest neighbor
+        mesh = self.distanceVar.getMesh()
+        if not hasattr(self, 'cellSizes'):
+            exterior = MA.getmaskarray(mesh._getCellToCellIDs())
+            self.cellSizes = numerix.where(exterior, 
+                                           numerix.inf, 
+                                           mesh._getCellToCellDistances()).min(axis=0)
+        return self.cellSizes
+
+    def getStableTimeStep(self):
+        """
+        Return the largest substep allowed by the `cflNumber` for the
+        current advection coefficient.
+        """
+        speed = self._getMaxSpeed()
+        moving = speed > 0
+        if not moving.any():
+            return numerix.inf
+        return self.cflNumber * (self._getCellSizes()[moving] / speed[moving]).min()
+
+    def _reinitialize(self):
+        self.distanceVar.calcDistanceFunction()
+        self.travel = 0.
+        self.reinitializations += 1
+
+    def step(self, dt):
+        """
+        Advance the `distanceVar` by `dt` and return the number of
+        substeps taken.
+        """
+        substep = self.getStableTimeStep()
+        substeps = max(int(numerix.ceil(dt / substep)), 1)
+        substep = dt / substeps
+        speed = self._getMaxSpeed().max()
+
+        for i in range(substeps):
+            self.distanceVar.updateOld()
+            self.advectionEquation.solve(self.distanceVar, dt=substep)
+            
+            self.substeps += 1
+            self.travel += speed * substep
+            if ((self.reinitializationInterval is not None 
+                 and self.substeps % self.reinitializationInterval == 0)
+                or self.travel >= self.bandFraction * self.distanceVar.narrowBandWidth / 2):
+                self._reinitialize()
+                
+        return substeps
+
+def _test(): 
+    import doctest
+    return doctest.testmod()
+    
+if __name__ == "__main__": 
+    _test() 
@@ -111,45 +111,119 @@ class _AdvectionTerm(Term):
     >>> answer = -vel * numerix.array((2, numerix.sqrt(2**2 + 6**2), 1, 0))
     >>> print parallel.procID > 0 or numerix.allclose(b, answer, atol = 1e-10)
     True
+
+    An equation of only a `TransientTerm` and an `_AdvectionTerm` is
+    advanced directly from the old value, without building a matrix
+    
+    >>> from fipy.terms.transientTerm import TransientTerm
+    >>> var = CellVariable(value = numerix.array((3., 1., 6., 7.)), mesh = mesh, hasOld = 1)
+    >>> eq = TransientTerm(2.) + _AdvectionTerm(vel)
+    >>> print eq._isExplicit()
+    True
+    >>> eq.solve(var, dt = 0.1)
+    >>> print parallel.procID > 0 or numerix.allclose(var, var.getOld() + 0.1 * answer / 2.)
+    True
+
+    and agrees with the solution of the linear system
+
+    >>> direct = numerix.array(var)
+    >>> var.setValue(var.getOld())
+    >>> eq.cacheMatrix()
+    >>> eq.solve(var, dt = 0.1)
+    >>> print numerix.allclose(var, direct)
+    True
+
+    A `DistanceVariable` restricted to its narrow band is only advected in
+    the band, and the rest is held at :math:`\pm` half the band width
+
+    >>> from fipy.models.levelSet.distanceFunction.distanceVariable import DistanceVariable
+    >>> mesh = Grid1D(dx = 1., nx = 10)
+    >>> x = mesh.getCellCenters()[0]
+    >>> var = DistanceVariable(mesh = mesh, value = x - 4.2, hasOld = 1,
+    ...                        narrowBandWidth = 4., restrictToNarrowBand = True)
+    >>> var.calcDistanceFunction()
+    >>> eq = TransientTerm() + _AdvectionTerm(1.)
+    >>> var.updateOld()
+    >>> eq.solve(var, dt = 0.5)
+    >>> print var
+    [-2.   -2.   -1.85 -1.2  -0.2   0.8   2.    2.    2.    2.  ]
     """
     def __init__(self, coeff = None):
         Term.__init__(self)
         self.geomCoeff = coeff
         
     def _buildMatrix(self, var, SparseMatrix, boundaryCondtions=(), dt=None, equation=None):
+        return (SparseMatrix(size=var.getMesh().getNumberOfCells()), 
+                self._buildRHSvector(var, boundaryCondtions, dt))
+
+    def _isExplicit(self):
+        return True
 
+    def _buildRHSvector(self, var, boundaryConditions=(), dt=None):
         oldArray = var.getOld()
 
         mesh = var.getMesh()
         NCells = mesh.getNumberOfCells()
         NCellFaces = mesh._getMaxFacesPerCell()
 
-        cellValues = numerix.repeat(oldArray[numerix.newaxis, ...], NCellFaces, axis = 0)
+        ## a `DistanceVariable` restricted to its narrow band is only
+        ## advected in the cells of the band
+        ids = None
+        if hasattr(var, '_getNarrowBandCellIDs'):
+            ids = var._getNarrowBandCellIDs()
+        if ids is None:
+            ids = slice(None)
+            
+        def take(a):
+            a = numerix.array(a)
+            if a.shape == ():
+                return a
+            else:
+                return a[..., ids]
+
+        cellValues = take(oldArray)
+        N = len(cellValues)
+        cellValues = numerix.repeat(cellValues[numerix.newaxis, ...], NCellFaces, axis = 0)
         
-        cellIDs = numerix.repeat(numerix.arange(NCells)[numerix.newaxis, ...], NCellFaces, axis = 0)
-        cellToCellIDs = mesh._getCellToCellIDs()
-
-        if NCells > 0:
-            cellToCellIDs = MA.where(MA.getmask(cellToCellIDs), cellIDs, cellToCellIDs) 
+        if N > 0:
+            ## the cell itself stands in for missing neighbors
+            cellToCellIDs = self._getCellGeometry(mesh)['cellToCellIDsFilled'][..., ids]
 
             adjacentValues = numerix.take(oldArray, cellToCellIDs)
 
-            differences = self._getDifferences(adjacentValues, cellValues, oldArray, cellToCellIDs, mesh)
+            differences = self._getDifferences(adjacentValues, cellValues, oldArray, cellToCellIDs, mesh, ids)
             differences = MA.filled(differences, 0)
             
-            minsq = numerix.sqrt(numerix.sum(numerix.minimum(differences, numerix.zeros((NCellFaces, NCells)))**2, axis=0))
-            maxsq = numerix.sqrt(numerix.sum(numerix.maximum(differences, numerix.zeros((NCellFaces, NCells)))**2, axis=0))
+            minsq = numerix.sqrt(numerix.sum(numerix.minimum(differences, numerix.zeros((NCellFaces, N)))**2, axis=0))
+            maxsq = numerix.sqrt(numerix.sum(numerix.maximum(differences, numerix.zeros((NCellFaces, N)))**2, axis=0))
 
-            coeff = numerix.array(self._getGeomCoeff(mesh))
+            coeff = take(self._getGeomCoeff(mesh))
 
             coeffXdiffereneces = coeff * ((coeff > 0.) * minsq + (coeff < 0.) * maxsq)
         else:
             coeffXdiffereneces = 0.
 
-        return (SparseMatrix(size = NCells), -coeffXdiffereneces * mesh.getCellVolumes())
+        if isinstance(ids, slice):
+            return -coeffXdiffereneces * mesh.getCellVolumes()
+        else:
+            RHSvector = numerix.zeros((NCells,), 'd')
+            RHSvector[ids] = -coeffXdiffereneces * take(mesh.getCellVolumes())
+            return RHSvector
+        
+    def _getCellGeometry(self, mesh):
+        ## the uniform grids calculate these anew on every call
+        if not hasattr(self, 'cellGeometry') or self.cellGeometry['mesh'] is not mesh:
+            self.cellGeometry = {
+                'mesh': mesh,
+                'cellToCellIDsFilled': mesh._getCellToCellIDsFilled(),
+                'cellToCellIDs': mesh._getCellToCellIDs(),
+                'cellToCellDistances': mesh._getCellToCellDistances(),
+                'cellNormals': mesh._getCellNormals()
+            }
+        return self.cellGeometry
         
-    def _getDifferences(self, adjacentValues, cellValues, oldArray, cellToCellIDs, mesh):
-        return (adjacentValues - cellValues) / mesh._getCellToCellDistances()
+    def _getDifferences(self, adjacentValues, cellValues, oldArray, cellToCellIDs, mesh, ids=slice(None)):
+        return (adjacentValues - cellValues) / self._getCellGeometry(mesh)['cellToCellDistances'][..., ids]
 
     def _getDefaultSolver(self, solver, *args, **kwargs):
         if solver and not solver._canSolveAsymmetric():
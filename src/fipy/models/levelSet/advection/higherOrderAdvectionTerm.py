@@ -201,19 +201,30 @@ class _HigherOrderAdvectionTerm(_AdvectionTerm):
     The maximum error is 2 % when using a higher order contribution.
 
     """
-    def _getDifferences(self, adjacentValues, cellValues, oldArray, cellToCellIDs, mesh):
+    def _getDifferences(self, adjacentValues, cellValues, oldArray, cellToCellIDs, mesh, ids=slice(None)):
         
-        dAP = mesh._getCellToCellDistances()
+        geometry = self._getCellGeometry(mesh)
+        dAP = geometry['cellToCellDistances'][..., ids]
+        adjacentIDs = geometry['cellToCellIDs'][..., ids]
+        cellNormals = geometry['cellNormals'][..., ids]
+
+        if isinstance(ids, slice):
+            gradient = oldArray.getGrad()
+        else:
+            ## the gradient of just the cells and their neighbors
+            gradientIDs = numerix.unique(numerix.concatenate((ids, numerix.ravel(cellToCellIDs))))
+            gradient = numerix.zeros((mesh.getDim(), mesh.getNumberOfCells()), 'd')
+            gradient[..., gradientIDs] = mesh._getCellGaussGradAt(numerix.array(oldArray), gradientIDs)
         
 ##        adjacentGradient = numerix.take(oldArray.getGrad(), cellToCellIDs)
-        adjacentGradient = numerix.take(oldArray.getGrad(), mesh._getCellToCellIDs(), axis=-1)
-        adjacentNormalGradient = numerix.dot(adjacentGradient, mesh._getCellNormals())
+        adjacentGradient = numerix.take(gradient, adjacentIDs, axis=-1)
+        adjacentNormalGradient = numerix.dot(adjacentGradient, cellNormals)
         adjacentUpValues = cellValues + 2 * dAP * adjacentNormalGradient
 
-        cellIDs = numerix.repeat(numerix.arange(mesh.getNumberOfCells())[numerix.newaxis, ...], mesh._getMaxFacesPerCell(), axis=0)
-        cellIDs = MA.masked_array(cellIDs, mask = MA.getmask(mesh._getCellToCellIDs()))
-        cellGradient = numerix.take(oldArray.getGrad(), cellIDs, axis=-1)
-        cellNormalGradient = numerix.dot(cellGradient, mesh._getCellNormals())
+        cellIDs = numerix.repeat(numerix.arange(mesh.getNumberOfCells())[ids][numerix.newaxis, ...], mesh._getMaxFacesPerCell(), axis=0)
+        cellIDs = MA.masked_array(cellIDs, mask = MA.getmask(adjacentIDs))
+        cellGradient = numerix.take(gradient, cellIDs, axis=-1)
+        cellNormalGradient = numerix.dot(cellGradient, cellNormals)
         cellUpValues = adjacentValues - 2 * dAP * cellNormalGradient
         
         cellLaplacian = (cellUpValues + adjacentValues - 2 * cellValues) / dAP**2
@@ -228,7 +239,7 @@ class _HigherOrderAdvectionTerm(_AdvectionTerm):
                                          adjacentLaplacian,
                                          cellLaplacian))
         
-        return _AdvectionTerm._getDifferences(self, adjacentValues, cellValues, oldArray, cellToCellIDs, mesh) -  mm * dAP / 2.
+        return _AdvectionTerm._getDifferences(self, adjacentValues, cellValues, oldArray, cellToCellIDs, mesh, ids) -  mm * dAP / 2.
 
 def _test(): 
     import doctest
@@ -34,6 +34,8 @@
 
 __docformat__ = 'restructuredtext'
 
+import heapq
+
 from fipy.tools import numerix
 from fipy.tools.numerix import MA
 
@@ -176,8 +178,27 @@ class DistanceVariable(CellVariable):
 
     where the vectors :math:`\vec{s}`, :math:`\vec{t}` and :math:`\vec{u}` represent the
     vectors from the cell of interest to the neighboring cell.
+
+    With `restrictToNarrowBand`, `calcDistanceFunction()` records the cells
+    within `narrowBandWidth / 2` of the zero level set and sets the rest to
+    :math:`\pm` `narrowBandWidth / 2`. The advection terms and
+    `getCellInterfaceAreas()` then only evaluate the cells of this band,
+    so that their cost scales with the length of the interface rather
+    than with the size of the mesh.
+
+    >>> mesh = Grid1D(dx = 1., nx = 10)
+    >>> var = DistanceVariable(mesh = mesh, value = mesh.getCellCenters()[0] - 4.2,
+    ...                        narrowBandWidth = 4., restrictToNarrowBand = True)
+    >>> print var._getNarrowBandCellIDs()
+    None
+    >>> var.calcDistanceFunction()
+    >>> print var._getNarrowBandCellIDs()
+    [2 3 4 5]
+    >>> print var
+    [-2.  -2.  -1.7 -0.7  0.3  1.3  2.   2.   2.   2. ]
     """
-    def __init__(self, mesh, name = '', value = 0., unit = None, hasOld = 0, narrowBandWidth = 1e+10):
+    def __init__(self, mesh, name = '', value = 0., unit = None, hasOld = 0, narrowBandWidth = 1e+10,
+                 restrictToNarrowBand = False):
         """
         Creates a `distanceVariable` object.
 
@@ -189,11 +210,15 @@ class DistanceVariable(CellVariable):
           - `hasOld`: Whether the variable maintains an old value.
           - `narrowBandWidth`: The width of the region about the zero level set
             within which the distance function is evaluated.
+          - `restrictToNarrowBand`: Whether to evaluate the level set
+            only in the narrow band and hold the rest of the mesh fixed.
 
         """
         CellVariable.__init__(self, mesh, name = name, value = value, unit = unit, hasOld = hasOld)
         self._markStale()
         self.narrowBandWidth = narrowBandWidth
+        self.restrictToNarrowBand = restrictToNarrowBand
+        self.narrowBandCellIDs = None
 
         self.cellToCellDistances = MA.filled(self.mesh._getCellToCellDistances(), 0)
         self.cellNormals = MA.filled(self.mesh._getCellNormals(), 0)      
@@ -205,6 +230,11 @@ class DistanceVariable(CellVariable):
         self.adjacentCellIDs = self.mesh._getAdjacentCellIDs()
         self.exteriorFaces = self.mesh.getExteriorFaces()
         self.cellFaceIDs = self.mesh._getCellFaceIDs()
+        ## explicit masks of the neighbors and faces that cells do not
+        ## have, so that values are gathered without masked arrays
+        self.cellToCellMask = MA.getmaskarray(self.mesh._getCellToCellIDs())
+        self.cellFaceMask = MA.getmaskarray(self.cellFaceIDs)
+        self.cellFaceIDsFilled = numerix.array(MA.filled(self.cellFaceIDs, 0))
         
     def _calcValue(self):
         return self.value
@@ -240,8 +270,21 @@ class DistanceVariable(CellVariable):
             zero in isolated cells.
 
         """
-        self._calcDistanceFunction(narrowBandWidth = narrowBandWidth, deleteIslands = deleteIslands)
+        evaluatedFlag = self._calcDistanceFunction(narrowBandWidth = narrowBandWidth, deleteIslands = deleteIslands)
+
+        if self.restrictToNarrowBand:
+            if narrowBandWidth == None:
+                narrowBandWidth = self.narrowBandWidth
+            far = numerix.where(self.value > 0, 1., -1.) * narrowBandWidth / 2
+            self.value = numerix.where(evaluatedFlag, self.value, far)
+            self.narrowBandCellIDs = numerix.nonzero(evaluatedFlag)[0]
+            
         self._markFresh()
+
+    def _getNarrowBandCellIDs(self):
+        ## the cells evaluated by the last `calcDistanceFunction()`, or
+        ## `None` when every cell is to be evaluated
+        return self.narrowBandCellIDs
     
     def _calcDistanceFunction(self, extensionVariable = None, narrowBandWidth = None, deleteIslands = False):
 
@@ -250,18 +293,16 @@ class DistanceVariable(CellVariable):
 
         ## calculate interface values
 
-        cellToCellIDs = self.mesh._getCellToCellIDs()
-
         if deleteIslands:
-            adjVals = numerix.take(self.value, cellToCellIDs)
-            adjInterfaceValues = MA.masked_array(adjVals, mask = (adjVals * self.value) > 0)
+            adjVals = numerix.take(self.value, self.cellToCellIDs)
+            adjInterfaceValues = MA.masked_array(adjVals, mask = self.cellToCellMask | ((adjVals * self.value) > 0))
             masksum = numerix.sum(numerix.logical_not(MA.getmask(adjInterfaceValues)), 0)
             tmp = MA.logical_and(masksum == 4, self.value > 0)
             self.value = MA.where(tmp, -1, self.value)
 
-        adjVals = numerix.take(self.value, cellToCellIDs)
-        adjInterfaceValues = MA.masked_array(adjVals, mask = (adjVals * self.value) > 0)
-        dAP = self.mesh._getCellToCellDistances()
+        adjVals = numerix.take(self.value, self.cellToCellIDs)
+        adjInterfaceValues = MA.masked_array(adjVals, mask = self.cellToCellMask | ((adjVals * self.value) > 0))
+        dAP = self.cellToCellDistances
         distances = abs(self.value * dAP / (self.value - adjInterfaceValues))
         indices = MA.argsort(distances, 0)
         sign = (self.value > 0) * 2 - 1
@@ -323,37 +364,48 @@ class DistanceVariable(CellVariable):
             self.value = self.tmpValue.copy()
 
         ## evaluate the trialIDs
-        adjInterfaceFlag = numerix.take(interfaceFlag, cellToCellIDs)
-        hasAdjInterface = (numerix.sum(MA.filled(adjInterfaceFlag, 0), 0) > 0).astype('l')
+        adjInterfaceFlag = numerix.where(self.cellToCellMask, 0, numerix.take(interfaceFlag, self.cellToCellIDs))
+        hasAdjInterface = (numerix.sum(adjInterfaceFlag, 0) > 0).astype('l')
 
         trialFlag = numerix.logical_and(numerix.logical_not(interfaceFlag), hasAdjInterface).astype('l')
 
-        trialIDs = list(numerix.nonzero(trialFlag)[0])
+        trialIDs = numerix.nonzero(trialFlag)[0]
         evaluatedFlag = interfaceFlag
 
-
         for id in trialIDs:
             self.value[...,id], extensionVariable[id] = self._calcTrialValue(id, evaluatedFlag, extensionVariable)
 
-        while len(trialIDs):
+        ## march outward from the interface, always accepting the trial
+        ## cell closest to it; stale heap entries are lazily discarded
+        ## when they are popped rather than being removed on update
+        trialHeap = [(abs(self.value[id]), id) for id in trialIDs]
+        heapq.heapify(trialHeap)
+        
+        cellToCellIDsFilled = numerix.where(self.cellToCellMask, -1, self.cellToCellIDs)
+
+        while trialHeap:
 
-            id = trialIDs[numerix.argmin(abs(numerix.take(self.value, trialIDs)))]
+            distance, id = heapq.heappop(trialHeap)
 
-            if abs(self.value[...,id]) > narrowBandWidth / 2:
+            if not trialFlag[id] or distance != abs(self.value[...,id]):
+                continue
+
+            if distance > narrowBandWidth / 2:
                 break
 
-            trialIDs.remove(id)
+            trialFlag[...,id] = 0
             evaluatedFlag[...,id] = 1
 
-
-            for adjID in MA.filled(cellToCellIDs[...,id], -1):
+            for adjID in cellToCellIDsFilled[...,id]:
                 if adjID != -1:
                     if not evaluatedFlag[...,adjID]:
                         self.value[...,adjID], extensionVariable[...,adjID] = self._calcTrialValue(adjID, evaluatedFlag, extensionVariable)
-                        if adjID not in trialIDs:
-                            trialIDs.append(adjID)
+                        trialFlag[...,adjID] = 1
+                        heapq.heappush(trialHeap, (abs(self.value[...,adjID]), adjID))
 
         self.value = numerix.array(self.value)
+        
+        return evaluatedFlag
 
     def _calcTrialValue(self, id, evaluatedFlag, extensionVariable):
         adjIDs = self.cellToCellIDs[...,id]
@@ -480,12 +532,58 @@ class DistanceVariable(CellVariable):
         >>> distanceVariable = DistanceVariable(mesh = mesh, value = rad)
         >>> print distanceVariable.getCellInterfaceAreas().sum()
         1.57984690073
+
+        The same areas are found in the narrow band alone
+
+        >>> distanceVariable = DistanceVariable(mesh = mesh, value = rad, 
+        ...                                     narrowBandWidth = 0.2, restrictToNarrowBand = True)
+        >>> distanceVariable.calcDistanceFunction()
+        >>> bandIDs = distanceVariable._getNarrowBandCellIDs()
+        >>> print len(bandIDs) < mesh.getNumberOfCells()
+        True
+        >>> areas = distanceVariable.getCellInterfaceAreas()
+        >>> distanceVariable.narrowBandCellIDs = None
+        >>> print numerix.allclose(areas, distanceVariable.getCellInterfaceAreas())
+        True
         """        
+        if self._getNarrowBandCellIDs() is not None:
+            return self._getNarrowBandCellInterfaceAreas(self._getNarrowBandCellIDs())
+            
         normals = numerix.array(MA.filled(self._getCellInterfaceNormals(), 0))
         areas = numerix.array(MA.filled(self.mesh._getCellAreaProjections(), 0))
         return CellVariable(mesh=self.mesh, 
                             value=numerix.sum(abs(numerix.dot(normals, areas)), axis=0))
 
+    def _getNarrowBandCellInterfaceAreas(self, ids):
+        ## `getCellInterfaceAreas()` evaluated only at the cells `ids`, with
+        ## the level set normals of just the interface faces of those cells
+        value = numerix.array(self.value)
+        faceIDs = self.cellFaceIDsFilled[..., ids]
+        adjacentValues = value[self.adjacentCellIDs[0][faceIDs]] * value[self.adjacentCellIDs[1][faceIDs]]
+        interface = (adjacentValues < 0) & ~self.cellFaceMask[..., ids]
+        
+        normals = numerix.zeros((self.mesh.getDim(),) + faceIDs.shape, 'd')
+        interfaceFaceIDs = numerix.unique(faceIDs[interface])
+        if len(interfaceFaceIDs) > 0:
+            interpolation = self.mesh._getCellToFaceInterpolationOperator()._take(interfaceFaceIDs)
+            cellIDs = numerix.unique(interpolation.cols)
+            cellGrad = numerix.zeros((self.mesh.getDim(), self.mesh.getNumberOfCells()), 'd')
+            cellGrad[..., cellIDs] = self.mesh._getCellGaussGradAt(value, cellIDs)
+            faceGrad = interpolation * cellGrad
+            faceGradMag = numerix.sqrt(numerix.sum(faceGrad**2, axis=0))
+            faceGradMag = numerix.where(faceGradMag > 1e-10, faceGradMag, 1e-10)
+            
+            faceNormals = numerix.zeros((self.mesh.getDim(), self.mesh._getNumberOfFaces()), 'd')
+            faceNormals[..., interfaceFaceIDs] = faceGrad / faceGradMag
+            normals = numerix.where(interface & (value[ids] >= 0), faceNormals[..., faceIDs], 0)
+            
+        if not hasattr(self, 'cellAreaProjections'):
+            self.cellAreaProjections = numerix.array(MA.filled(self.mesh._getCellAreaProjections(), 0))
+        areas = self.cellAreaProjections[..., ids]
+        cellAreas = numerix.zeros((self.mesh.getNumberOfCells(),), 'd')
+        cellAreas[ids] = numerix.sum(abs(numerix.sum(normals * areas, axis=0)), axis=0)
+        return CellVariable(mesh=self.mesh, value=cellAreas)
+
     def _getCellInterfaceNormals(self):
         """
         
@@ -583,7 +681,7 @@ class DistanceVariable(CellVariable):
         True
 
         """
-        flag = MA.filled(numerix.take(self._getInterfaceFlag(), self.cellFaceIDs), 0)
+        flag = numerix.where(self.cellFaceMask, 0, numerix.take(self._getInterfaceFlag(), self.cellFaceIDsFilled))
 
         flag = numerix.sum(flag, axis=0)
         
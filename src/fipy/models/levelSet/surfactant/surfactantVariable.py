@@ -102,10 +102,7 @@ class SurfactantVariable(CellVariable):
         self.distanceVar = self._requires(distanceVar)
         self.value = distanceVar.getCellInterfaceAreas() * value / self.mesh.getCellVolumes()
 
-        if hasOld:
-            self.old = self.copy()
-        else:
-            self.old = None
+        self._setOld(hasOld)
 
         self.interfaceSurfactantVariable = None
 
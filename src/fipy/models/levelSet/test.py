@@ -43,6 +43,7 @@ def _suite():
         docTestModuleNames = (
             'advection.advectionTerm',
             'advection.higherOrderAdvectionTerm',
+            'advection.advectionStepper',
             'distanceFunction.distanceVariable',
             'surfactant.surfactantVariable',
             'distanceFunction.levelSetDiffusionVariable',
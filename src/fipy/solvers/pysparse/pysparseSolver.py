@@ -35,9 +35,17 @@
 
 __docformat__ = 'restructuredtext'
 
-from fipy.tools.pysparseMatrix import _PysparseMatrix
+import os
+import sys
+
+from fipy.tools.pysparseMatrix import _PysparseMatrix, _PysparseTripletMatrix
 from fipy.solvers.solver import Solver
 
+if '--triplet-assembly' in sys.argv[1:]:
+    doTripletAssembly = True
+else:
+    doTripletAssembly = os.environ.has_key('FIPY_TRIPLET_ASSEMBLY')
+
 class PysparseSolver(Solver):
     """
     The base `pysparseSolver` class.
@@ -51,4 +59,7 @@ class PysparseSolver(Solver):
         Solver.__init__(self, *args, **kwargs)
 
     def _getMatrixClass(self):
-        return _PysparseMatrix
+        if doTripletAssembly:
+            return _PysparseTripletMatrix
+        else:
+            return _PysparseMatrix
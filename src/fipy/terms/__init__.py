@@ -12,4 +12,6 @@ from exponentialConvectionTerm import ExponentialConvectionTerm
 from hybridConvectionTerm import HybridConvectionTerm
 from powerLawConvectionTerm import PowerLawConvectionTerm
 from upwindConvectionTerm import UpwindConvectionTerm
-from vanLeerConvectionTerm import VanLeerConvectionTerm
\ No newline at end of file
+from vanLeerConvectionTerm import VanLeerConvectionTerm
+
+from coupledEquations import CoupledEquations
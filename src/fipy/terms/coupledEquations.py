@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+
+## -*-Pyth-*-
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ # 
+ #  FILE: "coupledEquations.py"
+ #
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #  
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ # 
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #  
+ # ###################################################################
+ ##
+
+
+__docformat__ = 'restructuredtext'
+
+from fipy.tools import numerix
+from fipy.tools.dimensions import physicalField
+
+class CoupledEquations:
+    r"""
+    A system of equations that is assembled into one block matrix and solved
+    simultaneously for all of its variables, instead of by alternating
+    sweeps of the individual equations.
+
+    Consider the pair of steady-state equations
+    
+    .. math::
+    
+       \nabla^2 u - u + v &= 0 \\
+       \nabla^2 v - v + u &= 0
+       
+    with :math:`u` and :math:`v` fixed at opposite values on either end of
+    the domain.
+
+        >>> from fipy import *
+        >>> mesh = Grid1D(nx=20, dx=0.05)
+        >>> u = CellVariable(mesh=mesh, name="u")
+        >>> v = CellVariable(mesh=mesh, name="v")
+        >>> uBCs = (FixedValue(faces=mesh.getFacesLeft(), value=0.),
+        ...         FixedValue(faces=mesh.getFacesRight(), value=1.))
+        >>> vBCs = (FixedValue(faces=mesh.getFacesLeft(), value=1.),
+        ...         FixedValue(faces=mesh.getFacesRight(), value=0.))
+
+    Each equation contains the terms that act on its own variable, and the
+    terms that act on the other variable are given as couplings. 
+    
+        >>> eqs = CoupledEquations(((DiffusionTerm() - ImplicitSourceTerm(1.), u, uBCs),
+        ...                         (DiffusionTerm() - ImplicitSourceTerm(1.), v, vBCs)),
+        ...                        couplings=((u, v, ImplicitSourceTerm(1.)),
+        ...                                   (v, u, ImplicitSourceTerm(1.))))
+
+    A single sweep solves the coupled linear system,
+    
+        >>> print eqs.sweep(solver=LinearLUSolver()) > 1.
+        True
+        >>> print eqs.sweep(solver=LinearLUSolver()) < 1e-10
+        True
+        
+    whose solution satisfies both equations.
+    
+        >>> print numerix.allclose(u + v, 1.)
+        True
+        >>> x = mesh.getCellCenters()[0]
+        >>> d = numerix.sinh(numerix.sqrt(2.) * (x - 0.5)) / numerix.sinh(numerix.sqrt(2.) / 2)
+        >>> print (u - v).allclose(d, atol=1e-3)
+        1
+    """
+    def __init__(self, equations, couplings=()):
+        """
+        Create a `CoupledEquations` object.
+
+        :Parameters:
+          - `equations`: A list of `(equation, var)` or 
+            `(equation, var, boundaryConditions)` tuples. Each `equation` is 
+            solved for the `CellVariable` `var`.
+          - `couplings`: A list of `(var, coupledVar, term)` tuples. Each
+            `term` is treated as though it were added to the equation
+            of `var`, but it acts on `coupledVar`, using the boundary
+            conditions of `coupledVar`.
+
+        """
+        self.equations = []
+        self.vars = []
+        self.boundaryConditions = []
+        for entry in equations:
+            if len(entry) == 2:
+                entry = entry + ((),)
+            equation, var, boundaryConditions = entry
+            if type(boundaryConditions) not in (type(()), type([])):
+                boundaryConditions = (boundaryConditions,)
+            self.equations.append(equation)
+            self.vars.append(var)
+            self.boundaryConditions.append(boundaryConditions)
+            
+        self.couplings = [(self._getIndex(var), self._getIndex(coupledVar), term) 
+                          for var, coupledVar, term in couplings]
+        
+        self.offsets = numerix.cumsum([0] + [len(var) for var in self.vars])
+        self.var = _CoupledCellVariable(self.vars, self.offsets)
+        
+    def _getIndex(self, var):
+        for index, other in enumerate(self.vars):
+            if other is var:
+                return index
+        raise ValueError, "%s is not solved by any of the coupled equations" % repr(var)
+        
+    def _buildMatrix(self, SparseMatrix, dt):
+        offsets = self.offsets
+        matrix = SparseMatrix(size=offsets[-1])
+        RHSvector = numerix.zeros((offsets[-1],), 'd')
+        
+        for boundaryConditions in self.boundaryConditions:
+            for bc in boundaryConditions:
+                bc._resetBoundaryConditionApplied()
+
+        for i, (equation, var) in enumerate(zip(self.equations, self.vars)):
+            L, b = equation._buildMatrix(var, SparseMatrix, self.boundaryConditions[i], dt)
+            matrix._addAtBlock(L, offsets[i], offsets[i])
+            RHSvector[offsets[i]:offsets[i + 1]] += b
+            
+        for i, j, term in self.couplings:
+            for bc in self.boundaryConditions[j]:
+                bc._resetBoundaryConditionApplied()
+            L, b = term._buildMatrix(self.vars[j], SparseMatrix, self.boundaryConditions[j], dt)
+            matrix._addAtBlock(L, offsets[i], offsets[j])
+            RHSvector[offsets[i]:offsets[i + 1]] += b
+            
+        return matrix, RHSvector
+        
+    def _prepareLinearSystem(self, solver, dt):
+        if solver is None:
+            solver = self.equations[0].getDefaultSolver()
+
+        if numerix.getShape(dt) != ():
+            raise TypeError, "`dt` must be a single number, not a " + type(dt).__name__
+        
+        matrix, RHSvector = self._buildMatrix(solver._getMatrixClass(), float(dt))
+        solver._storeMatrix(var=self.var, matrix=matrix, RHSvector=RHSvector)
+        
+        return solver
+        
+    def solve(self, solver=None, dt=1.):
+        """
+        Builds and solves the coupled linear system once.
+        
+        :Parameters:
+          - `solver`: The iterative solver to be used to solve the linear
+            system of equations. Defaults to the default solver of the 
+            first equation.
+          - `dt`: The time step size.
+
+        """
+        solver = self._prepareLinearSystem(solver, dt)
+        solver._solve()
+        
+    def sweep(self, solver=None, dt=1., underRelaxation=None, residualFn=None):
+        """
+        Builds and solves the coupled linear system once and returns
+        the residual of the system before the solution.
+        
+        :Parameters:
+          - `solver`: The iterative solver to be used to solve the linear
+            system of equations. Defaults to the default solver of the 
+            first equation.
+          - `dt`: The time step size.
+          - `underRelaxation`: Usually a value between `0` and `1` or
+            `None` in the case of no under-relaxation
+          - `residualFn`: A function that takes var, matrix, and RHSvector
+            arguments, used to customize the residual calculation.
+
+        """
+        solver = self._prepareLinearSystem(solver, dt)
+        solver._applyUnderRelaxation(underRelaxation=underRelaxation)
+        residual = solver._calcResidual(residualFn=residualFn)
+
+        solver._solve()
+
+        return residual
+
+class _CoupledCellVariable:
+    """
+    The concatenated values of the variables of a `CoupledEquations`,
+    presented to a `Solver` as a single variable.
+    """
+    def __init__(self, vars, offsets):
+        self.vars = vars
+        self.offsets = offsets
+        self.name = ", ".join([var.name for var in vars])
+        self.mesh = _CoupledMesh([var.getMesh() for var in vars])
+        
+    def getMesh(self):
+        return self.mesh
+        
+    def __len__(self):
+        return self.offsets[-1]
+        
+    def getNumericValue(self):
+        return numerix.concatenate([numerix.array(var.getNumericValue(), 'd') for var in self.vars])
+        
+    def __array__(self, t=None):
+        return numerix.array(self.getNumericValue(), t)
+        
+    def __getitem__(self, index):
+        return self.getNumericValue()[index]
+
+    def getUnit(self):
+        ## the values are already in the base units of each variable
+        return physicalField._unity
+        
+    def setValue(self, value):
+        value = numerix.array(value)
+        for var, start, stop in zip(self.vars, self.offsets[:-1], self.offsets[1:]):
+            var.setValue(value[start:stop] / var.getUnit().factor)
+        
+    def __setitem__(self, index, value):
+        ## solvers only ever assign the whole solution
+        self.setValue(value)
+    
+class _CoupledMesh:
+    """
+    Maps the cells of the meshes of the coupled variables to consecutive
+    blocks of matrix rows, for the benefit of the Trilinos solvers.
+    """
+    def __init__(self, meshes):
+        self.meshes = meshes
+        
+    def _getStackedIDs(self, method, numberOfCells):
+        ids = []
+        offset = 0
+        for mesh in self.meshes:
+            ids.append(getattr(mesh, method)() + offset)
+            offset += numberOfCells(mesh)
+        return numerix.concatenate(ids)
+        
+    def _getGlobalNonOverlappingCellIDs(self):
+        return self._getStackedIDs('_getGlobalNonOverlappingCellIDs', 
+                                   lambda mesh: mesh.globalNumberOfCells)
+        
+    def _getGlobalOverlappingCellIDs(self):
+        return self._getStackedIDs('_getGlobalOverlappingCellIDs', 
+                                   lambda mesh: mesh.globalNumberOfCells)
+        
+    def _getLocalNonOverlappingCellIDs(self):
+        return self._getStackedIDs('_getLocalNonOverlappingCellIDs', 
+                                   lambda mesh: mesh.getNumberOfCells())
+        
+    def _getLocalOverlappingCellIDs(self):
+        return self._getStackedIDs('_getLocalOverlappingCellIDs', 
+                                   lambda mesh: mesh.getNumberOfCells())
+
+def _test(): 
+    import doctest
+    return doctest.testmod()
+    
+if __name__ == "__main__": 
+    _test() 
@@ -211,24 +211,12 @@ class DiffusionTerm(Term):
             return None
 
     def _getCoefficientMatrix(self, SparseMatrix, mesh, coeff):
-        interiorCoeff = numerix.array(coeff)
+        pattern = mesh._getSparsityPattern()
         
-        interiorCoeff[mesh.getExteriorFaces().getValue()] = 0
-        
-        interiorCoeff = numerix.take(interiorCoeff, mesh._getCellFaceIDs())
+        interiorCoeff = numerix.take(numerix.array(coeff), pattern.interiorFaces, axis=-1)
 
         coefficientMatrix = SparseMatrix(size = mesh.getNumberOfCells(), bandwidth = mesh._getMaxFacesPerCell())
-        coefficientMatrix.addAtDiagonal(numerix.sum(interiorCoeff, 0))
-        del interiorCoeff
-        
-        interiorFaces = numerix.nonzero(mesh.getInteriorFaces())[0]
-        
-        interiorFaceCellIDs = numerix.take(mesh.getFaceCellIDs(), interiorFaces, axis=1)
-
-        interiorCoeff = -numerix.take(coeff, interiorFaces, axis=-1)
-        coefficientMatrix.addAt(interiorCoeff, interiorFaceCellIDs[0], interiorFaceCellIDs[1])
-        interiorCoeff = -numerix.take(coeff, interiorFaces, axis=-1)
-        coefficientMatrix.addAt(interiorCoeff, interiorFaceCellIDs[1], interiorFaceCellIDs[0])
+        coefficientMatrix._addAtFaces(pattern, interiorCoeff, -interiorCoeff, -interiorCoeff, interiorCoeff)
         
         return coefficientMatrix
         
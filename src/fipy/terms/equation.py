@@ -111,6 +111,73 @@ class _Equation(Term):
             
 	return (matrix, RHSvector)
         
+    def _isExplicit(self):
+        ## a `TransientTerm` and terms that contribute nothing to the
+        ## matrix, whose only diagonal is that of the `TransientTerm`
+        transient = self.terms["TransientTerm"]
+        others = [term for term in self._getTerms() 
+                  if term is not None and term is not transient]
+        return (transient is not None 
+                and len(others) > 0
+                and len([term for term in others if not term._isExplicit()]) == 0)
+
+    def _useExplicitUpdate(self):
+        ## the matrix is needed if it is to be cached or displayed, and
+        ## the values of ghost cells only come from the parallel solvers
+        from fipy.tools import parallel
+        return (self._isExplicit() 
+                and not self._cacheMatrix 
+                and not self._cacheRHSvector
+                and not os.environ.has_key('FIPY_DISPLAY_MATRIX')
+                and parallel.Nproc == 1)
+
+    def _buildExplicitSystem(self, var, boundaryConditions, dt):
+        ## the diagonal and RHS vector of the system, without the matrix
+        from fipy.tools import numerix
+
+        if numerix.getShape(dt) != ():
+            raise TypeError, "`dt` must be a single number, not a " + type(dt).__name__
+        dt = float(dt)
+
+        transient = self.terms["TransientTerm"]
+        coeffVectors = transient._getCoeffVectors(var=var)
+        
+        diagonal = (numerix.array(coeffVectors['new value']) / dt 
+                    + numerix.array(coeffVectors['diagonal']))
+        RHSvector = (numerix.array(var.getOld()) * numerix.array(coeffVectors['old value']) / dt
+                     + numerix.array(coeffVectors['b vector']))
+        for term in self._getTerms():
+            if term is not None and term is not transient:
+                RHSvector = RHSvector + term._buildRHSvector(var, boundaryConditions, dt)
+
+        return numerix.ones((len(var),), 'd') * diagonal, RHSvector
+
+    def solve(self, var, solver=None, boundaryConditions=(), dt=1.):
+        if self._useExplicitUpdate():
+            diagonal, RHSvector = self._buildExplicitSystem(var, boundaryConditions, dt)
+            var.setValue(RHSvector / diagonal)
+        else:
+            Term.solve(self, var=var, solver=solver, 
+                       boundaryConditions=boundaryConditions, dt=dt)
+
+    def sweep(self, var, solver=None, boundaryConditions=(), dt=1., underRelaxation=None, residualFn=None):
+        if self._useExplicitUpdate() and residualFn is None:
+            from fipy.tools import numerix
+            
+            diagonal, RHSvector = self._buildExplicitSystem(var, boundaryConditions, dt)
+            value = numerix.array(var)
+            if underRelaxation is not None:
+                diagonal = diagonal / underRelaxation
+                RHSvector = RHSvector + (1 - underRelaxation) * diagonal * value
+            residual = numerix.L2norm(diagonal * value - RHSvector)
+            var.setValue(RHSvector / diagonal)
+
+            return residual
+        else:
+            return Term.sweep(self, var=var, solver=solver, 
+                              boundaryConditions=boundaryConditions, dt=dt, 
+                              underRelaxation=underRelaxation, residualFn=residualFn)
+
     def _getDefaultSolver(self, solver, *args, **kwargs):
         for term in self._getTerms():
             if term is not None:
@@ -34,6 +34,7 @@
 
 __docformat__ = 'restructuredtext'
 
+from fipy.tools import numerix
 from fipy.terms.sourceTerm import SourceTerm
 
 class _ExplicitSourceTerm(SourceTerm):
@@ -58,6 +59,12 @@ class _ExplicitSourceTerm(SourceTerm):
 	    'diagonal' : 0
 	}
 	
+    def _isExplicit(self):
+        return True
+
+    def _buildRHSvector(self, var, boundaryConditions, dt):
+        return numerix.ones((len(var),), 'd') * numerix.array(self._getCoeffVectors(var=var)['b vector'])
+
     def __repr__(self):
         return repr(self.coeff)
 
@@ -62,10 +62,11 @@ class FaceTerm(Term):
     def _implicitBuildMatrix(self, SparseMatrix, L, id1, id2, b, weight, mesh, boundaryConditions, interiorFaces, dt):
         coeffMatrix = self._getCoeffMatrix(mesh, weight)
 
-        L.addAt(numerix.take(coeffMatrix['cell 1 diag'], interiorFaces),    id1, id1)
-        L.addAt(numerix.take(coeffMatrix['cell 1 offdiag'], interiorFaces), id1, id2)
-        L.addAt(numerix.take(coeffMatrix['cell 2 offdiag'], interiorFaces), id2, id1)
-        L.addAt(numerix.take(coeffMatrix['cell 2 diag'], interiorFaces),    id2, id2)
+        L._addAtFaces(mesh._getSparsityPattern(),
+                      numerix.take(coeffMatrix['cell 1 diag'], interiorFaces),
+                      numerix.take(coeffMatrix['cell 1 offdiag'], interiorFaces),
+                      numerix.take(coeffMatrix['cell 2 offdiag'], interiorFaces),
+                      numerix.take(coeffMatrix['cell 2 diag'], interiorFaces))
 
         N = mesh.getNumberOfCells()
         M = mesh._getMaxFacesPerCell()
@@ -72,6 +72,14 @@ class Term:
     def _buildMatrix(self, var, SparseMatrix, boundaryConditions, dt, equation=None):
         raise NotImplementedError
 
+    def _isExplicit(self):
+        ## whether the term contributes nothing to the matrix, so that its
+        ## RHS vector can be built alone with `_buildRHSvector()`
+        return False
+
+    def _buildRHSvector(self, var, boundaryConditions, dt):
+        raise NotImplementedError
+
     def __buildMatrix(self, var, solver, boundaryConditions, dt):
         if numerix.sctype2char(var.getsctype()) not in numerix.typecodes['Float']:
             import warnings
@@ -50,7 +50,8 @@ def _suite():
             'upwindConvectionTerm',
             'collectedDiffusionTerm',
             'implicitSourceTerm',
-            'mulTerm'
+            'mulTerm',
+            'coupledEquations'
         ), base = __name__)
 
 if __name__ == '__main__':
@@ -22,6 +22,7 @@ class Serial(object):
 parallel = Parallel()
 serial = Serial()
 import dump
+import checkpoint
 import numerix
 import vector
 from dimensions.physicalField import PhysicalField
@@ -0,0 +1,424 @@
+#!/usr/bin/env python
+
+## -*-Pyth-*-
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ #
+ #  FILE: "checkpoint.py"
+ #
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ #
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #  See the file "license.terms" for information on usage and  redistribution
+ #  of this file, and for a DISCLAIMER OF ALL WARRANTIES.
+ #
+ # ###################################################################
+ ##
+
+"""
+Checkpoints of a mesh and the variables defined on it.
+
+Unlike `fipy.tools.dump`, which pickles whole objects, a checkpoint
+keeps the arrays of the mesh and the values of the variables, including
+their old values, as raw binary blocks after a small header. The blocks
+are aligned so that :func:`read` can memory-map them: nothing is read
+from the file until a value is used, and each processor of a parallel run
+only reads the values of its own cells or faces.
+
+    >>> from fipy import Grid2D, CellVariable, FaceVariable
+    >>> mesh = Grid2D(nx=3, ny=2)
+    >>> x, y = mesh.getCellCenters()
+    >>> phi = CellVariable(mesh=mesh, name='phi', value=x * y, hasOld=1)
+    >>> phi.updateOld()
+    >>> phi.setValue(x + y)
+    >>> flux = FaceVariable(mesh=mesh, value=mesh.getFaceCenters()[0], unit='m')
+
+    >>> import tempfile
+    >>> (f, filename) = tempfile.mkstemp('.fipy')
+    >>> write(filename, mesh, phi=phi, flux=flux)
+
+    >>> newMesh, variables = read(filename)
+    >>> print newMesh.__class__.__name__, newMesh.getShape()
+    UniformGrid2D (3, 2)
+    >>> newPhi = variables['phi']
+    >>> from fipy.tools import parallel
+    >>> print parallel.Nproc > 1 or isinstance(newPhi.getValue().base, numerix.memmap)
+    True
+    >>> print newPhi.getName(), newPhi.getMesh() is newMesh
+    phi True
+    >>> print newPhi.allclose(phi), newPhi.getOld().allclose(phi.getOld())
+    True True
+    >>> print variables['flux'].getUnit().name()
+    m
+    >>> print numerix.allclose(variables['flux'].getNumericValue(), flux.getNumericValue())
+    True
+
+The restored values are private copies of the file, so changing them
+leaves the checkpoint alone
+
+    >>> newPhi.setValue(0.)
+    >>> print read(filename)[1]['phi'].allclose(phi)
+    True
+
+Other meshes keep their vertices, faces and cells, including the masks
+of the faces of cells with fewer faces than others
+
+    >>> from fipy.tools.numerix import MA
+    >>> writer = _Writer()
+    >>> header = writer._block(MA.masked_values(((0, 1), (2, -1)), -1))
+    >>> writer._write(filename, header)
+    >>> reader = _Reader(filename)
+    >>> print reader._array(reader.header)
+    [[0 1]
+     [2 --]]
+
+With :func:`writeDistributed`, each processor writes the values it owns
+to a piece of its own, next to a manifest of the mesh and the pieces
+
+    >>> writeDistributed(filename, mesh, phi=phi, flux=flux)
+    >>> newMesh, variables = read(filename)
+    >>> print variables['phi'].allclose(phi), variables['phi'].getOld().allclose(phi.getOld())
+    True True
+    >>> print numerix.allclose(variables['flux'].getNumericValue(), flux.getNumericValue())
+    True
+
+The manifest records how the elements were partitioned, so the pieces
+can be read back by any number of processors. Here, the cells and faces
+are split between three pieces, as if by three processors
+
+    >>> for piece in range(3):
+    ...     _writePiece(_getPieceName(filename, piece), dict(phi=phi, flux=flux),
+    ...                 part=(piece, 3))
+    >>> _writeManifest(filename, mesh, dict(phi=phi, flux=flux), pieces=3)
+    >>> newMesh, variables = read(filename)
+    >>> print variables['phi'].allclose(phi), variables['phi'].getOld().allclose(phi.getOld())
+    True True
+    >>> print variables['flux'].getUnit().name()
+    m
+    >>> print numerix.allclose(variables['flux'].getNumericValue(), flux.getNumericValue())
+    True
+
+    >>> import os
+    >>> os.close(f)
+    >>> for piece in range(3):
+    ...     os.remove(_getPieceName(filename, piece))
+    >>> os.remove(filename)
+"""
+
+__docformat__ = 'restructuredtext'
+
+import cPickle
+import os
+import types
+
+from fipy.tools import numerix
+from fipy.tools import parallel
+
+_magic = "FIPY-CHECKPOINT 1\n"
+_alignment = 64
+
+class _Block:
+    ## where an array is stored in the checkpoint
+    def __init__(self, dtype, shape, offset, maskOffset=None):
+        self.dtype = dtype
+        self.shape = shape
+        self.offset = offset
+        self.maskOffset = maskOffset
+
+class _Writer:
+    def __init__(self):
+        self.arrays = []
+        self.size = 0
+
+    def _append(self, array):
+        offset = self.size
+        self.arrays.append(array)
+        self.size += array.nbytes
+        self.size += -self.size % _alignment
+        return offset
+
+    def _block(self, value):
+        ## replace `value` by a `_Block` if it is an array
+        if isinstance(value, numerix.MA.MaskedArray):
+            data = numerix.ascontiguousarray(numerix.MA.filled(value, 0))
+            mask = numerix.ascontiguousarray(numerix.MA.getmaskarray(value))
+            return _Block(dtype=data.dtype.str, shape=data.shape,
+                          offset=self._append(data), maskOffset=self._append(mask))
+        elif isinstance(value, numerix.ndarray) and value.dtype.kind in 'biuf':
+            data = numerix.ascontiguousarray(value)
+            return _Block(dtype=data.dtype.str, shape=data.shape, offset=self._append(data))
+        else:
+            return value
+
+    def _state(self, state):
+        ## modules, such as the parallel module of the grids, are left
+        ## to the defaults of the reader
+        return dict([(key, self._block(value)) for key, value in state.items()
+                     if not isinstance(value, types.ModuleType)])
+
+    def _value(self, value):
+        unit = None
+        if hasattr(value, 'getUnit'):
+            unit = value.getUnit().name()
+            value = value.value
+        return self._block(numerix.array(value)), unit
+
+    def _write(self, filename, header):
+        header = cPickle.dumps(header, 2)
+        start = len(_magic) + 17 + len(header)
+        start += -start % _alignment
+
+        fileStream = open(filename, 'wb')
+        fileStream.write(_magic)
+        fileStream.write("%16d\n" % len(header))
+        fileStream.write(header)
+        for array in self.arrays:
+            fileStream.write('\0' * (start - fileStream.tell()))
+            array.tofile(fileStream)
+            start += array.nbytes
+            start += -start % _alignment
+        fileStream.close()
+
+def write(filename, mesh, **variables):
+    """
+    Write `mesh` and the `CellVariable` and `FaceVariable` objects given
+    as keyword arguments to a checkpoint file.
+
+    :Parameters:
+      - `filename`: the name of the checkpoint file
+      - `mesh`: the mesh of the variables
+      - `variables`: the variables to write, by the name they are read back
+        with
+    """
+    writer = _Writer()
+
+    header = {
+        'mesh': (mesh.__class__.__module__, mesh.__class__.__name__,
+                 writer._state(mesh.__getstate__())),
+        'variables': {}
+    }
+
+    _checkMesh(mesh, variables)
+
+    for key, var in variables.items():
+        value, unit = writer._value(var.getGlobalValue())
+        old = [writer._value(level.getGlobalValue())[0] for level in getattr(var, '_olds', [])]
+        header['variables'][key] = (var.__class__.__module__, var.__class__.__name__,
+                                    var.getName(), value, unit, old)
+
+    if parallel.procID == 0:
+        writer._write(filename, header)
+
+def _getPieceName(filename, piece):
+    return "%s.%d" % (filename, piece)
+
+def _checkMesh(mesh, variables):
+    for key, var in variables.items():
+        if var.getMesh() is not mesh:
+            raise ValueError, "Variable '%s' is not defined on the mesh of the checkpoint" % key
+
+def _writeManifest(filename, mesh, variables, pieces):
+    writer = _Writer()
+
+    header = {
+        'mesh': (mesh.__class__.__module__, mesh.__class__.__name__,
+                 writer._state(mesh.__getstate__())),
+        'variables': {},
+        'pieces': [_getPieceName(os.path.basename(filename), piece) for piece in range(pieces)]
+    }
+
+    for key, var in variables.items():
+        unit = writer._value(var.getValue())[1]
+        header['variables'][key] = (var.__class__.__module__, var.__class__.__name__,
+                                    var.getName(), var.getShape()[:-1], 
+                                    numerix.array(var.getNumericValue()).dtype.str, unit,
+                                    len(getattr(var, '_olds', [])))
+
+    writer._write(filename, header)
+
+def _writePiece(filename, variables, part=(0, 1)):
+    ## the values of the elements owned by this processor, along with
+    ## their global IDs, or every `part[1]`-th of them from `part[0]`
+    writer = _Writer()
+
+    header = {}
+    for key, var in variables.items():
+        ids = numerix.array(var._getLocalNonOverlappingIDs())[part[0]::part[1]]
+        globalIDs = numerix.take(numerix.array(var._getGlobalOverlappingIDs()), ids)
+        levels = [var] + list(getattr(var, '_olds', []))
+        header[key] = (writer._block(globalIDs),
+                       [writer._value(numerix.take(level.getValue(), ids, axis=-1))[0] 
+                        for level in levels])
+
+    writer._write(filename, header)
+
+def writeDistributed(filename, mesh, **variables):
+    """
+    Write `mesh` and the `CellVariable` and `FaceVariable` objects given
+    as keyword arguments to a checkpoint made of a manifest and a piece
+    for each processor.
+
+    Nothing is gathered: each processor writes the values of the cells or
+    faces that it owns, with their global IDs, to the piece
+    `filename.<procID>`, and the first processor writes the mesh and a
+    manifest of the variables and the pieces to `filename`. :func:`read`
+    reads such a checkpoint on any number of processors.
+
+    :Parameters:
+      - `filename`: the name of the manifest
+      - `mesh`: the mesh of the variables
+      - `variables`: the variables to write, by the name they are read back
+        with
+    """
+    _checkMesh(mesh, variables)
+
+    if parallel.procID == 0:
+        _writeManifest(filename, mesh, variables, pieces=parallel.Nproc)
+    _writePiece(_getPieceName(filename, parallel.procID), variables)
+
+def _class(module, name):
+    return getattr(__import__(module, globals(), locals(), [name]), name)
+
+class _Empty:
+    pass
+
+def _instance(cls):
+    ## an uninitialized instance, as unpickling makes
+    if isinstance(cls, type):
+        return cls.__new__(cls)
+    else:
+        obj = _Empty()
+        obj.__class__ = cls
+        return obj
+
+class _Reader:
+    def __init__(self, filename):
+        self.filename = filename
+        fileStream = open(filename, 'rb')
+        if fileStream.read(len(_magic)) != _magic:
+            fileStream.close()
+            raise IOError, "'%s' is not a FiPy checkpoint" % filename
+        length = int(fileStream.readline())
+        self.header = cPickle.loads(fileStream.read(length))
+        fileStream.close()
+
+        self.start = len(_magic) + 17 + length
+        self.start += -self.start % _alignment
+
+    def _map(self, dtype, shape, offset):
+        if numerix.prod(shape) == 0:
+            return numerix.zeros(shape, dtype)
+        ## a private, copy-on-write mapping, viewed as an ordinary array
+        ## so that `Variable` keeps it rather than copying it
+        return numerix.memmap(self.filename, dtype=dtype, mode='c',
+                              offset=self.start + offset, shape=shape).view(numerix.ndarray)
+
+    def _array(self, value):
+        if isinstance(value, _Block):
+            data = self._map(value.dtype, value.shape, value.offset)
+            if value.maskOffset is not None:
+                return numerix.MA.array(data, mask=self._map(numerix.bool_, value.shape, value.maskOffset))
+            return data
+        else:
+            return value
+
+def _variable(varClass, mesh, name, value, unit, **kwargs):
+    if parallel.Nproc > 1:
+        ## each processor picks out the values of its own elements
+        return varClass(mesh=mesh, name=name, value=value, unit=unit, **kwargs)
+    else:
+        ## keep the mapping itself, rather than a copy of every value
+        var = varClass(mesh=mesh, name=name, elementshape=value.shape[:-1], unit=unit, **kwargs)
+        var._setNumericValue(value)
+        return var
+
+def _readPieces(filename, reader, mesh):
+    ## each processor picks out the values of its own elements, with
+    ## their ghosts, from all of the pieces
+    pieces = [_Reader(os.path.join(os.path.dirname(filename), pieceName))
+              for pieceName in reader.header['pieces']]
+
+    variables = {}
+    for key, (module, className, name, elementshape, dtype, unit, levels) in reader.header['variables'].items():
+        varClass = _class(module, className)
+        if levels > 0:
+            var = varClass(mesh=mesh, name=name, elementshape=elementshape, unit=unit, hasOld=levels)
+        else:
+            var = varClass(mesh=mesh, name=name, elementshape=elementshape, unit=unit)
+
+        wanted = numerix.array(var._getGlobalOverlappingIDs())
+        lookup = -numerix.ones((var._getGlobalNumberOfElements(),), 'l')
+        lookup[wanted] = numerix.arange(len(wanted))
+
+        values = [numerix.zeros(elementshape + (len(wanted),), dtype) for level in range(levels + 1)]
+        for piece in pieces:
+            globalIDs, pieceValues = piece.header[key]
+            local = numerix.take(lookup, piece._array(globalIDs))
+            mine = numerix.nonzero(local >= 0)[0]
+            local = numerix.take(local, mine)
+            for value, pieceValue in zip(values, pieceValues):
+                value[..., local] = numerix.take(piece._array(pieceValue), mine, axis=-1)
+
+        var._setNumericValue(values[0])
+        for old, value in zip(getattr(var, '_olds', []), values[1:]):
+            old._setNumericValue(value)
+        variables[key] = var
+
+    return variables
+
+def read(filename):
+    """
+    Read a checkpoint file written by :func:`write` or, from its manifest,
+    by :func:`writeDistributed`. Returns the mesh and a dictionary of the
+    variables.
+
+    :Parameters:
+      - `filename`: the name of the checkpoint file
+    """
+    reader = _Reader(filename)
+
+    module, name, state = reader.header['mesh']
+    mesh = _instance(_class(module, name))
+    mesh.__setstate__(dict([(key, reader._array(value)) for key, value in state.items()]))
+
+    if reader.header.has_key('pieces'):
+        return mesh, _readPieces(filename, reader, mesh)
+
+    variables = {}
+    for key, (module, className, name, value, unit, old) in reader.header['variables'].items():
+        varClass = _class(module, className)
+        var = _variable(varClass, mesh, name, reader._array(value), unit)
+        if len(old) > 0:
+            var._olds = [_variable(var._getArithmeticBaseClass(), mesh, name + "_old", 
+                                   reader._array(level), unit, hasOld=False)
+                         for level in old]
+            var.old = var._olds[0]
+        variables[key] = var
+
+    return mesh, variables
+
+def _test():
+    import doctest
+    return doctest.testmod()
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+
+##
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ #
+ #  FILE: "counterRandom.py"
+ #
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ #
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #
+ # ###################################################################
+ ##
+
+
+"""Counter-based random numbers
+"""
+
+__docformat__ = 'restructuredtext'
+
+from fipy.tools import numerix
+
+_mask32 = numerix.uint64(0xffffffff)
+_shift32 = numerix.uint64(32)
+_multipliers = (numerix.uint64(0xD2511F53), numerix.uint64(0xCD9E8D57))
+_weyl = (numerix.uint64(0x9E3779B9), numerix.uint64(0xBB67AE85))
+
+def _philox(counter, key, rounds=10):
+    """
+    Return the four 32 bit words of the Philox-4x32 bijection of the four
+    words of `counter`, each an array, under the two words of `key`.
+
+        >>> def hex(words):
+        ...     return " ".join(["%08x" % word for word in words])
+        >>> print hex(_philox([numerix.zeros((1,), numerix.uint64)] * 4, (0, 0)))
+        6627e8d5 e169c58d bc57ac4c 9b00dbd8
+        >>> print hex(_philox([numerix.array((0x243f6a88,), numerix.uint64),
+        ...                    numerix.array((0x85a308d3,), numerix.uint64),
+        ...                    numerix.array((0x13198a2e,), numerix.uint64),
+        ...                    numerix.array((0x03707344,), numerix.uint64)],
+        ...                   (0xa4093822, 0x299f31d0)))
+        d16cfe09 94fdcceb 5001e420 24126ea1
+    """
+    c0, c1, c2, c3 = [numerix.array(word, numerix.uint64) for word in counter]
+    k0, k1 = [numerix.uint64(word) for word in key]
+    for round in range(rounds):
+        product0 = _multipliers[0] * c0
+        product1 = _multipliers[1] * c2
+        c0, c1, c2, c3 = (((product1 >> _shift32) ^ c1 ^ k0),
+                          product1 & _mask32,
+                          ((product0 >> _shift32) ^ c3 ^ k1),
+                          product0 & _mask32)
+        k0 = (k0 + _weyl[0]) & _mask32
+        k1 = (k1 + _weyl[1]) & _mask32
+    return c0, c1, c2, c3
+
+class _CounterRandom:
+    """
+    Random numbers that are a function of a seed, the index of the element
+    they are drawn for, a step, and the number of the draw for that
+    element and step.
+
+    Nothing is kept from one call to the next, so each element can be
+    generated on its own, by any processor, in any order
+
+        >>> generator = _CounterRandom(seed=2010)
+        >>> ids = numerix.arange(1000)
+        >>> u = generator.uniform(ids, step=1)
+        >>> print numerix.allclose(generator.uniform(ids[250:500], step=1), u[250:500])
+        True
+        >>> print (0 < u).all() and (u < 1).all()
+        True
+        >>> print numerix.allclose(generator.uniform(ids, step=2), u)
+        False
+        >>> print numerix.allclose(_CounterRandom(seed=2011).uniform(ids, step=1), u)
+        False
+
+    The distributions have the expected moments
+
+        >>> ids = numerix.arange(200000)
+        >>> def moments(x, mean, variance):
+        ...     return (abs(numerix.average(x) - mean) < 0.01 * max(mean, 1)
+        ...             and abs(numerix.var(x) - variance) < 0.01 * max(variance, 1))
+        >>> print moments(generator.uniform(ids, step=1), 1. / 2, 1. / 12)
+        True
+        >>> print moments(generator.normal(ids, step=1), 0., 1.)
+        True
+        >>> print moments(generator.exponential(ids, step=1), 1., 1.)
+        True
+        >>> print moments(generator.gamma(ids, step=1, shape=3.), 3., 3.)
+        True
+        >>> print moments(generator.gamma(ids, step=1, shape=0.5), 0.5, 0.5)
+        True
+        >>> print moments(generator.beta(ids, step=1, a=2., b=3.), 2. / 5, 6. / 150)
+        True
+    """
+    ## the draws of each gamma variate, and the draw of the uniform
+    ## variate that boosts shapes below one
+    _gammaDraws = 2**16
+
+    def __init__(self, seed):
+        """
+        :Parameters:
+          - `seed`: a non-negative integer of up to 64 bits
+        """
+        self.key = (seed & 0xffffffff, (seed >> 32) & 0xffffffff)
+
+    def _uniforms(self, ids, step, draw):
+        ## two uniform variates in (0, 1) for each of `ids`, from the 53
+        ## high bits of each pair of words
+        ids = numerix.array(ids, numerix.uint64)
+        words = _philox((ids & _mask32, ids >> _shift32,
+                         numerix.zeros(ids.shape, numerix.uint64) + numerix.uint64(step),
+                         numerix.zeros(ids.shape, numerix.uint64) + numerix.uint64(draw)),
+                        self.key)
+        return [((words[i] >> numerix.uint64(5)) * 67108864. + (words[i + 1] >> numerix.uint64(6)) + 0.5) 
+                / 9007199254740992. for i in (0, 2)]
+
+    def uniform(self, ids, step, draw=0):
+        """
+        Return a uniform variate in (0, 1) for each of `ids`.
+        """
+        return self._uniforms(ids, step, draw)[0]
+
+    def normal(self, ids, step, draw=0):
+        """
+        Return a standard normal variate for each of `ids`.
+        """
+        u0, u1 = self._uniforms(ids, step, draw)
+        return numerix.sqrt(-2. * numerix.log(u0)) * numerix.cos(2. * numerix.pi * u1)
+
+    def exponential(self, ids, step, draw=0):
+        """
+        Return an exponential variate of unit mean for each of `ids`.
+        """
+        return -numerix.log(self.uniform(ids, step, draw))
+
+    def gamma(self, ids, step, shape, draw=0):
+        """
+        Return a gamma variate of unit scale and the given `shape`, a
+        scalar or a value for each of `ids`, for each of `ids`, by the
+        method of Marsaglia and Tsang. Uses the draws from `draw` to
+        `draw + 2**16`.
+        """
+        ids = numerix.array(ids)
+        shape = numerix.zeros(ids.shape, 'd') + shape
+        boost = shape < 1
+        d = numerix.where(boost, shape + 1., shape) - 1. / 3.
+        c = 1. / numerix.sqrt(9. * d)
+
+        value = numerix.zeros(ids.shape, 'd')
+        pending = numerix.arange(len(ids))
+        attempt = 0
+        while len(pending) > 0 and 2 * attempt + 1 < self._gammaDraws - 1:
+            x = self.normal(ids[pending], step, draw + 2 * attempt)
+            u = self.uniform(ids[pending], step, draw + 2 * attempt + 1)
+            v = (1. + c[pending] * x)**3
+            positive = v > 0
+            v = numerix.where(positive, v, 1.)
+            accepted = positive & (numerix.log(u) < 0.5 * x**2 + d[pending] * (1. - v + numerix.log(v)))
+            value[pending[accepted]] = (d[pending] * v)[accepted]
+            pending = pending[~accepted]
+            attempt += 1
+
+        if boost.any():
+            u = self.uniform(ids, step, draw + self._gammaDraws - 1)
+            value = numerix.where(boost, value * u**(1. / shape), value)
+
+        return value
+
+    def beta(self, ids, step, a, b, draw=0):
+        """
+        Return a beta variate with parameters `a` and `b`, each a scalar or
+        a value for each of `ids`, for each of `ids`. Uses the draws from
+        `draw` to `draw + 2**17`.
+        """
+        x = self.gamma(ids, step, a, draw)
+        y = self.gamma(ids, step, b, draw + self._gammaDraws)
+        return x / (x + y)
+
+def _test():
+    import doctest
+    return doctest.testmod()
+
+if __name__ == "__main__":
+    _test()
@@ -9,8 +9,33 @@ if '--inline' in sys.argv[1:]:
 else:
     doInline = os.environ.has_key('FIPY_INLINE')
     
+## `FIPY_INLINE` can name the backend that evaluates `Variable` expressions.
+## "weave" compiles them, and the hand-written kernels, with `scipy.weave`.
+## "ctypes" compiles each expression with the system C compiler and loads
+## it with `ctypes`. Otherwise, "weave" is used if it can be imported.
+if doInline:
+    inlineBackend = os.environ.get('FIPY_INLINE', '').lower()
+    if inlineBackend not in ('weave', 'ctypes'):
+        try:
+            from scipy import weave
+            inlineBackend = 'weave'
+        except ImportError:
+            inlineBackend = 'ctypes'
+    
+    ## the hand-written kernels can only be compiled by weave
+    doInline = (inlineBackend == 'weave')
+else:
+    inlineBackend = None
+    
 inlineFrameComment = os.environ.has_key('FIPY_INLINE_COMMENT')
 
+class _FusionError(Exception):
+    """
+    Raised when an expression cannot be compiled by the inline backend, 
+    so that it can be evaluated with numerix instead.
+    """
+    pass
+
 def _optionalInline(inlineFn, pythonFn, *args):
     if doInline:
         return inlineFn(*args)
@@ -70,7 +95,7 @@ def _operatorVariableComment(canInline=True, level=3):
     else:
         return ""
 
-def _runInline(code_in, converters=None, verbose=0, comment=None, **args):
+def _getLoopCode(code_in, args):
     argsKeys = args.keys()
     dimList = ['i', 'j', 'k']
           
@@ -95,6 +120,11 @@ def _runInline(code_in, converters=None, verbose=0, comment=None, **args):
             loops += "\t" * dim + "for(%s=0;%s<n%s;%s++) {\n" % (d,d,d,d)
             enders += "\n" + "\t" * (dimensions - dim -1) + "}"
         code = 'int ' + ','.join(declarations) + ';\n' + loops + "\t" * dimensions + code_in + enders
+        
+    return code
+
+def _runInline(code_in, converters=None, verbose=0, comment=None, **args):
+    code = _getLoopCode(code_in, args)
 
     if comment is None:
         comment = _rawCodeComment(code_in)
@@ -188,3 +218,278 @@ static int arrayIndex(PyArrayObject* array, int i, int vec[])
 }
                  """)
 
+def _runFusedInline(code_in, comment=None, **args):
+    """
+    Evaluate the C expression `code_in`, generated from a tree of
+    `Variable` operations, with the selected `inlineBackend`.
+    """
+    _fusionBackends[inlineBackend](code_in, comment=comment, **args)
+
+_cTypes = {'d': 'double', 'f': 'float', 
+           'q': 'long long', 'Q': 'unsigned long long',
+           'l': 'long', 'L': 'unsigned long', 
+           'i': 'int', 'I': 'unsigned int', 
+           'h': 'short', 'H': 'unsigned short',
+           'b': 'signed char', 'B': 'unsigned char', '?': 'unsigned char'}
+
+def _runCtypesInline(code_in, comment=None, **args):
+    """
+    Compile `code_in` into a kernel taking the `args` and run it.
+    
+        >>> a = numerix.array((1., 2., 3.))
+        >>> result = numerix.zeros((3,), 'd')
+        >>> _runCtypesInline("result[i] = sqrt(a[i]) * b + c;", 
+        ...                  a=a, b=2, c=0.5, result=result, ni=3)
+        >>> print numerix.allclose(result, 2 * numerix.sqrt(a) + 0.5)
+        True
+
+    Noncontiguous arrays are copied in and out of the kernel.
+    
+        >>> result = numerix.zeros((3, 2), 'd')
+        >>> _runCtypesInline("result[i] = a[i] + 1.;", a=a, result=result[:,0], ni=3)
+        >>> print result[:,0]
+        [ 2.  3.  4.]
+        
+    Code that does not compile raises a `_FusionError`.
+    
+        >>> _runCtypesInline("result[i] = `a[i]`;", a=a, result=result, ni=3)
+        Traceback (most recent call last):
+        ...
+        _FusionError: unable to compile "result[i] = `a[i]`;"
+    """
+    import ctypes
+    
+    names = args.keys()
+    names.sort()
+    
+    declarations = []
+    arguments = []
+    copies = []
+    for name in names:
+        value = args[name]
+        if isinstance(value, numerix.ndarray) and value.shape != ():
+            if not _cTypes.has_key(value.dtype.char):
+                raise _FusionError, "cannot pass %s arrays" % value.dtype.name
+            contiguous = numerix.ascontiguousarray(value)
+            if contiguous is not value:
+                copies.append((value, contiguous))
+            declarations.append("%s *%s" % (_cTypes[value.dtype.char], name))
+            arguments.append(ctypes.c_void_p(contiguous.ctypes.data))
+        else:
+            if isinstance(value, numerix.ndarray):
+                value = value.item()
+            if type(value) in (type(True), type(1), type(1L)):
+                declarations.append("long %s" % name)
+                arguments.append(ctypes.c_long(value))
+            elif type(value) is type(1.):
+                declarations.append("double %s" % name)
+                arguments.append(ctypes.c_double(value))
+            else:
+                raise _FusionError, "cannot pass %s" % type(value).__name__
+                
+    code = _getLoopCode(code_in, args)
+    
+    kernel = _getCtypesKernel(code, tuple(declarations))
+    if kernel is None:
+        raise _FusionError, 'unable to compile "%s"' % code_in
+        
+    kernel(*arguments)
+    
+    for value, contiguous in copies:
+        value[...] = contiguous
+        
+## Compiled kernels are kept in a directory shared by all processes, named by
+## `FIPY_INLINE_CACHE` (by default, `~/.fipy/inline`), which is trimmed to
+## `FIPY_INLINE_CACHE_SIZE` megabytes by removing the least recently used
+## kernels.
+_ctypesDirectory = os.environ.get('FIPY_INLINE_CACHE', 
+                                  os.path.join(os.path.expanduser('~'), '.fipy', 'inline'))
+_ctypesCacheSize = int(float(os.environ.get('FIPY_INLINE_CACHE_SIZE', 100)) * 1024 * 1024)
+_ctypesCompileFlags = ['-O3', '-shared', '-fPIC']
+
+_ctypesKernels = {}
+_ctypesStatistics = {'hits': 0, 'loads': 0, 'compilations': 0, 'failures': 0, 'evictions': 0}
+
+def _getCtypesKernel(code, declarations):
+    """
+    Return the compiled kernel for `code` with arguments `declarations`,
+    or `None` if it does not compile. Kernels are looked up in memory, then
+    in the on-disk cache, and compiled only if neither holds them.
+    
+        >>> import shutil, tempfile
+        >>> from fipy.tools import inline
+        >>> directory = inline._ctypesDirectory
+        >>> inline._ctypesDirectory = tempfile.mkdtemp()
+        >>> statistics = _ctypesStatistics.copy()
+        
+        >>> code = "result[0] = 2. * a[0];"
+        >>> declarations = ("double *a", "double *result")
+        >>> kernel = _getCtypesKernel(code, declarations)
+        >>> kernel = _getCtypesKernel(code, declarations)
+        >>> _ctypesKernels.clear()
+        >>> kernel = _getCtypesKernel(code, declarations)
+        >>> print [_ctypesStatistics[key] - statistics[key] 
+        ...        for key in ('hits', 'loads', 'compilations')]
+        [1, 1, 1]
+        
+    Code that fails to compile is also remembered.
+    
+        >>> print _getCtypesKernel("result[0] = `a[0]`;", declarations)
+        None
+        >>> _ctypesKernels.clear()
+        >>> print _getCtypesKernel("result[0] = `a[0]`;", declarations)
+        None
+        >>> print [_ctypesStatistics[key] - statistics[key] 
+        ...        for key in ('compilations', 'failures')]
+        [2, 2]
+        
+    Only the most recently used kernel is kept when the cache is too small
+    for more.
+
+        >>> cacheSize = inline._ctypesCacheSize
+        >>> inline._ctypesCacheSize = 1
+        >>> kernel = _getCtypesKernel("result[0] = 3. * a[0];", declarations)
+        >>> print len(os.listdir(inline._ctypesDirectory))
+        1
+        >>> print _ctypesStatistics['evictions'] - statistics['evictions']
+        2
+        
+        >>> shutil.rmtree(inline._ctypesDirectory)
+        >>> inline._ctypesDirectory = directory
+        >>> inline._ctypesCacheSize = cacheSize
+    """
+    key = (code, declarations)
+    if _ctypesKernels.has_key(key):
+        _ctypesStatistics['hits'] += 1
+    else:
+        _ctypesKernels[key] = _loadCtypesKernel(code, declarations)
+    return _ctypesKernels[key]
+    
+def _loadCtypesKernel(code, declarations):
+    source = """
+#include <math.h>
+
+void kernel(%s)
+{
+%s
+}
+""" % (", ".join(declarations), code)
+
+    import ctypes
+    import hashlib
+    
+    compiler = [os.environ.get('CC', 'cc')] + _ctypesCompileFlags
+    signature = hashlib.md5(" ".join(compiler) + source).hexdigest()
+    base = os.path.join(_ctypesDirectory, "kernel_" + signature)
+    
+    if os.path.exists(base + ".failed"):
+        _ctypesStatistics['failures'] += 1
+        _touch(base + ".failed")
+        return None
+
+    try:
+        library = ctypes.CDLL(base + ".so")
+        _ctypesStatistics['loads'] += 1
+        _touch(base + ".so")
+    except OSError:
+        if not _compileCtypesKernel(source, compiler, base):
+            _ctypesStatistics['failures'] += 1
+            return None
+        library = ctypes.CDLL(base + ".so")
+
+    kernel = library.kernel
+    kernel.restype = None
+    return kernel
+    
+def _compileCtypesKernel(source, compiler, base):
+    """
+    Compile `source` into the library `base`.so, or record the compiler
+    output in `base`.failed if it does not compile. Both are written under
+    temporary names and then renamed, so concurrent processes never see
+    partial files.
+    """
+    import subprocess
+    import tempfile
+    
+    _ctypesStatistics['compilations'] += 1
+    
+    directory = os.path.dirname(base)
+    try:
+        os.makedirs(directory)
+    except OSError:
+        ## another process may have made it
+        if not os.path.isdir(directory):
+            raise
+        
+    (f, sourceName) = tempfile.mkstemp(suffix=".c", dir=directory)
+    os.write(f, source)
+    os.close(f)
+    libraryName = sourceName[:-len(".c")] + ".so"
+    
+    process = subprocess.Popen(compiler + ['-o', libraryName, sourceName, '-lm'],
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    log = process.communicate()[0]
+    os.remove(sourceName)
+    
+    if process.returncode == 0:
+        os.rename(libraryName, base + ".so")
+    else:
+        (f, logName) = tempfile.mkstemp(dir=directory)
+        os.write(f, log)
+        os.close(f)
+        os.rename(logName, base + ".failed")
+        
+    _evictCtypesKernels(directory)
+    
+    return process.returncode == 0
+    
+def _touch(path):
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+def _evictCtypesKernels(directory):
+    """
+    Remove the least recently used kernels until the cache fits in
+    `_ctypesCacheSize`.
+    """
+    kernels = []
+    for name in os.listdir(directory):
+        if name.startswith("kernel_"):
+            try:
+                status = os.stat(os.path.join(directory, name))
+            except OSError:
+                continue
+            kernels.append((status.st_mtime, status.st_size, name))
+            
+    kernels.sort()
+    size = sum([kernel[1] for kernel in kernels])
+    ## always keep the newest kernel
+    for mtime, kernelSize, name in kernels[:-1]:
+        if size <= _ctypesCacheSize:
+            break
+        try:
+            os.remove(os.path.join(directory, name))
+            _ctypesStatistics['evictions'] += 1
+        except OSError:
+            pass
+        size -= kernelSize
+            
+def _reportCtypesStatistics():
+    sys.stderr.write("inline kernels: %(hits)d hits, %(loads)d loaded from cache, "
+                     "%(compilations)d compiled, %(failures)d failed, "
+                     "%(evictions)d evicted\n" % _ctypesStatistics)
+
+if os.environ.has_key('FIPY_INLINE_STATISTICS'):
+    import atexit
+    atexit.register(_reportCtypesStatistics)
+
+_fusionBackends = {'weave': _runInline, 'ctypes': _runCtypesInline}
+
+def _test(): 
+    import doctest
+    return doctest.testmod()
+    
+if __name__ == "__main__": 
+    _test() 
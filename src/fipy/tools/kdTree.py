@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+
+##
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ #
+ #  FILE: "kdTree.py"
+ #
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ #
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #
+ # ###################################################################
+ ##
+
+"""Spatial index for nearest point queries
+"""
+
+__docformat__ = 'restructuredtext'
+
+from fipy.tools import numerix
+
+class _KDTree:
+    """
+    A balanced k-d tree over a set of points, answering nearest point
+    queries for many points at once.
+
+    The tree is stored level by level: each node splits its points in half
+    along the coordinate with the largest extent, until the leaves
+    hold no more than `leafSize` points. A query descends to the leaf
+    containing each point and then visits only the leaves whose region is
+    closer than the best candidate found so far.
+
+        >>> centers = numerix.array(((0., 1., 2., 0., 1., 2.),
+        ...                          (0., 0., 0., 1., 1., 1.)))
+        >>> tree = _KDTree(centers, leafSize=1)
+        >>> print tree.getNearestIDs(((0.1, 1.9, 1.2), (0.2, 0.9, 0.6)))
+        [0 5 4]
+
+    Ties go to the lowest index, as with a brute-force search
+
+        >>> print tree.getNearestIDs(((0.5,), (0.5,)))
+        [0]
+
+    The result agrees with a brute-force search
+
+        >>> from fipy.tools.numerix import random
+        >>> random.seed(13)
+        >>> centers = random.random((3, 1000))
+        >>> points = random.random((3, 500)) * 1.2 - 0.1
+        >>> distances = ((centers[..., numerix.newaxis]
+        ...               - points[:, numerix.newaxis])**2).sum(0)
+        >>> print (_KDTree(centers).getNearestIDs(points)
+        ...        == numerix.argmin(distances, axis=0)).all()
+        True
+    """
+    def __init__(self, points, leafSize=16):
+        """
+        :Parameters:
+          - `points`: the coordinates of the indexed points, with shape
+            (dimensions, number of points)
+          - `leafSize`: the largest number of points held by a leaf
+        """
+        self.points = numerix.array(points, 'd')
+        dim, N = self.points.shape
+
+        depth = 0
+        while N > leafSize * 2**depth:
+            depth += 1
+
+        perm = numerix.arange(N)
+        starts = numerix.array((0,))
+        ends = numerix.array((N,))
+        lower = numerix.zeros((1, dim), 'd') - numerix.inf
+        upper = numerix.zeros((1, dim), 'd') + numerix.inf
+
+        self.splitDims = []
+        self.splitValues = []
+        self.lowerBounds = [lower]
+        self.upperBounds = [upper]
+
+        for level in range(depth):
+            nodes = numerix.arange(len(starts))
+            sizes = ends - starts
+            coords = numerix.take(self.points, perm, axis=1)
+            minima = numerix.minimum.reduceat(coords, starts, axis=1)
+            extents = numerix.maximum.reduceat(coords, starts, axis=1) - minima
+            dims = numerix.argmax(extents, axis=0)
+
+            ## sort the points of every node at once by offsetting the
+            ## scaled coordinates by the index of their node
+            keys = numerix.take(numerix.ravel(coords), 
+                                numerix.repeat(dims * N, sizes) + numerix.arange(N))
+            minima = minima[dims, nodes]
+            extents = extents[dims, nodes]
+            scales = 0.5 / numerix.where(extents > 0, extents, 1.)
+            order = numerix.argsort(numerix.repeat(nodes, sizes) 
+                                    + (keys - numerix.repeat(minima, sizes)) * numerix.repeat(scales, sizes))
+            perm = perm[order]
+            keys = keys[order]
+
+            ## the halves of every node are split at the least coordinate
+            ## of the upper half, and bounded by their extreme coordinates
+            mids = starts + (ends - starts) // 2
+            halves = numerix.ravel(numerix.transpose((starts, mids)))
+            values = numerix.minimum.reduceat(keys, halves)[1::2]
+            leftMaxima = numerix.maximum.reduceat(keys, halves)[::2]
+            self.splitDims.append(dims)
+            self.splitValues.append(values)
+
+            starts = halves
+            ends = numerix.ravel(numerix.transpose((mids, ends)))
+
+            lower = numerix.repeat(lower, 2, axis=0)
+            upper = numerix.repeat(upper, 2, axis=0)
+            upper[2 * nodes, dims] = numerix.maximum(leftMaxima, values)
+            lower[2 * nodes + 1, dims] = values
+            self.lowerBounds.append(lower)
+            self.upperBounds.append(upper)
+
+        ## pad the leaves to a common size by repeating their last point
+        sizes = ends - starts
+        offsets = numerix.minimum(numerix.arange(sizes.max())[numerix.newaxis],
+                                  sizes[:, numerix.newaxis] - 1)
+        self.leafIDs = perm[starts[:, numerix.newaxis] + offsets]
+        self.depth = depth
+
+    def _getLeafDistances(self, points, leaves):
+        ## the squared distances from each point to the points of its leaf
+        ids = self.leafIDs[leaves]
+        diff = self.points[:, ids] - points[..., numerix.newaxis]
+        return ids, numerix.sum(diff * diff, axis=0)
+
+    def _getBoxDistances(self, points, level, nodes):
+        ## the squared distances from each point to the region of its node
+        lower = numerix.transpose(self.lowerBounds[level][nodes])
+        upper = numerix.transpose(self.upperBounds[level][nodes])
+        diff = numerix.maximum(numerix.maximum(lower - points, points - upper), 0.)
+        return numerix.sum(diff * diff, axis=0)
+
+    def _getClosest(self, ids, distances):
+        ## the closest candidate in each row, preferring lower indices
+        best = distances.min(axis=1)
+        ties = distances == best[..., numerix.newaxis]
+        return numerix.where(ties, ids, len(self.points[0])).min(axis=1), best
+
+    def getNearestIDs(self, points):
+        """
+        Return the index of the indexed point nearest to each of `points`,
+        given with shape (dimensions, number of points).
+        """
+        points = numerix.array(points, 'd')
+        P = points.shape[1]
+        if P == 0:
+            return numerix.arange(0)
+        pointIDs = numerix.arange(P)
+
+        nodes = numerix.zeros((P,), 'l')
+        for dims, values in zip(self.splitDims, self.splitValues):
+            nodes = 2 * nodes + (points[dims[nodes], pointIDs] >= values[nodes])
+
+        nearest, best = self._getClosest(*self._getLeafDistances(points, nodes))
+
+        ## points nearer to the boundary of their leaf than to the best
+        ## candidate may have a nearer point in another leaf
+        lower = numerix.transpose(self.lowerBounds[self.depth][nodes])
+        upper = numerix.transpose(self.upperBounds[self.depth][nodes])
+        margins = numerix.maximum(numerix.minimum(points - lower, upper - points).min(axis=0), 0.)
+        unsure = numerix.nonzero(best >= margins**2)[0]
+
+        if len(unsure) > 0:
+            pointIDs = unsure
+            nodes = numerix.zeros((len(unsure),), 'l')
+            for level in range(1, self.depth + 1):
+                pointIDs = numerix.repeat(pointIDs, 2)
+                nodes = 2 * numerix.repeat(nodes, 2) + numerix.resize((0, 1), (len(nodes) * 2,))
+                keep = (self._getBoxDistances(points[:, pointIDs], level, nodes)
+                        <= best[pointIDs])
+                pointIDs = pointIDs[keep]
+                nodes = nodes[keep]
+
+            ids, distances = self._getClosest(*self._getLeafDistances(points[:, pointIDs], nodes))
+            order = numerix.lexsort((ids, distances, pointIDs))
+            pointIDs = pointIDs[order]
+            first = numerix.concatenate(((True,), pointIDs[1:] != pointIDs[:-1]))
+            nearest[pointIDs[first]] = ids[order][first]
+
+        return nearest
+
+def _test():
+    import doctest
+    return doctest.testmod()
+
+if __name__ == "__main__":
+    _test()
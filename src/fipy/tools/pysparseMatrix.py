@@ -69,10 +69,10 @@ class _PysparseMatrix(_SparseMatrix):
         return self.matrix
     
     def copy(self):
-        return _PysparseMatrix(matrix = self.matrix.copy())
+        return _PysparseMatrix(matrix = self._getMatrix().copy())
         
     def __getitem__(self, index):
-        m = self.matrix[index]
+        m = self._getMatrix()[index]
         if type(m) is type(0) or type(m) is type(0.):
             return m
         else:
@@ -87,7 +87,7 @@ class _PysparseMatrix(_SparseMatrix):
         return self
 
     def _add(self, other, sign = 1):
-        L = self.matrix.copy()
+        L = self._getMatrix().copy()
         self._iadd(L, other, sign)
         return _PysparseMatrix(matrix = L)
 
@@ -116,7 +116,7 @@ class _PysparseMatrix(_SparseMatrix):
         if other is 0:
             return self
         else:
-            L = self.matrix.copy()
+            L = self._getMatrix().copy()
             L.shift(1, other._getMatrix())
             return _PysparseMatrix(matrix = L)
         
@@ -125,7 +125,7 @@ class _PysparseMatrix(_SparseMatrix):
         if other is 0:
             return self
         else:
-            L = self.matrix.copy()
+            L = self._getMatrix().copy()
             L.shift(-1, other._getMatrix())
             return _PysparseMatrix(matrix = L)
 
@@ -162,19 +162,19 @@ class _PysparseMatrix(_SparseMatrix):
 
             
         """
-        N = self.matrix.shape[0]
+        N = self._getMatrix().shape[0]
 
         if isinstance(other, _PysparseMatrix):
-            return _PysparseMatrix(matrix = spmatrix.matrixmultiply(self.matrix, other._getMatrix()))
+            return _PysparseMatrix(matrix = spmatrix.matrixmultiply(self._getMatrix(), other._getMatrix()))
         else:
             shape = numerix.shape(other)
             if shape == ():
                 L = spmatrix.ll_mat(N, N, N)
                 L.put(other * numerix.ones(N))
-                return _PysparseMatrix(matrix = spmatrix.matrixmultiply(self.matrix, L))
+                return _PysparseMatrix(matrix = spmatrix.matrixmultiply(self._getMatrix(), L))
             elif shape == (N,):
                 y = other.copy()
-                self.matrix.matvec(other, y)
+                self._getMatrix().matvec(other, y)
                 return y
             else:
                 raise TypeError
@@ -182,13 +182,13 @@ class _PysparseMatrix(_SparseMatrix):
     def __rmul__(self, other):
         if type(numerix.ones(1)) == type(other):
             y = other.copy()
-            self.matrix.matvec_transp(other, y)
+            self._getMatrix().matvec_transp(other, y)
             return y
         else:
             return self * other
             
     def _getShape(self):
-        return self.matrix.shape
+        return self._getMatrix().shape
         
     def put(self, vector, id1, id2):
         """
@@ -201,7 +201,7 @@ class _PysparseMatrix(_SparseMatrix):
                 ---     3.141593      ---    
              2.500000      ---        ---    
         """
-        self.matrix.put(vector, id1, id2)
+        self._getMatrix().put(vector, id1, id2)
 
     def putDiagonal(self, vector):
         """
@@ -230,7 +230,7 @@ class _PysparseMatrix(_SparseMatrix):
 
     def take(self, id1, id2):
         vector = numerix.zeros(len(id1), 'd')
-        self.matrix.take(vector, id1, id2)
+        self._getMatrix().take(vector, id1, id2)
         return vector
 
     def takeDiagonal(self):
@@ -249,7 +249,7 @@ class _PysparseMatrix(_SparseMatrix):
                 ---     3.141593   2.960000  
              2.500000      ---     2.200000  
         """
-        self.matrix.update_add_at(vector, id1, id2)
+        self._getMatrix().update_add_at(vector, id1, id2)
 
     def addAtDiagonal(self, vector):
         if type(vector) in [type(1), type(1.)]:
@@ -261,6 +261,39 @@ class _PysparseMatrix(_SparseMatrix):
             ids = numerix.arange(len(vector))
             self.addAt(vector, ids, ids)
 
+    def _addAtBlock(self, other, rowOffset, colOffset):
+        """
+        Add the sparse matrix `other` to the block of `self` whose upper
+        left corner is at `rowOffset`, `colOffset`.
+
+            >>> L = _PysparseMatrix(size = 4)
+            >>> L._addAtBlock(_PysparseIdentityMatrix(size = 2), 2, 0)
+            >>> print L
+                ---        ---        ---        ---    
+                ---        ---        ---        ---    
+             1.000000      ---        ---        ---    
+                ---     1.000000      ---        ---    
+        """
+        values, irow, jcol = other._getMatrix().find()
+        self.addAt(values, irow + rowOffset, jcol + colOffset)
+
+    def _addAtFaces(self, pattern, cell1diag, cell1offdiag, cell2offdiag, cell2diag):
+        """
+        Add the face contributions with one sorted insertion per nonzero
+        of `pattern`.
+        
+            >>> from fipy.meshes.grid1D import Grid1D
+            >>> pattern = Grid1D(nx=3)._getSparsityPattern()
+            >>> L = _PysparseMatrix(size = 3)
+            >>> L._addAtFaces(pattern, (1., 2.), (-1., -2.), (-3., -4.), (3., 4.))
+            >>> print L
+             1.000000  -1.000000      ---    
+            -3.000000   5.000000  -2.000000  
+                ---    -4.000000   4.000000  
+        """
+        values = pattern._scatterFaces(cell1diag, cell1offdiag, cell2offdiag, cell2diag)
+        self._getMatrix().update_add_at(values, pattern.rows, pattern.cols)
+
     def getNumpyArray(self):
         shape = self._getShape()
         indices = numerix.indices(shape)
@@ -277,9 +310,196 @@ class _PysparseMatrix(_SparseMatrix):
         """
         Exports the matrix to a Matrix Market file of the given filename.
         """
-        self.matrix.export_mtx(filename)
+        self._getMatrix().export_mtx(filename)
     
 
+class _PysparseTripletMatrix(_PysparseMatrix):
+    """
+    A `_PysparseMatrix` that defers assembly. `addAt()` and addition of
+    other `_PysparseTripletMatrix` objects only append (value, row,
+    column) triplets to a buffer. The triplets are summed and compressed
+    into a single `ll_mat` the first time the underlying matrix is
+    needed, so an equation built from many terms and boundary conditions
+    allocates one `ll_mat` per sweep instead of one per contribution.
+
+        >>> L = _PysparseTripletMatrix(size = 3)
+        >>> L.addAt([3.,10.,numerix.pi,2.5], [0,0,1,2], [2,1,1,0])
+        >>> L2 = _PysparseTripletMatrix(size = 3)
+        >>> L2.addAt([1.73,2.2,8.4,3.9,1.23], [1,2,0,0,1], [2,2,0,0,2])
+        >>> L += L2
+        >>> print L.takeDiagonal()
+        [ 12.3          3.14159265   2.2       ]
+        >>> print L
+        12.300000  10.000000   3.000000  
+            ---     3.141593   2.960000  
+         2.500000      ---     2.200000  
+        >>> L -= L2
+        >>> print L
+            ---    10.000000   3.000000  
+            ---     3.141593      ---    
+         2.500000      ---        ---    
+        >>> print L + _PysparseIdentityMatrix(3)
+         1.000000  10.000000   3.000000  
+            ---     4.141593      ---    
+         2.500000      ---     1.000000  
+    """
+    def __init__(self, size = None, bandwidth = 0, matrix = None, sizeHint = None):
+        self.matrix = matrix
+        if matrix is not None:
+            size = matrix.shape[0]
+        self.size = size
+        self.triplets = []
+        self.diagonal = None
+        self.pattern = None
+        self.patternValues = None
+
+    def _getMatrix(self):
+        if (self.matrix is None 
+            or self.diagonal is not None 
+            or self.patternValues is not None 
+            or len(self.triplets) > 0):
+            self._compress()
+        return self.matrix
+
+    def _compress(self):
+        if self.patternValues is not None:
+            values = self.patternValues
+            if self.diagonal is not None:
+                values[self.pattern.diagonalIDs] += self.diagonal
+                self.diagonal = None
+            if self.matrix is None:
+                self.matrix = spmatrix.ll_mat(self.size, self.size, self.pattern.numberOfEntries)
+                self.matrix.put(values, self.pattern.rows, self.pattern.cols)
+            else:
+                self.matrix.update_add_at(values, self.pattern.rows, self.pattern.cols)
+            self.pattern = None
+            self.patternValues = None
+        triplets = self.triplets
+        if self.diagonal is not None:
+            ids = numerix.arange(self.size)
+            triplets = [(self.diagonal, ids, ids)] + triplets
+            self.diagonal = None
+        self.triplets = []
+
+        if self.matrix is None:
+            self.matrix = spmatrix.ll_mat(self.size, self.size, self.size)
+        if len(triplets) > 0:
+            ## a single `update_add_at`, which sums duplicate entries as it
+            ## inserts them, for all of the buffered contributions
+            values, id1, id2 = [numerix.concatenate(arrays) for arrays in zip(*triplets)]
+            self.matrix.update_add_at(values, id1, id2)
+
+    def copy(self):
+        L = _PysparseTripletMatrix(size = self.size)
+        if self.matrix is not None:
+            L.matrix = self.matrix.copy()
+        if self.diagonal is not None:
+            L.diagonal = self.diagonal.copy()
+        if self.patternValues is not None:
+            L.pattern = self.pattern
+            L.patternValues = self.patternValues.copy()
+        L.triplets = list(self.triplets)
+        return L
+        
+    def _iadd(self, L, other, sign = 1):
+        if other != 0:
+            if isinstance(other, _PysparseTripletMatrix) and other.matrix is None:
+                if other.diagonal is not None:
+                    self._addAtDiagonal(sign * other.diagonal)
+                if other.patternValues is not None:
+                    self._addAtPattern(other.pattern, sign * other.patternValues)
+                for values, id1, id2 in other.triplets:
+                    if sign != 1:
+                        values = sign * values
+                    self.triplets.append((values, id1, id2))
+            else:
+                self._getMatrix().shift(sign, other._getMatrix())
+        return self
+
+    def __iadd__(self, other):
+        return self._iadd(None, other)
+
+    def __isub__(self, other):
+        return self._iadd(None, other, -1)
+
+    def __add__(self, other):
+        if other is 0:
+            return self
+        else:
+            return self.copy()._iadd(None, other)
+        
+    def __sub__(self, other):
+        if other is 0:
+            return self
+        else:
+            return self.copy()._iadd(None, other, -1)
+
+    def _getShape(self):
+        return (self.size, self.size)
+        
+    def _addAtDiagonal(self, values, ids=None):
+        if ids is not None:
+            values = numerix.bincount(ids, values)
+        if self.diagonal is None:
+            self.diagonal = numerix.zeros((self.size,), 'd')
+        self.diagonal[:len(values)] += values
+
+    def _addAtPattern(self, pattern, values):
+        if self.pattern is None:
+            self.pattern = pattern
+            self.patternValues = values
+        elif self.pattern is pattern:
+            self.patternValues += values
+        else:
+            self.triplets.append((values, pattern.rows, pattern.cols))
+            
+    def _addAtFaces(self, pattern, cell1diag, cell1offdiag, cell2offdiag, cell2diag):
+        self._addAtPattern(pattern, pattern._scatterFaces(cell1diag, cell1offdiag, 
+                                                          cell2offdiag, cell2diag))
+
+    def addAt(self, vector, id1, id2):
+        id1 = numerix.asarray(id1)
+        id2 = numerix.asarray(id2)
+        values = numerix.zeros(id1.shape, 'd')
+        values[:] = vector
+        
+        ## diagonal contributions are accumulated in a single dense array
+        if id1 is id2:
+            self._addAtDiagonal(values, id1)
+        else:
+            onDiagonal = id1 == id2
+            if numerix.sometrue(onDiagonal):
+                self._addAtDiagonal(values[onDiagonal], id1[onDiagonal])
+                offDiagonal = numerix.logical_not(onDiagonal)
+                values, id1, id2 = values[offDiagonal], id1[offDiagonal], id2[offDiagonal]
+            self.triplets.append((values, id1, id2))
+
+    def addAtDiagonal(self, vector):
+        """
+        Add `vector`, or a scalar, to the diagonal of the matrix
+        
+            >>> L = _PysparseTripletMatrix(size = 3)
+            >>> L.addAtDiagonal(1.)
+            >>> L.addAtDiagonal((2., 3.))
+            >>> print L.takeDiagonal()
+            [ 3.  4.  1.]
+        """
+        if numerix.shape(vector) == ():
+            self._addAtDiagonal(numerix.zeros((self.size,), 'd') + vector)
+        else:
+            self._addAtDiagonal(numerix.array(vector, 'd'))
+
+    def takeDiagonal(self):
+        diagonal = numerix.zeros((self.size,), 'd')
+        if self.matrix is not None:
+            ids = numerix.arange(self.size)
+            self.matrix.take(diagonal, ids, ids)
+        if self.diagonal is not None:
+            diagonal += self.diagonal
+        if self.patternValues is not None:
+            diagonal += numerix.take(self.patternValues, self.pattern.diagonalIDs)
+        return diagonal
+        
 class _PysparseIdentityMatrix(_PysparseMatrix):
     """
     Represents a sparse identity matrix for pysparse.
@@ -86,7 +86,7 @@ class _SparseMatrix:
         return s[:-1]
             
     def __repr__(self):
-        return repr(self.matrix)
+        return repr(self._getMatrix())
         
     def __setitem__(self, index, value):
         pass
@@ -149,6 +149,21 @@ class _SparseMatrix:
     def addAtDiagonal(self, vector):
         pass
 
+    def _addAtBlock(self, other, rowOffset, colOffset):
+        raise NotImplementedError, "%s cannot add a block" % self.__class__.__name__
+
+    def _addAtFaces(self, pattern, cell1diag, cell1offdiag, cell2offdiag, cell2diag):
+        """
+        Add the contributions of each interior face of the mesh described by
+        the `_SparsityPattern` `pattern` to the four matrix positions that
+        couple the cells on either side of it.
+        """
+        id1, id2 = pattern.id1, pattern.id2
+        self.addAt(cell1diag, id1, id1)
+        self.addAt(cell1offdiag, id1, id2)
+        self.addAt(cell2offdiag, id2, id1)
+        self.addAt(cell2diag, id2, id2)
+
     def getNumpyArray(self):
         pass
 
@@ -160,3 +175,206 @@ class _SparseMatrix:
 ##      indices = numerix.indices(shape)
 ##         numMatrix = self.take(indices[0].ravel(), indices[1].ravel())
 ##      return numerix.reshape(numMatrix, shape)
+
+class _SparsityPattern:
+    """
+    The nonzero structure of a matrix that couples each cell of a mesh to
+    itself and to its neighbors across interior faces. The first
+    `size` nonzeros in `rows` and `cols` are the diagonal, followed by
+    the off-diagonal couplings. `offDiagonalIDs` locates the (cell 1, cell
+    2) and (cell 2, cell 1) entries of each interior face in that list, so
+    filling a matrix on this pattern reduces to gathering the face
+    coefficients into a vector of `numberOfEntries` values.
+
+        >>> from fipy.meshes.grid1D import Grid1D
+        >>> pattern = _SparsityPattern(Grid1D(nx=3))
+        >>> print pattern.rows
+        [0 1 2 0 1 1 2]
+        >>> print pattern.cols
+        [0 1 2 1 2 0 1]
+        >>> print pattern.offDiagonalIDs
+        [[3 4]
+         [5 6]]
+        >>> print pattern._scatterFaces((1., 2.), (-1., -2.), (-3., -4.), (3., 4.))
+        [ 1.  5.  4. -1. -2. -3. -4.]
+
+    When cells share more than one face, their off-diagonal contributions
+    are summed into a single entry.
+
+        >>> pattern = _SparsityPattern(Grid1D(nx=3))
+        >>> pattern.id2[1] = 0
+        >>> pattern._findOffDiagonals()
+        >>> print pattern.rows
+        [0 1 2 0 1]
+        >>> print pattern.cols
+        [0 1 2 1 0]
+        >>> print pattern.offDiagonalIDs
+        [[3 4]
+         [4 3]]
+        >>> print pattern._scatterFaces((1., 2.), (-1., -2.), (-3., -4.), (3., 4.))
+        [ 5.  5.  0. -5. -5.]
+
+    A face that couples a cell to itself only adds to the diagonal.
+
+        >>> pattern.id2[1] = 1
+        >>> pattern._findOffDiagonals()
+        >>> print pattern.rows
+        [0 1 2 0 1]
+        >>> print pattern.offDiagonalIDs
+        [[3 1]
+         [4 1]]
+        >>> print pattern._scatterFaces((1., 2.), (-1., -2.), (-3., -4.), (3., 4.))
+        [ 1.  3.  0. -1. -3.]
+    """
+    def __init__(self, mesh):
+        self.size = mesh.getNumberOfCells()
+        self.interiorFaces = numerix.nonzero(mesh.getInteriorFaces())[0]
+        id1, id2 = mesh._getAdjacentCellIDs()
+        self.id1 = numerix.take(id1, self.interiorFaces)
+        self.id2 = numerix.take(id2, self.interiorFaces)
+        self.diagonalIDs = numerix.arange(self.size)
+        self._findOffDiagonals()
+        
+    def _findOffDiagonals(self):
+        N = self.size
+        M = len(self.id1)
+        rows = numerix.concatenate((self.id1, self.id2))
+        cols = numerix.concatenate((self.id2, self.id1))
+        key = numerix.sort(rows * N + cols)
+        
+        ## normally each face couples a distinct pair of cells, and the
+        ## off-diagonal values are just the face coefficients
+        self.isSimple = not (numerix.sometrue(rows == cols) 
+                             or numerix.sometrue(key[1:] == key[:-1]))
+        
+        if self.isSimple:
+            self.offDiagonalIDs = numerix.reshape(N + numerix.arange(2 * M), (2, M))
+        else:
+            ## a face that couples a cell to itself contributes to the diagonal
+            positions = rows.copy()
+            offDiagonal = numerix.nonzero(rows != cols)[0]
+            key = numerix.take(rows * N + cols, offDiagonal)
+            order = numerix.argsort(key, kind='mergesort')
+            key = numerix.take(key, order)
+            isNew = numerix.concatenate(([True], key[1:] != key[:-1]))
+            positions[numerix.take(offDiagonal, order)] = N + numerix.cumsum(isNew) - 1
+            key = key[isNew]
+            rows = key / N
+            cols = key % N
+            self.offDiagonalIDs = numerix.reshape(positions, (2, M))
+            
+        self.rows = numerix.concatenate((self.diagonalIDs, rows))
+        self.cols = numerix.concatenate((self.diagonalIDs, cols))
+        self.numberOfEntries = len(self.rows)
+
+    def _scatterFaces(self, cell1diag, cell1offdiag, cell2offdiag, cell2diag):
+        """
+        Return the values on this pattern of the face contributions.
+        """
+        M = len(self.id1)
+        diagonal = numerix.zeros((self.size,), 'd')
+        if M > 0:
+            for ids, values in ((self.id1, cell1diag), (self.id2, cell2diag)):
+                values = numerix.bincount(ids, numerix.resize(values, (M,)))
+                diagonal[:len(values)] += values
+        
+        offDiagonal = (numerix.resize(cell1offdiag, (M,)), numerix.resize(cell2offdiag, (M,)))
+        if self.isSimple:
+            return numerix.concatenate((diagonal,) + offDiagonal)
+        else:
+            values = numerix.zeros((self.numberOfEntries,), 'd')
+            values[:self.size] = diagonal
+            if M > 0:
+                offDiagonal = numerix.bincount(self.offDiagonalIDs.ravel(), 
+                                               numerix.concatenate(offDiagonal))
+                values[:len(offDiagonal)] += offDiagonal
+            return values
+
+class _SparseOperator:
+    """
+    A constant sparse matrix with at most `K` nonzeros in each row, for
+    applying the same linear map to many vectors. The column indices and
+    values of the nonzeros are held as (`K`, rows) arrays, padded with zero
+    values, so multiplying the last axis of an array by the operator is
+    one `numerix.take` and one sum, with no masked arrays involved.
+
+        >>> op = _SparseOperator(cols=((0, 0, 1), (1, 0, 1)), 
+        ...                      values=((1., 0., 3.), (2., 0., 4.)))
+        >>> print op * numerix.array((1., 10.))
+        [ 21.   0.  70.]
+        >>> print op * numerix.array(((1., 10.), (0., 1.)))
+        [[ 21.   0.  70.]
+         [  2.   0.   7.]]
+
+    Extra leading axes of the values give extra axes of the result
+
+        >>> op = _SparseOperator(cols=((0, 1),), 
+        ...                      values=(((1., 2.),), ((3., 4.),)))
+        >>> print op * numerix.array((1., 10.))
+        [[  1.  20.]
+         [  3.  40.]]
+    """
+    def __init__(self, cols, values):
+        """
+        :Parameters:
+          - `cols`: the (`K`, rows) column indices of the nonzeros
+          - `values`: their (..., `K`, rows) values, zero where a row has
+            fewer than `K` nonzeros
+        """
+        self.cols = numerix.array(cols, 'l')
+        self.values = numerix.array(values, 'd')
+        
+    def __mul__(self, other):
+        other = numerix.array(other)
+        gathered = numerix.take(other, self.cols, axis=-1)
+        extraAxes = len(self.values.shape) - len(self.cols.shape)
+        gathered = numerix.reshape(gathered, other.shape[:-1] + (1,) * extraAxes + self.cols.shape)
+        return numerix.sum(gathered * self.values, axis=-2)
+
+    def _take(self, rows):
+        """
+        Return the operator formed by the given `rows` alone.
+
+            >>> op = _SparseOperator(cols=((0, 0, 1), (1, 0, 1)), 
+            ...                      values=((1., 0., 3.), (2., 0., 4.)))
+            >>> print op._take((2, 0)) * numerix.array((1., 10.))
+            [ 70.  21.]
+        """
+        return _SparseOperator(cols=numerix.take(self.cols, rows, axis=-1),
+                               values=numerix.take(self.values, rows, axis=-1))
+
+def _sparseOperatorFromTriplets(rows, cols, values, numberOfRows):
+    """
+    Return a `_SparseOperator` with the nonzero `values` at (`rows`,
+    `cols`). Repeated entries accumulate.
+
+        >>> op = _sparseOperatorFromTriplets(rows=(2, 0, 2, 2), cols=(0, 1, 1, 1),
+        ...                                  values=(1., 2., 3., 4.), numberOfRows=3)
+        >>> print op.cols.shape
+        (3, 3)
+        >>> print op * numerix.array((1., 10.))
+        [ 20.   0.  71.]
+    """
+    rows = numerix.array(rows, 'l')
+    cols = numerix.array(cols, 'l')
+    values = numerix.array(values, 'd')
+    
+    order = numerix.argsort(rows, kind='mergesort')
+    rows = rows[order]
+    counts = numerix.bincount(rows, minlength=numberOfRows)
+    slots = numerix.arange(len(rows)) - (numerix.cumsum(counts) - counts)[rows]
+    
+    K = max(counts.max(), 1)
+    opCols = numerix.zeros((K, numberOfRows), 'l')
+    opValues = numerix.zeros(values.shape[:-1] + (K, numberOfRows), 'd')
+    opCols[slots, rows] = cols[order]
+    opValues[..., slots, rows] = values[..., order]
+    
+    return _SparseOperator(cols=opCols, values=opValues)
+
+def _test(): 
+    import doctest
+    return doctest.testmod()
+    
+if __name__ == "__main__": 
+    _test()
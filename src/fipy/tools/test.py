@@ -38,10 +38,15 @@ import fipy.tests.testProgram
 def _suite():
     theSuite = _LateImportDocTestSuite(docTestModuleNames = (
             'pysparseMatrix',
+            'sparseMatrix',
             'dimensions.physicalField',
             'numerix',
             'dump',
+            'checkpoint',
             'vector',
+            'inline',
+            'kdTree',
+            'counterRandom',
         ), base = __name__)
 
     return theSuite
@@ -409,7 +409,7 @@ class _TrilinosMatrix(_SparseMatrix):
         
         if type(vector) in [type(1), type(1.)]:
             ids = numerix.arange(self._getMatrix().NumGlobalRows())
-            tmp = numerix.zeros((self._getMatrix().NumGlobalRows), 'd')
+            tmp = numerix.zeros((self._getMatrix().NumGlobalRows(),), 'd')
             tmp[:] = vector
             if ids.dtype.name == 'int64':
                 ids = ids.astype('int32')
@@ -478,8 +478,8 @@ class _TrilinosMatrix(_SparseMatrix):
 
     def addAtDiagonal(self, vector):
         if type(vector) in [type(1), type(1.)]:
-            ids = numerix.arange(self._getMatrix().GetGlobalRows())
-            tmp = numerix.zeros((self._getMatrix().GetGlobalRows(),), 'd')
+            ids = numerix.arange(self._getMatrix().NumGlobalRows())
+            tmp = numerix.zeros((self._getMatrix().NumGlobalRows(),), 'd')
             tmp[:] = vector
             self.addAt(tmp, ids, ids)
         else:
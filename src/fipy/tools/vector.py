@@ -38,27 +38,60 @@
 from fipy.tools import numerix
 
 def _putAddPy(vector, ids, additionVector, mask = False):
+    """
+    Add the values in `additionVector` to `vector` at the flat indices
+    `ids`. Repeated indices accumulate, and entries where `mask` is true
+    are skipped.
+
+        >>> v = numerix.zeros(4, 'd')
+        >>> _putAddPy(v, numerix.array((0, 2, 2, 3)), (1., 2., 3., 4.))
+        >>> print v
+        [ 1.  0.  5.  4.]
+        >>> _putAddPy(v, numerix.array((0, 2, 2, 3)), (1., 2., 3., 4.), 
+        ...           mask=numerix.array((0, 1, 0, 1)))
+        >>> print v
+        [ 2.  0.  8.  4.]
+
+    When `additionVector` has one more dimension than `vector`, each of
+    its components is added to the corresponding component of `vector`.
+
+        >>> v = numerix.zeros((2, 3), 'd')
+        >>> ids = numerix.MA.masked_values(((0, 1), (1, -1)), -1)
+        >>> _putAddPy(v, ids, (((1., 1.), (1., 1.)), ((10., 10.), (10., 10.))),
+        ...           mask=numerix.MA.getmask(ids))
+        >>> print v
+        [[  1.   2.   0.]
+         [ 10.  20.   0.]]
+
+    """
     additionVector = numerix.array(additionVector)
+    ids = numerix.array(numerix.MA.filled(ids, 0)).ravel()
 
+    if len(vector.shape) < len(additionVector.shape):
+        ## offset the ids of each component so that all of them can be
+        ## accumulated in a single pass
+        components = vector.shape[0]
+        size = vector[0].size
+        additionVector = numerix.reshape(additionVector, (components, -1))
+        N = min(len(ids), additionVector.shape[1])
+        ids = (ids[numerix.newaxis, :N] 
+               + size * numerix.arange(components)[..., numerix.newaxis])
+        additionVector = additionVector[..., :N]
+    else:
+        N = min(len(ids), additionVector.size)
+        ids = ids[:N]
+        additionVector = additionVector.ravel()[:N]
+        
     if numerix.sometrue(mask):
-        if len(vector.shape) < len(additionVector.shape):
-            for j in range(vector.shape[0]):
-                for id, value, masked in zip(ids.flat, additionVector[j].flat, mask.flat):
-                    if not masked:
-                        vector[j].flat[id] += value
-        else:
-            for id, value, masked in zip(ids.flat, additionVector.flat, mask.flat):
-                if not masked:
-                    vector.flat[id] += value
+        keep = numerix.logical_not(numerix.array(mask).ravel()[:N])
+        keep = numerix.resize(keep, ids.shape)
+        ids = ids[keep]
+        additionVector = additionVector[keep]
 
-    else:
-        if len(vector.shape) < len(additionVector.shape):
-            for j in range(vector.shape[0]):
-                for id, value in zip(ids.flat, additionVector[j].flat):
-                    vector[j].flat[id] += value
-        else:
-            for id, value in zip(ids.flat, additionVector.flat):
-                vector.flat[id] += value
+    ids = ids.ravel()
+    if len(ids) > 0:
+        total = numerix.bincount(ids, additionVector.ravel())
+        vector.flat[:len(total)] = vector.flat[:len(total)] + total
 
 ## FIXME: inline version doesn't account for all of the conditions that Python 
 ## version does.
@@ -71,12 +104,15 @@ def _putAddIn(vector, ids, additionVector):
     vector=vector, ids=ids, additionVector=numerix.array(additionVector),
     ni = len(ids.flat))
 
-def putAdd(vector, ids, additionVector):
+def putAdd(vector, ids, additionVector, mask = False):
     """ This is a temporary replacement for Numeric.put as it was not doing
     what we thought it was doing.
     """
-    from fipy.tools import inline
-    inline._optionalInline(_putAddIn, _putAddPy, vector, ids, additionVector)
+    if numerix.sometrue(mask):
+        _putAddPy(vector, ids, additionVector, mask=mask)
+    else:
+        from fipy.tools import inline
+        inline._optionalInline(_putAddIn, _putAddPy, vector, ids, additionVector)
 
 def prune(array, shift, start=0, axis=0):
     """
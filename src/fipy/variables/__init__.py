@@ -11,4 +11,6 @@ from gammaNoiseVariable import GammaNoiseVariable
 from gaussianNoiseVariable import GaussianNoiseVariable
 from uniformNoiseVariable import UniformNoiseVariable
 
-from histogramVariable import HistogramVariable
\ No newline at end of file
+from histogramVariable import HistogramVariable
+
+from remapper import Remapper
@@ -37,6 +37,8 @@ from fipy.tools import inline
 from fipy.variables.cellVariable import CellVariable
 
 class _AddOverFacesVariable(CellVariable):
+    _recomputable = not inline.doInline
+    
     def __init__(self, faceVariable, mesh = None):
         if not mesh:
             mesh = faceVariable.getMesh()
@@ -46,12 +48,7 @@ class _AddOverFacesVariable(CellVariable):
         self.faceVariable = self._requires(faceVariable)
 
     def _calcValuePy(self):
-        ids = self.mesh._getCellFaceIDs()
-        
-        contributions = numerix.take(self.faceVariable, ids)
-
-        # FIXME: numerix.MA.filled casts away dimensions
-        return numerix.MA.filled(numerix.sum(contributions * self.mesh._getCellFaceOrientations(), 0)) / self.mesh.getCellVolumes()
+        return self.mesh._getFaceToCellDivergenceOperator() * self.faceVariable.getNumericValue()
         
     def _calcValueIn(self):
 
@@ -39,6 +39,13 @@ from fipy.tools import numerix
 from fipy.tools import inline
 
 class _ArithmeticCellToFaceVariable(_CellToFaceVariable):
+    def _calcValue(self):
+        if inline.doInline:
+            return _CellToFaceVariable._calcValue(self)
+        else:
+            operator = self.mesh._getCellToFaceInterpolationOperator()
+            return (operator * self.var.getNumericValue()) * self.var._getUnitAsOne()
+        
     def _calcValuePy(self, alpha, id1, id2):
         cell1 = numerix.take(self.var, id1, axis=-1)
         cell2 = numerix.take(self.var, id2, axis=-1)
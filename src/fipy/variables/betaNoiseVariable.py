@@ -36,8 +36,7 @@
 
 __docformat__ = 'restructuredtext'
 
-from fipy.tools.numerix import random
-
+from fipy.tools import numerix
 from fipy.variables.noiseVariable import NoiseVariable
 
 class BetaNoiseVariable(NoiseVariable):
@@ -116,9 +115,9 @@ class BetaNoiseVariable(NoiseVariable):
         self.alpha = self._requires(alpha)
         self.beta = self._requires(beta)
     
-    def random(self):
-        return random.beta(a = self.alpha, b = self.beta, 
-                           size = [self.getMesh().globalNumberOfCells])
+    def random(self, ids):
+        return self.generator.beta(ids, self.step, 
+                                   a=numerix.array(self.alpha), b=numerix.array(self.beta))
 
 def _test(): 
     import doctest
@@ -0,0 +1,231 @@
+## -*-Pyth-*-
+ # #############################################################################
+ # FiPy - a finite volume PDE solver in Python
+ #
+ # FILE: "cacheManager.py"
+ #
+ # Author: Jonathan Guyer <guyer@nist.gov>
+ # Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ # Author: James Warren   <jwarren@nist.gov>
+ #   mail: NIST
+ #    www: <http://www.ctcms.nist.gov/fipy/>
+ #
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ #
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #
+ # #############################################################################
+ ##
+
+__docformat__ = 'restructuredtext'
+
+import os
+import sys
+import weakref
+
+from fipy.tools.dimensions import physicalField
+
+class _CacheManager:
+    """
+    Keeps the values cached by recomputable `Variable` objects within a
+    budget of bytes.
+
+    Each time such a `Variable` caches a freshly calculated value, the
+    size of that value and the time taken to calculate it are recorded.
+    When the cached values exceed the budget, the values that are cheapest
+    to recalculate, per byte, are discarded; they are recalculated the
+    next time they are needed.
+
+        >>> from fipy.variables.variable import Variable
+        >>> from fipy.tools import numerix
+        >>> manager = _CacheManager(budget=8 * 1000 * 3)
+
+        >>> class _SlowVariable(Variable):
+        ...     _recomputable = True
+        ...     def __init__(self, value, cost):
+        ...         Variable.__init__(self, value=value)
+        ...         self.cost = cost
+
+        >>> vars = [_SlowVariable(numerix.zeros(1000, 'd'), cost)
+        ...         for cost in (3., 1., 4., 2.)]
+        >>> for var in vars:
+        ...     manager._store(var, cost=var.cost)
+
+    The cheapest value was discarded to fit the fourth value in the budget
+
+        >>> print [var.value is None for var in vars]
+        [False, True, False, False]
+        >>> print manager.getStatistics()['bytes']
+        24000
+
+    but the most recent value is always kept, even if it is the cheapest
+
+        >>> last = _SlowVariable(numerix.zeros(1000, 'd'), 0.)
+        >>> manager._store(last, cost=last.cost)
+        >>> print [var.value is None for var in vars]
+        [False, True, False, True]
+        >>> print manager.getStatistics()['evictions']
+        2
+
+    Values are forgotten along with their `Variable`
+
+        >>> del vars, var
+        >>> print manager.getStatistics()['bytes']
+        8000
+
+    Discarded values are recalculated when needed
+
+        >>> from fipy import Grid1D, CellVariable
+        >>> from fipy.variables import cacheManager as module
+        >>> budget = module.cacheManager.budget
+        >>> module.cacheManager.setBudget(0)
+        >>> statistics = module.cacheManager.getStatistics()
+        
+        >>> var = CellVariable(mesh=Grid1D(nx=5), value=numerix.arange(5.))
+        >>> expr = var.getGrad()[0] * 2 + var.getFaceGrad().getDivergence()
+        >>> print expr
+        [ 2.  2.  2.  2.  0.]
+        >>> print module.cacheManager.getStatistics()['evictions'] > statistics['evictions']
+        True
+        >>> var.setValue(numerix.arange(5.) * 2)
+        >>> print expr
+        [ 4.  4.  4.  4.  0.]
+
+        >>> module.cacheManager.setBudget(budget)
+    """
+    def __init__(self, budget=None):
+        """
+        :Parameters:
+          - `budget`: the number of bytes that cached values may occupy, or
+            `None` for no limit.
+        """
+        self.budget = budget
+        self.reporting = os.environ.has_key('FIPY_CACHE_STATISTICS')
+        self.entries = {}
+        self.evicted = {}
+        self.statistics = {'hits': 0, 'misses': 0, 'recalculations': 0,
+                           'evictions': 0, 'bytes': 0, 'peak': 0}
+
+    def _isActive(self):
+        return self.budget is not None or self.reporting
+
+    def setBudget(self, budget):
+        """
+        Set the number of bytes that cached values may occupy, or `None`
+        for no limit.
+        """
+        self.budget = budget
+        self._evict()
+
+    def _hit(self, var):
+        self.statistics['hits'] += 1
+
+    def _store(self, var, cost):
+        """
+        Record that `var` has cached a value that took `cost` seconds to
+        calculate.
+        """
+        key = id(var)
+        self.statistics['misses'] += 1
+        if self.evicted.has_key(key):
+            self.entries[key] = (self.evicted[key], 0, cost)
+            del self.evicted[key]
+            self.statistics['recalculations'] += 1
+
+        array = var.value
+        if isinstance(array, physicalField.PhysicalField):
+            array = array.value
+        nbytes = getattr(array, 'nbytes', 0)
+
+        if self.entries.has_key(key):
+            ref, oldBytes, oldCost = self.entries[key]
+            self.statistics['bytes'] -= oldBytes
+        else:
+            def forget(ref, self=self, key=key):
+                self._forget(key)
+            ref = weakref.ref(var, forget)
+
+        self.entries[key] = (ref, nbytes, cost)
+        self.statistics['bytes'] += nbytes
+        self.statistics['peak'] = max(self.statistics['peak'], self.statistics['bytes'])
+
+        self._evict(keep=key)
+
+    def _forget(self, key):
+        if self.entries.has_key(key):
+            self.statistics['bytes'] -= self.entries[key][1]
+            del self.entries[key]
+        if self.evicted.has_key(key):
+            del self.evicted[key]
+
+    def _evict(self, keep=None):
+        if self.budget is None or self.statistics['bytes'] <= self.budget:
+            return
+
+        ## discard the values that take the least time to recalculate
+        ## for each byte they free
+        candidates = [(cost / max(nbytes, 1), key)
+                      for key, (ref, nbytes, cost) in self.entries.items()
+                      if key != keep]
+        candidates.sort()
+
+        for cost, key in candidates:
+            if self.statistics['bytes'] <= self.budget:
+                break
+            ref, nbytes, cost = self.entries[key]
+            self._forget(key)
+            var = ref()
+            if var is not None:
+                var.value = None
+                self.evicted[key] = ref
+                self.statistics['evictions'] += 1
+
+    def getStatistics(self):
+        """
+        Return a dictionary with the number of `hits`, where a cached value
+        was used, the number of `misses`, where a value was calculated and
+        cached, how many of those misses were `recalculations` of an evicted
+        value, the number of `evictions`, and the current and `peak`
+        number of `bytes` occupied by cached values.
+        """
+        return self.statistics.copy()
+
+    def _report(self):
+        statistics = self.getStatistics()
+        lookups = statistics['hits'] + statistics['misses']
+        if lookups > 0:
+            statistics['rate'] = 100. * statistics['hits'] / lookups
+        else:
+            statistics['rate'] = 0.
+        sys.stderr.write("cached values: %(hits)d hits, %(misses)d misses (%(rate).1f%% hit rate), "
+                         "%(recalculations)d recalculated after %(evictions)d evictions, "
+                         "%(peak)d bytes at peak\n" % statistics)
+
+if os.environ.has_key('FIPY_CACHE_SIZE'):
+    cacheManager = _CacheManager(budget=int(float(os.environ['FIPY_CACHE_SIZE']) * 1024 * 1024))
+else:
+    cacheManager = _CacheManager()
+
+if os.environ.has_key('FIPY_CACHE_STATISTICS'):
+    import atexit
+    atexit.register(cacheManager._report)
+
+def _test():
+    import doctest
+    return doctest.testmod()
+
+if __name__ == "__main__":
+    _test()
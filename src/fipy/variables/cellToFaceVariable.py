@@ -39,6 +39,8 @@ from fipy.tools import inline
 from fipy.tools import numerix
 
 class _CellToFaceVariable(FaceVariable):
+    _recomputable = not inline.doInline
+    
     def __init__(self, var):
         FaceVariable.__init__(self, mesh=var.getMesh(), elementshape=var.shape[:-1])
         self.var = self._requires(var)
@@ -38,6 +38,7 @@ __docformat__ = 'restructuredtext'
 
 from fipy.variables.meshVariable import _MeshVariable
 from fipy.tools import numerix
+from fipy.tools.dimensions import physicalField
 
 class CellVariable(_MeshVariable):
     """
@@ -65,9 +66,16 @@ class CellVariable(_MeshVariable):
         _MeshVariable.__init__(self, mesh=mesh, name=name, value=value, 
                                rank=rank, elementshape=elementshape, unit=unit)
 
+        self._setOld(hasOld)
+            
+    def _setOld(self, hasOld):
+        ## `hasOld` is the number of previous solution sweeps to keep;
+        ## `self.old` is the most recent of them
         if hasOld:
-            self.old = self.copy()
+            self._olds = [self.copy() for level in range(int(hasOld))]
+            self.old = self._olds[0]
         else:
+            self._olds = []
             self.old = None
             
     def _getVariableClass(self):
@@ -158,9 +166,9 @@ class CellVariable(_MeshVariable):
 
     def __call__(self, points=None, order=0, nearestCellIDs=None):
         r"""
-        Interpolates the CellVariable to a set of points using a
-        method that has a memory requirement on the order of Ncells by
-        Npoints in general, but uses only Ncells when the
+        Interpolates the CellVariable to a set of points, finding the
+        nearest cells with a spatial index of the cell centers that is
+        built once for the mesh, or analytically when the
         CellVariable's mesh is a UniformGrid object.
 
         :Parameters:
@@ -287,6 +295,13 @@ class CellVariable(_MeshVariable):
         >>> print numerix.allclose(CellVariable(mesh=Grid1D(dx=(2.0, 1.0, 0.5)), 
         ...                                     value=(0, 1, 2)).getLeastSquaresGrad().getGlobalValue(), [[0.461538461538, 0.8, 1.2]])
         True
+
+        >>> from fipy import Grid3D
+        >>> m = Grid3D(nx=3, ny=3, nz=3, dx=0.5, dy=2.0, dz=1.0)
+        >>> x, y, z = m.getCellCenters()
+        >>> grad = CellVariable(mesh=m, value=x + 2 * y - 3 * z).getLeastSquaresGrad()
+        >>> print numerix.allclose(grad.getGlobalValue()[..., 13], [1.0, 2.0, -3.0])
+        True
         """
 
         if not hasattr(self, 'leastSquaresGrad'):
@@ -424,10 +439,11 @@ class CellVariable(_MeshVariable):
         """
         return self.getGrad().getArithmeticFaceValue()
 
-    def getOld(self):
+    def getOld(self, level=1):
         """
         Return the values of the `CellVariable` from the previous
-        solution sweep.
+        solution sweep, or from `level` sweeps before the current one if
+        the `CellVariable` was created with that many old levels.
 
         Combinations of `CellVariable's` should also return old
         values.
@@ -454,24 +470,89 @@ class CellVariable(_MeshVariable):
         [9 6]
         >>> print v1.getOld()
         [6 9]
+
+        Multistep schemes can keep more than one old level
+
+        >>> var = CellVariable(mesh = mesh, value = (1., 2.), hasOld = 2)
+        >>> for value in ((3., 4.), (5., 6.)):
+        ...     var.updateOld()
+        ...     var.setValue(value)
+        >>> print var.getOld()
+        [ 3.  4.]
+        >>> print var.getOld(level=2)
+        [ 1.  2.]
         """
         if self.old is None:
             return self
         else:
-            return self.old
+            return self._olds[level - 1]
 ##             import weakref
 ##          return weakref.proxy(self.old)
 
     def updateOld(self):
         """
         Set the values of the previous solution sweep to the current values.
+
+        The old levels trade storage with the `CellVariable`, rather than
+        copying it, so only the current values are copied once
+
+        >>> from fipy.meshes.grid1D import Grid1D
+        >>> var = CellVariable(mesh = Grid1D(nx = 2), value = (1., 2.), hasOld = 1)
+        >>> twiceOld = var.getOld() * 2
+        >>> print twiceOld
+        [ 2.  4.]
+        >>> var.setValue((3., 4.))
+        >>> value = var.getValue()
+        >>> var.updateOld()
+        >>> print var.getOld().getValue() is value
+        True
+        >>> print twiceOld
+        [ 6.  8.]
+        >>> var.setValue((5., 6.))
+        >>> print var.getOld()
+        [ 3.  4.]
         """
         if self.old is not None:
-            self.old.setValue(self.getValue().copy())
+            self._rotateOld()
+
+    def _rotateOld(self):
+        ## the current value becomes the most recent old value and the
+        ## oldest value is recycled to hold a copy of the current values
+        self.getValue()
+        values = [self.value] + [old.value for old in self._olds]
+        for old, value in zip(self._olds, values[:-1]):
+            old.value = value
+            old._markFresh()
+        self.value = values[-1]
+        self._copyValueFrom(self.old)
+
+    def _copyValueFrom(self, other):
+        mine, theirs = self.value, other.getValue()
+        if isinstance(mine, physicalField.PhysicalField):
+            mine = mine.value
+        if isinstance(theirs, physicalField.PhysicalField):
+            theirs = theirs.value
+        mine[:] = theirs
 
     def _resetToOld(self):
+        """
+        Set the current values back to those of the previous solution
+        sweep, as when a time step is rejected.
+
+        >>> from fipy.meshes.grid1D import Grid1D
+        >>> var = CellVariable(mesh = Grid1D(nx = 2), value = (1., 2.), hasOld = 1)
+        >>> var.updateOld()
+        >>> var.setValue((3., 4.))
+        >>> twice = var * 2
+        >>> print twice
+        [ 6.  8.]
+        >>> var._resetToOld()
+        >>> print twice
+        [ 2.  4.]
+        """
         if self.old is not None:
-            self.setValue(self.old.getValue())
+            self._copyValueFrom(self.old)
+            self._markFresh()
             
     def _getShapeFromMesh(mesh):
         """
@@ -53,6 +53,8 @@ class _CellVolumeAverageVariable(Variable):
         2.5
         
     """
+    _recomputable = True
+    
     def __init__(self, var):
         Variable.__init__(self, unit = var.getUnit())
         self.var = self._requires(var)
@@ -34,7 +34,7 @@
 
 __docformat__ = 'restructuredtext'
 
-from fipy.tools.numerix import random
+from fipy.tools import numerix
 
 from fipy.variables.noiseVariable import NoiseVariable
 
@@ -105,9 +105,8 @@ class ExponentialNoiseVariable(NoiseVariable):
         NoiseVariable.__init__(self, mesh = mesh, name = name, hasOld = hasOld)
         self.mean = self._requires(mean)
     
-    def random(self):
-        return random.exponential(scale = self.mean, 
-                                  size = [self.getMesh().globalNumberOfCells])
+    def random(self, ids):
+        return numerix.array(self.mean) * self.generator.exponential(ids, self.step)
 
 def _test(): 
     import doctest
@@ -37,6 +37,8 @@
 from fipy.variables.cellVariable import CellVariable
 
 class _FaceGradContributions(CellVariable):
+    _recomputable = True
+    
     def __init__(self, var):
         CellVariable.__init__(self, mesh=var.getMesh(), rank=var.getRank() + 1)
 	self.var = self._requires(var)
@@ -39,6 +39,8 @@ from fipy.tools import numerix
 from fipy.tools import inline
 
 class _FaceGradVariable(FaceVariable):
+    _recomputable = not inline.doInline
+    
     def __init__(self, var):
         FaceVariable.__init__(self, mesh=var.getMesh(), rank=var.getRank() + 1)
         self.var = self._requires(var)
@@ -46,26 +48,20 @@ class _FaceGradVariable(FaceVariable):
     def _calcValue(self):        
         return inline._optionalInline(self._calcValueInline, self._calcValuePy)
     
+    def _calcNormalGradPy(self):
+        return (self.mesh._getCellToFaceNormalGradOperator() * self.var.getNumericValue()) * self.var._getUnitAsOne()
+
     def _calcValuePy(self):
-        dAP = self.mesh._getCellDistances()
-        id1, id2 = self.mesh._getAdjacentCellIDs()
-##      N = self.mod(numerix.take(self.var,id2) - numerix.take(self.var,id1)) / dAP
-        N = (numerix.take(self.var,id2) - numerix.take(self.var,id1)) / dAP
+        N = self._calcNormalGradPy()
         normals = self.mesh._getOrientedFaceNormals()
         
         tangents1 = self.mesh._getFaceTangents1()
         tangents2 = self.mesh._getFaceTangents2()
         cellGrad = self.var.getGrad().getNumericValue()
         
-        grad1 = numerix.take(cellGrad, id1, axis=1)
-        grad2 = numerix.take(cellGrad, id2, axis=1)
-        t1grad1 = numerix.sum(tangents1*grad1,0)
-        t1grad2 = numerix.sum(tangents1*grad2,0)
-        t2grad1 = numerix.sum(tangents2*grad1,0)
-        t2grad2 = numerix.sum(tangents2*grad2,0)
-        
-        T1 = (t1grad1 + t1grad2) / 2.
-        T2 = (t2grad1 + t2grad2) / 2.
+        meanGrad = self.mesh._getCellToFaceMeanOperator() * cellGrad
+        T1 = numerix.sum(tangents1 * meanGrad, 0)
+        T2 = numerix.sum(tangents2 * meanGrad, 0)
         
         return normals * N + tangents1 * T1 + tangents2 * T2
 
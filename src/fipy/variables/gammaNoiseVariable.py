@@ -34,7 +34,7 @@
 
 __docformat__ = 'restructuredtext'
 
-from fipy.tools.numerix import random
+from fipy.tools import numerix
 
 from fipy.variables.noiseVariable import NoiseVariable
 
@@ -113,9 +113,9 @@ class GammaNoiseVariable(NoiseVariable):
         self.shapeParam = self._requires(shape)
         self.rate = self._requires(rate)
     
-    def random(self):
-        return random.gamma(shape=self.shapeParam, scale=self.rate, 
-                            size=[self.getMesh().globalNumberOfCells])
+    def random(self, ids):
+        return (self.generator.gamma(ids, self.step, shape=numerix.array(self.shapeParam)) 
+                * numerix.array(self.rate))
 
 def _test(): 
     import doctest
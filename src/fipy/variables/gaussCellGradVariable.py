@@ -41,6 +41,8 @@ from fipy.variables.faceGradContributionsVariable import _FaceGradContributions
 
 
 class _GaussCellGradVariable(CellVariable):
+    _recomputable = not inline.doInline
+    
     def __init__(self, var, name=''):
         CellVariable.__init__(self, mesh=var.getMesh(), name=name, rank=var.getRank() + 1)
         self.var = self._requires(var)
@@ -72,6 +74,10 @@ class _GaussCellGradVariable(CellVariable):
         return self._makeValue(value = val)
             
     def _calcValuePy(self, N, M, ids, orientations, volumes):
+        if self.var.getRank() == 0:
+            faceValues = self.var.getArithmeticFaceValue().getNumericValue()
+            return self.mesh._getFaceToCellGradOperator() * faceValues
+            
         contributions = numerix.take(self.faceGradientContributions, ids, axis=1)
 
         grad = numerix.array(numerix.sum(orientations * contributions, 1))
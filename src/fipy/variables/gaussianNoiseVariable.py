@@ -36,10 +36,8 @@
 
 __docformat__ = 'restructuredtext'
 
-from fipy.tools.numerix import random
-
+from fipy.tools import numerix
 from fipy.variables.noiseVariable import NoiseVariable
-from fipy.tools.numerix import sqrt
 
 class GaussianNoiseVariable(NoiseVariable):
     r"""
@@ -142,19 +140,9 @@ class GaussianNoiseVariable(NoiseVariable):
         self.variance = variance
         NoiseVariable.__init__(self, mesh = mesh, name = name, hasOld = hasOld)
 
-    def parallelRandom(self):
-        from fipy.tools import parallel
-
-        if hasattr(self.variance, 'getGlobalValue'):
-            variance = self.variance.getGlobalValue()
-        else:
-            variance = self.variance
-
-        if parallel.procID == 0:
-            return random.normal(self.mean, sqrt(variance),
-                                 size = [self.getMesh().globalNumberOfCells])
-        else:
-            return None
+    def random(self, ids):
+        return (numerix.array(self.mean) 
+                + numerix.sqrt(numerix.array(self.variance)) * self.generator.normal(ids, self.step))
 
 def _test(): 
     import doctest
@@ -41,47 +41,22 @@ class _LeastSquaresCellGradVariable(CellVariable):
     """
     Look at CellVariable.getLeastSquarseGrad() for documentation
      """
+    _recomputable = True
+    
     def __init__(self, var, name = ''):
         CellVariable.__init__(self, mesh=var.getMesh(), name=name, rank=var.getRank() + 1)
         self.var = self._requires(var)
 
     def _getNeighborValue(self, ):
-        return numerix.take(numerix.array(self.var), self.mesh._getCellToCellIDs())
+        ## cells are their own missing neighbors, which contribute nothing
+        return numerix.take(numerix.array(self.var), self.mesh._getCellToCellIDsFilled())
 
     def _calcValue(self):
-        cellToCellDistances = self.mesh._getCellToCellDistances()
-        cellNormals = self.mesh._getCellNormals()
+        distanceNormals, inverse = self.mesh._getLeastSquaresGradMatrices()
         neighborValue = self._getNeighborValue()
         value = numerix.array(self.var)
-        cellDistanceNormals = cellToCellDistances * cellNormals
 
-        N = self.mesh.getNumberOfCells()
-        M = self.mesh._getMaxFacesPerCell()
-        D = self.mesh.getDim()
+        vec = numerix.array(numerix.sum((neighborValue - value) * distanceNormals, axis=1))
 
-        mat = numerix.zeros((D, D, M, N), 'd')
-
-        ## good god! numpy.outer should have an axis argument!!!
-        for i in range(D):
-            for j in range(D):
-                mat[i,j] = cellDistanceNormals[i] * cellDistanceNormals[j]
-
-        mat = numerix.sum(mat, axis=2)
-
-        vec = numerix.array(numerix.sum((neighborValue - value) * cellDistanceNormals, axis=1))
-
-        if D == 1:
-            vec[0] = vec[0] / mat[0, 0]
-        elif D == 2:
-            divisor = mat[0,0] * mat[1,1] - mat[0,1] * mat[1,0]
-            gradx = (vec[0] * mat[1,1] - vec[1] * mat[1,0]) / divisor
-            grady = (vec[1] * mat[0,0] - vec[0] * mat[0,1]) / divisor
-            vec[0] = gradx
-            vec[1] = grady
-        else:
-            ## very stuppy! numerix.linalg.solve should have an axis argument!!!        
-            for i in range(N):
-                vec[...,i] = numerix.linalg.solve(mat[...,i],vec[...,i])
-
-        return vec
+        return numerix.sum(inverse * vec[numerix.newaxis], axis=1)
 
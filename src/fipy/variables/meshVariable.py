@@ -267,7 +267,8 @@ class _MeshVariable(Variable):
                                          B, 
                                          opShape=opShape,
                                          operatorClass=operatorClass,
-                                         canInline=False)
+                                         canInline=False,
+                                         elementwise=False)
     __dot = staticmethod(__dot)
 
     def dot(self, other, opShape=None, operatorClass=None):
@@ -403,7 +404,8 @@ class _MeshVariable(Variable):
                                                  other, 
                                                  operatorClass=operatorClass,
                                                  opShape=(),
-                                                 canInline=False)            
+                                                 canInline=False,
+                                                 elementwise=False)            
          else:
              return Variable.allclose(self, other, rtol=rtol, atol=atol)
 
@@ -418,7 +420,8 @@ class _MeshVariable(Variable):
                                                  other, 
                                                  operatorClass=operatorClass,
                                                  opShape=(),
-                                                 canInline=False)            
+                                                 canInline=False,
+                                                 elementwise=False)            
          else:
              return Variable.allequal(self, other)
 
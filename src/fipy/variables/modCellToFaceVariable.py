@@ -36,13 +36,35 @@
 
 from fipy.tools import numerix
 from fipy.tools import inline
+from fipy.variables.cellToFaceVariable import _CellToFaceVariable
 from fipy.variables.arithmeticCellToFaceVariable import _ArithmeticCellToFaceVariable
+from fipy.variables.modPhysicalField import _ModPhysicalField
 
 class _ModCellToFaceVariable(_ArithmeticCellToFaceVariable):
     def __init__(self, var, modIn):
         _ArithmeticCellToFaceVariable.__init__(self,var)
         self.modIn = modIn
         
+    def _calcValue(self):
+        ## the mesh's interpolation operator cannot wrap the difference
+        return _CellToFaceVariable._calcValue(self)
+
+    def _calcValuePy(self, alpha, id1, id2):
+        """
+        The difference of the cell values wraps around the circle
+
+            >>> from fipy.meshes.grid1D import Grid1D
+            >>> from fipy.variables.modularVariable import ModularVariable
+            >>> var = ModularVariable(mesh=Grid1D(nx=2), value=(3., -3.))
+            >>> print numerix.allclose(_ModCellToFaceVariable(var, var._modIn),
+            ...                        (3., numerix.pi, -3.))
+            True
+        """
+        value = self.var.getNumericValue()
+        cell1 = numerix.take(value, id1)
+        cell2 = numerix.take(value, id2)
+        return (_ModPhysicalField.mod(cell2 - cell1) * alpha + cell1) * self.var._getUnitAsOne()
+        
     def  _calcValueIn(self, alpha, id1, id2):
         val = self._getArray().copy()
         
@@ -59,3 +81,10 @@ class _ModCellToFaceVariable(_ArithmeticCellToFaceVariable):
             
         return self._makeValue(value = val)
 ##         return self._makeValue(value = val, unit = self.getUnit())
+
+def _test(): 
+    import doctest
+    return doctest.testmod()
+    
+if __name__ == "__main__": 
+    _test() 
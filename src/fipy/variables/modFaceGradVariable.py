@@ -35,6 +35,7 @@
  ##
 
 from fipy.variables.faceGradVariable import _FaceGradVariable
+from fipy.variables.modPhysicalField import _ModPhysicalField
 from fipy.tools import inline
 from fipy.tools import numerix
 
@@ -43,6 +44,22 @@ class _ModFaceGradVariable(_FaceGradVariable):
         _FaceGradVariable.__init__(self, var)
         self.modIn = modIn
         
+    def _calcNormalGradPy(self):
+        """
+        The difference of the cell values wraps around the circle
+
+            >>> from fipy.meshes.grid1D import Grid1D
+            >>> from fipy.variables.modularVariable import ModularVariable
+            >>> var = ModularVariable(mesh=Grid1D(nx=2), value=(3., -3.))
+            >>> print numerix.allclose(_ModFaceGradVariable(var, var._modIn),
+            ...                        ((0., 2 * numerix.pi - 6., 0.),))
+            True
+        """
+        id1, id2 = self.mesh._getAdjacentCellIDs()
+        value = self.var.getNumericValue()
+        difference = _ModPhysicalField.mod(numerix.take(value, id2) - numerix.take(value, id1))
+        return difference / self.mesh._getCellDistances() * self.var._getUnitAsOne()
+
     def _calcValueInline(self):
 
         id1, id2 = self.mesh._getAdjacentCellIDs()
@@ -84,3 +101,10 @@ class _ModFaceGradVariable(_FaceGradVariable):
             
         return self._makeValue(value = val)
 ##         return self._makeValue(value = val, unit = self.getUnit())
+
+def _test(): 
+    import doctest
+    return doctest.testmod()
+    
+if __name__ == "__main__": 
+    _test() 
@@ -115,7 +115,7 @@ class ModularVariable(CellVariable):
         """
         self.setValue(self.getValue().mod(self().inRadians()))
         if self.old is not None:
-            self.old.setValue(self.value.value.copy())
+            self._rotateOld()
 
     def getGrad(self):
         r"""
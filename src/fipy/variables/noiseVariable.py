@@ -34,8 +34,22 @@
 
 __docformat__ = 'restructuredtext'
 
+from fipy.tools import numerix
+from fipy.tools.counterRandom import _CounterRandom
 from fipy.variables.cellVariable import CellVariable
 
+def _getSeed():
+    ## a seed from `numerix.random`, the same on every processor
+    from fipy.tools import parallel
+    seed = None
+    if parallel.procID == 0:
+        high, low = numerix.random.randint(0, 2**31 - 1, size=2)
+        seed = int(high) * 2**31 + int(low)
+    if parallel.Nproc > 1:
+        from mpi4py import MPI
+        seed = MPI.COMM_WORLD.bcast(seed, root=0)
+    return seed
+
 class NoiseVariable(CellVariable):
     r"""
     .. attention:: This class is abstract. Always create one of its subclasses.
@@ -46,15 +60,38 @@ class NoiseVariable(CellVariable):
         
         <Specific>NoiseVariable(...).getFaceGrad().getDivergence()
 
-    The `seed()` and `get_seed()` functions of the
-    `fipy.tools.numerix.random` module can be set and query the random
-    number generated used by all `NoiseVariable` objects.
+    The noise of each cell is a function of a seed, the global ID of the
+    cell and the number of times the noise has been scrambled, so each
+    processor generates the noise of its own cells, and the noise is the
+    same however the mesh is partitioned
+
+        >>> from fipy import Grid1D
+        >>> from fipy.variables.uniformNoiseVariable import UniformNoiseVariable
+        >>> noise = UniformNoiseVariable(mesh=Grid1D(nx=10))
+        >>> print numerix.allclose(noise.random(numerix.arange(3, 7)), noise[3:7])
+        True
+
+    The seed of each `NoiseVariable` is drawn from the
+    `fipy.tools.numerix.random` module when it is created, so its `seed()`
+    function can be used to make the noise reproducible
+
+        >>> numerix.random.seed(13)
+        >>> first = UniformNoiseVariable(mesh=Grid1D(nx=10))
+        >>> numerix.random.seed(13)
+        >>> second = UniformNoiseVariable(mesh=Grid1D(nx=10))
+        >>> print first.allclose(second)
+        True
+        >>> second.scramble()
+        >>> print first.allclose(second)
+        False
     """
     def __init__(self, mesh, name = '', hasOld = 0):
         if self.__class__ is NoiseVariable:
             raise NotImplementedError, "can't instantiate abstract base class"
             
         CellVariable.__init__(self, mesh = mesh, name = name, hasOld = hasOld)
+        self.generator = _CounterRandom(seed=_getSeed())
+        self.step = 0
         self.scramble()
         
     def copy(self):
@@ -70,29 +107,15 @@ class NoiseVariable(CellVariable):
         """
         Generate a new random distribution.
         """
+        self.step += 1
         self._markStale()
         
-    def random(self):
+    def random(self, ids):
+        """
+        Return the noise of the cells with the global IDs `ids`.
+        """
         pass
         
-    def parallelRandom(self):
-        from fipy.tools import parallel
-        if parallel.procID == 0:
-            return self.random()
-        else:
-            return None
-        
     def _calcValue(self):
-        from fipy.tools import parallel
-
-        rnd = self.parallelRandom()
-        
-        if parallel.Nproc > 1:
-            from mpi4py import MPI
-            comm = MPI.COMM_WORLD
-            rnd = comm.bcast(rnd, root=0)
-            
-            return rnd[self.getMesh()._getGlobalOverlappingCellIDs()]
-        else:
-            return rnd
+        return self.random(numerix.array(self.getMesh()._getGlobalOverlappingCellIDs()))
 
@@ -36,12 +36,15 @@ from fipy.tools import numerix
 
 def _OperatorVariableClass(baseClass=None):
     class _OperatorVariable(baseClass):
-        def __init__(self, op, var, opShape=(), canInline=True, unit=None, inlineComment=None, *args, **kwargs):
+        _recomputable = True
+        
+        def __init__(self, op, var, opShape=(), canInline=True, unit=None, inlineComment=None, elementwise=False, *args, **kwargs):
             self.op = op
             self.var = var
             self.opShape = opShape
             self.unit = unit
             self.canInline = canInline  #allows for certain functions to opt out of --inline
+            self.elementwise = elementwise  #each element depends only on the same element of each input
             baseClass.__init__(self, value=None, *args, **kwargs)
             self.name = ''
             for var in self.var:    #C does not accept units
@@ -52,7 +55,11 @@ def _OperatorVariableClass(baseClass=None):
             for aVar in self.var:
                 self._requires(aVar)
             
-            self.dontCacheMe()
+            if self._incremental and self.elementwise:
+                ## the previous value is needed to update only what has changed
+                self.cacheMe()
+            else:
+                self.dontCacheMe()
 
             self.comment = inlineComment
 
@@ -63,11 +70,61 @@ def _OperatorVariableClass(baseClass=None):
             raise TypeError, "The value of an `_OperatorVariable` cannot be assigned"
         
         def _calcValue(self):
-            if not self.canInline:
+            if self.dirtyIDs is not None and self.value is not None:
+                value = self._calcDirtyValue(self.dirtyIDs)
+                if value is not None:
+                    return value
+                    
+            from fipy.tools import inline
+            if not self.canInline or inline.inlineBackend is None:
                 return self._calcValuePy()
             else:
-                from fipy.tools import inline
-                return inline._optionalInline(self._calcValueIn, self._calcValuePy)
+                try:
+                    return self._calcValueIn()
+                except inline._FusionError:
+                    ## evaluate this expression with numerix from now on,
+                    ## and make it a leaf of any expression that uses it
+                    self.canInline = False
+                    return self._calcValuePy()
+
+        def _calcDirtyValue(self, ids):
+            """
+            Recalculate only the elements at the flat indices `ids`, in
+            place. Returns `None` if that cannot be done.
+            """
+            ## hold on to the value, in case evaluating the inputs
+            ## causes `cacheManager` to discard it
+            result = self.value
+            if not isinstance(result, numerix.ndarray):
+                return None
+                
+            values = []
+            for var in self.var:
+                if isinstance(var, Variable):
+                    value = var.getValue()
+                else:
+                    value = var
+                if not isinstance(value, (numerix.ndarray, int, float)):
+                    return None
+                elif numerix.getShape(value) == ():
+                    values.append(value)
+                elif numerix.getShape(value) != result.shape:
+                    return None
+                else:
+                    values.append(numerix.take(numerix.ravel(value), ids))
+                    
+            values = numerix.asarray(self.op(*values))
+            if values.dtype != result.dtype:
+                return None
+                
+            result.flat[ids] = values
+            return result
+
+        def _getDirtyIDs(self, dirtyIDs):
+            if self.elementwise:
+                return dirtyIDs
+            else:
+                return None
 
         def _calcValueIn(self):
             return self._execInline(comment=self.comment)
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+
+## -*-Pyth-*-
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ #
+ #  FILE: "remapper.py"
+ #
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ #
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #  See the file "license.terms" for information on usage and  redistribution
+ #  of this file, and for a DISCLAIMER OF ALL WARRANTIES.
+ #
+ # ###################################################################
+ ##
+
+__docformat__ = 'restructuredtext'
+
+from fipy.tools import numerix
+from fipy.tools.numerix import MA
+from fipy.tools.dimensions.physicalField import PhysicalField
+from fipy.tools.sparseMatrix import _SparseOperator, _sparseOperatorFromTriplets
+from fipy.variables.cellVariable import CellVariable
+
+class Remapper:
+    """
+    Transfers `CellVariable` objects from one mesh to another.
+
+    The interpolation weights are calculated once, when the `Remapper` is
+    created, so remapping a variable is a single sparse matrix-vector
+    product. The result agrees with interpolating the variable at the cell
+    centers of the target mesh, either from the nearest cell or, to first
+    order, with the gradient of the nearest cell
+
+        >>> from fipy import Grid2D
+        >>> coarse = Grid2D(nx=3, ny=2, dx=1., dy=1.)
+        >>> fine = Grid2D(nx=5, ny=4, dx=.6, dy=.5)
+        >>> x, y = coarse.getCellCenters()
+        >>> var = CellVariable(mesh=coarse, value=x * x + y)
+        >>> centers = fine.getCellCenters().getGlobalValue()
+
+        >>> remapped = Remapper(coarse, fine)(var)
+        >>> print remapped.getMesh() is fine
+        True
+        >>> print numerix.allclose(remapped, var(centers))
+        True
+
+        >>> def linear(var):
+        ...     ids = coarse._getNearestCellID(centers)
+        ...     displacements = centers - coarse.getCellCenters().getGlobalValue()[..., ids]
+        ...     return (var.getGlobalValue()[ids] 
+        ...             + numerix.sum(displacements * var.getGrad().getGlobalValue()[..., ids], axis=0))
+        >>> remapper = Remapper(coarse, fine, order=1)
+        >>> print numerix.allclose(remapper(var), linear(var))
+        True
+
+    The same `Remapper` serves any variable on the source mesh
+
+        >>> var.setValue(x * y)
+        >>> print numerix.allclose(remapper(var), linear(var))
+        True
+
+    A `conservative` `Remapper` preserves the volume integral of the
+    variable. Each target cell takes the average of the source values
+    weighted by the volume of the overlap of each source cell with it, so
+    a target cell straddling two source cells takes a share of each
+
+        >>> from fipy import Grid1D
+        >>> source = Grid1D(nx=3, dx=1.)
+        >>> target = Grid1D(nx=2, dx=1.5)
+        >>> var = CellVariable(mesh=source, value=(1., 2., 3.))
+        >>> remapped = Remapper(source, target, conservative=True)(var)
+        >>> print remapped
+        [ 1.33333333  2.66666667]
+        >>> print numerix.allclose(numerix.sum(remapped * target.getCellVolumes()),
+        ...                        numerix.sum(var * source.getCellVolumes()))
+        True
+
+    and a constant stays constant
+
+        >>> remapper = Remapper(Grid2D(nx=7, ny=5, dx=3. / 7, dy=2. / 5),
+        ...                     Grid2D(nx=3, ny=2, dx=1., dy=1.), conservative=True)
+        >>> print numerix.allclose(remapper(CellVariable(mesh=remapper.sourceMesh, value=1.)), 1.)
+        True
+
+    which, between nested meshes, is the volume average or the injection
+    of the source values
+
+        >>> fine = Grid1D(nx=4, dx=1.)
+        >>> coarse = Grid1D(nx=2, dx=2.)
+        >>> print Remapper(fine, coarse, conservative=True)(CellVariable(mesh=fine, value=(1., 2., 3., 4.)))
+        [ 1.5  3.5]
+        >>> print Remapper(coarse, fine, conservative=True)(CellVariable(mesh=coarse, value=(1., 3.)))
+        [ 1.  1.  3.  3.]
+
+    Units are kept
+
+        >>> print Remapper(coarse, fine)(CellVariable(mesh=coarse, value=(1., 3.), unit="m"))
+        [ 1.  1.  3.  3.] m
+    """
+    def __init__(self, sourceMesh, targetMesh, order=0, conservative=False):
+        """
+        :Parameters:
+          - `sourceMesh`: the mesh of the variables to be remapped
+          - `targetMesh`: the mesh to remap them to
+          - `order`: the order of interpolation, 0 or 1, as for
+            `CellVariable.__call__()`
+          - `conservative`: whether to preserve the volume integral of the
+            variables, in which case `order` must be 0 and the cells of
+            both meshes must be boxes aligned with the axes. A
+            `ValueError` is raised for any other mesh, including the
+            triangulated transition region of a `GapFillMesh`.
+        """
+        if conservative and order != 0:
+            raise ValueError, 'conservative remapping is only available for order 0'
+        if order not in (0, 1):
+            raise ValueError, 'order must be 0 or 1'
+
+        self.sourceMesh = sourceMesh
+        self.targetMesh = targetMesh
+
+        if conservative:
+            self.operator = self._getConservativeOperator()
+            return
+
+        targetCenters = numerix.array(targetMesh.getCellCenters())
+        nearest = sourceMesh._getNearestCellID(targetCenters)
+
+        if order == 0:
+            self.operator = _SparseOperator(cols=(nearest,),
+                                            values=(numerix.ones(nearest.shape, 'd'),))
+        else:
+            self.operator = self._getLinearOperator(nearest, targetCenters)
+
+    def _getLinearOperator(self, nearest, targetCenters):
+        ## the value of the nearest cell plus the displacement dotted with
+        ## its Gauss gradient, which is itself a sum over the faces of the
+        ## cell of the face values interpolated from the two adjacent cells
+        mesh = self.sourceMesh
+        gradOp = mesh._getFaceToCellGradOperator()
+        faceOp = mesh._getCellToFaceInterpolationOperator()
+
+        displacements = targetCenters - numerix.take(mesh.getCellCenters().getGlobalValue(), nearest, axis=1)
+        faceIDs = numerix.take(gradOp.cols, nearest, axis=1)
+        faceWeights = numerix.sum(displacements[:, numerix.newaxis]
+                                  * numerix.take(gradOp.values, nearest, axis=-1), axis=0)
+
+        cols = numerix.take(faceOp.cols, faceIDs, axis=1)
+        values = numerix.take(faceOp.values, faceIDs, axis=1) * faceWeights
+
+        K = cols.shape[0] * cols.shape[1]
+        return _SparseOperator(cols=numerix.concatenate((nearest[numerix.newaxis],
+                                                         numerix.reshape(cols, (K, -1)))),
+                               values=numerix.concatenate((numerix.ones((1, len(nearest)), 'd'),
+                                                           numerix.reshape(values, (K, -1)))))
+
+    def _getConservativeOperator(self):
+        ## the weight of each source cell in a target cell is the volume of
+        ## their intersection over the volume of the target cell
+        sourceLower, sourceUpper = self._getCellBounds(self.sourceMesh)
+        sourceLower = CellVariable(mesh=self.sourceMesh, value=sourceLower).getGlobalValue()
+        sourceUpper = CellVariable(mesh=self.sourceMesh, value=sourceUpper).getGlobalValue()
+        targetLower, targetUpper = self._getCellBounds(self.targetMesh)
+        targetVolumes = numerix.array(self.targetMesh.getCellVolumes())
+
+        numberOfTargets = len(targetVolumes)
+        chunk = max(1, 2**20 / max(1, sourceLower.shape[-1]))
+        rows = []
+        cols = []
+        values = []
+        for start in range(0, numberOfTargets, chunk):
+            stop = min(start + chunk, numberOfTargets)
+            overlap = numerix.prod(numerix.maximum(numerix.minimum(targetUpper[:, start:stop, numerix.newaxis],
+                                                                   sourceUpper[:, numerix.newaxis])
+                                                   - numerix.maximum(targetLower[:, start:stop, numerix.newaxis],
+                                                                     sourceLower[:, numerix.newaxis]),
+                                                   0.), axis=0)
+            targetIDs, sourceIDs = numerix.nonzero(overlap > 0)
+            rows.append(targetIDs + start)
+            cols.append(sourceIDs)
+            values.append(overlap[targetIDs, sourceIDs] / targetVolumes[targetIDs + start])
+
+        return _sparseOperatorFromTriplets(rows=numerix.concatenate(rows),
+                                           cols=numerix.concatenate(cols),
+                                           values=numerix.concatenate(values),
+                                           numberOfRows=numberOfTargets)
+
+    def _getCellBounds(mesh):
+        ## the lower and upper corners of the cells, which must be boxes
+        ## aligned with the axes for their intersections to be boxes too
+        vertexIDs = mesh._getCellVertexIDs()
+        filled = MA.filled(vertexIDs, 0)
+        vertexIDs = numerix.where(MA.getmaskarray(vertexIDs), filled[0], filled)
+        vertexCoords = numerix.take(numerix.array(mesh.getVertexCoords()), vertexIDs, axis=1)
+        lower = vertexCoords.min(axis=1)
+        upper = vertexCoords.max(axis=1)
+
+        if not numerix.allclose(numerix.prod(upper - lower, axis=0), mesh.getCellVolumes()):
+            raise ValueError, 'conservative remapping needs cells that are boxes aligned with the axes'
+
+        return lower, upper
+    _getCellBounds = staticmethod(_getCellBounds)
+
+    def __call__(self, var):
+        """
+        Return `var`, a `CellVariable` on the source mesh, remapped to a
+        `CellVariable` on the target mesh.
+        """
+        value = var.getGlobalValue()
+        unit = None
+        if isinstance(value, PhysicalField):
+            value, unit = value.value, value.getUnit()
+        return CellVariable(mesh=self.targetMesh, name=var.name,
+                            value=self.operator * value, unit=unit)
+
+def _test():
+    import doctest
+    return doctest.testmod()
+
+if __name__ == "__main__":
+    _test()
@@ -52,7 +52,11 @@ def _suite():
             'fipy.variables.uniformNoiseVariable',
             'fipy.variables.cellVolumeAverageVariable',
             'fipy.variables.modularVariable',
-            'fipy.variables.binaryOperatorVariable'
+            'fipy.variables.modCellToFaceVariable',
+            'fipy.variables.modFaceGradVariable',
+            'fipy.variables.binaryOperatorVariable',
+            'fipy.variables.cacheManager',
+            'fipy.variables.remapper'
         ))
     
 if __name__ == '__main__':
@@ -34,7 +34,7 @@
 
 __docformat__ = 'restructuredtext'
 
-from fipy.tools.numerix import random
+from fipy.tools import numerix
 from fipy.variables.noiseVariable import NoiseVariable
 
 class UniformNoiseVariable(NoiseVariable):
@@ -82,9 +82,9 @@ class UniformNoiseVariable(NoiseVariable):
         self.maximum = maximum
         NoiseVariable.__init__(self, mesh = mesh, name = name, hasOld = hasOld)
     
-    def random(self):
-        return random.uniform(self.minimum, self.maximum,
-                              size=[self.getMesh().globalNumberOfCells])
+    def random(self, ids):
+        return (numerix.array(self.minimum) 
+                + numerix.array(self.maximum - self.minimum) * self.generator.uniform(ids, self.step))
 
 def _test(): 
     import doctest
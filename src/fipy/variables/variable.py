@@ -37,11 +37,13 @@ __docformat__ = 'restructuredtext'
 import sys
 import os
 import inspect
+import time
 
 from fipy.tools.dimensions import physicalField
 from fipy.tools import numerix
 from fipy.tools import parser
 from fipy.tools import inline
+from fipy.variables.cacheManager import cacheManager
 
 class Variable(object):
     """
@@ -74,6 +76,20 @@ class Variable(object):
         _cacheAlways = True
 
     _cacheNever = False
+
+    _incremental = (os.getenv("FIPY_INCREMENTAL") is not None) or False
+    if parser.parse("--incremental", action="store_true"):
+        _incremental = True
+
+    ## flat indices of the elements that have changed since the value was
+    ## last calculated, or `None` if the whole value must be recalculated
+    dirtyIDs = None
+
+    ## whether `_calcValue()` can reproduce a discarded value, so that
+    ## `cacheManager` may evict it. Variables with weave kernels set it to
+    ## `not inline.doInline`, because their kernels fill a copy of the
+    ## cached value, which must then be kept.
+    _recomputable = False
     
     def __new__(cls, *args, **kwds):
         return object.__new__(cls)
@@ -423,7 +439,7 @@ class Variable(object):
         if self.value is None:
             self.getValue()
         self.value[index] = value
-        self._markFresh()
+        self._markFresh(dirtyIDs=self._getFlatIDs(index))
         
     def itemset(self, value):
         if self.value is None:
@@ -435,7 +451,10 @@ class Variable(object):
         if self.value is None:
             self.getValue()
         numerix.put(self.value, indices, value)
-        self._markFresh()
+        if self._incremental:
+            self._markFresh(dirtyIDs=numerix.ravel(indices))
+        else:
+            self._markFresh()
         
     def __call__(self):
         """
@@ -468,14 +487,22 @@ class Variable(object):
         """
         
         if self.stale or not self._isCached() or self.value is None:
+            dirtyIDs = self.dirtyIDs
+            managed = self._recomputable and cacheManager._isActive() and self._isCached()
+            if managed:
+                start = time.time()
             value = self._calcValue()
             if self._isCached():
                 self._setValue(value=value)
+                if managed:
+                    cacheManager._store(self, cost=time.time() - start)
             else:
                 self._setValue(value=None)
-            self._markFresh()
+            self._markFresh(dirtyIDs=dirtyIDs)
         else:
             value = self.value
+            if self._recomputable and cacheManager._isActive():
+                cacheManager._hit(self)
             
         return value
 
@@ -573,10 +600,13 @@ class Variable(object):
             ValueError: shape mismatch: objects cannot be broadcast to a single shape
             
         """
+        dirtyIDs = None
         if where is not None:
             tmp = numerix.empty(numerix.getShape(where), self.getsctype())
             tmp[:] = value
             tmp = numerix.where(where, tmp, self.getValue())
+            if self._incremental and numerix.getShape(where) == self.getShape():
+                dirtyIDs = numerix.nonzero(numerix.ravel(where))[0]
         else:
             if hasattr(value, 'copy'):
                 tmp = value.copy()
@@ -590,7 +620,7 @@ class Variable(object):
         else:
             self.value[:] = value
             
-        self._markFresh()
+        self._markFresh(dirtyIDs=dirtyIDs)
         
     def _setNumericValue(self, value):
         if isinstance(self.value, physicalField.PhysicalField):
@@ -661,7 +691,7 @@ class Variable(object):
         
         return self.subscribedVariables
         
-    def __markStale(self):
+    def __markStale(self, dirtyIDs=None):
         for subscriber in self.getSubscribedVariables():
             if subscriber() is not None:
                 ## Even though getSubscribedVariables() strips out dead 
@@ -670,16 +700,96 @@ class Variable(object):
                 ## later subscribedVariables were removed, changing the 
                 ## dependencies of this subscriber. 
                 ## See <https://www.matforge.org/fipy/ticket/118> for more explanation.
-                subscriber()._markStale()
+                if dirtyIDs is not None and subscriber().getShape() != self.getShape():
+                    ## our flat indices mean nothing to a differently shaped subscriber
+                    subscriber()._markStale()
+                else:
+                    subscriber()._markStale(dirtyIDs)
                 
-    def _markFresh(self):
+    def _markFresh(self, dirtyIDs=None):
         self.stale = 0
-        self.__markStale()
+        self.dirtyIDs = None
+        self.__markStale(dirtyIDs)
+
+    def _markStale(self, dirtyIDs=None):
+        """
+        With `--incremental`, the flat indices of the elements that have
+        changed are passed down the dependency graph, for as long as each
+        `Variable` knows that its elements depend only on the same elements
+        of its inputs.
+
+            >>> from fipy.tools import numerix
+            >>> from fipy.variables import variable
+            >>> incremental = variable.Variable._incremental
+            >>> variable.Variable._incremental = True
+            
+            >>> a = Variable(value=(1., 2., 3., 4.))
+            >>> b = numerix.exp(a) * 2 + 1
+            >>> print numerix.allclose(b, numerix.exp(a()) * 2 + 1)
+            True
+            >>> a.setValue(0., where=(0, 0, 1, 0))
+            >>> print b.dirtyIDs
+            [2]
+            >>> a[1] = 5.
+            >>> print b.dirtyIDs
+            [1 2]
+            >>> print numerix.allclose(b, numerix.exp((1., 5., 0., 4.)) * 2 + 1)
+            True
+            >>> print b.dirtyIDs
+            None
+
+        Anything that is not elementwise, or an unspecified change, falls
+        back to recalculating everything
+
+            >>> c = b.sum()
+            >>> print numerix.allclose(c, (numerix.exp((1., 5., 0., 4.)) * 2 + 1).sum())
+            True
+            >>> a.put((3,), 1.)
+            >>> print b.dirtyIDs, c.dirtyIDs
+            [3] None
+            >>> print numerix.allclose(c, (numerix.exp((1., 5., 0., 1.)) * 2 + 1).sum())
+            True
+            >>> a.setValue(2.)
+            >>> print b.dirtyIDs
+            None
+            >>> print numerix.allclose(b, numerix.exp(2.) * 2 + 1)
+            True
 
-    def _markStale(self):
-        if not self.stale:
+            >>> variable.Variable._incremental = incremental
+        """
+        if self._incremental:
+            dirtyIDs = self._getDirtyIDs(dirtyIDs)
+            if not self.stale:
+                self.stale = 1
+                self.dirtyIDs = dirtyIDs
+                self.__markStale(dirtyIDs)
+            elif self.dirtyIDs is not None:
+                if dirtyIDs is None:
+                    self.dirtyIDs = None
+                    self.__markStale()
+                else:
+                    merged = numerix.union1d(self.dirtyIDs, dirtyIDs)
+                    if len(merged) > len(self.dirtyIDs):
+                        self.dirtyIDs = merged
+                        self.__markStale(dirtyIDs)
+        elif not self.stale:
             self.stale = 1
             self.__markStale()
+
+    def _getDirtyIDs(self, dirtyIDs):
+        """
+        Map the flat indices of the changed elements of an input to the flat
+        indices of the elements of this `Variable` that must be
+        recalculated. `None` means everything.
+        """
+        return None
+            
+    def _getFlatIDs(self, index):
+        if self._incremental:
+            shape = self.getShape()
+            return numerix.ravel(numerix.reshape(numerix.arange(numerix.prod(shape)), shape)[index])
+        else:
+            return None
             
     def _requires(self, var):
         if isinstance(var, Variable):
@@ -787,10 +897,11 @@ class Variable(object):
             if resultShape == ():
                 argDict['result'] = numerix.reshape(argDict['result'], (1,))
 
-            inline._runInline(string, converters=None, comment=comment, **argDict)
+            inline._runFusedInline(string, comment=comment, **argDict)
 
             if resultShape == ():
-                argDict['result'] = numerix.reshape(argDict['result'], resultShape)
+                ## return a scalar, as numerix would
+                argDict['result'] = argDict['result'][0]
 
         return argDict['result']
 
@@ -840,7 +951,7 @@ class Variable(object):
         baseClass = baseClass or self._getVariableClass()
         return operatorVariable._OperatorVariableClass(baseClass=baseClass)
             
-    def _UnaryOperatorVariable(self, op, operatorClass=None, opShape=None, canInline=True, unit=None):
+    def _UnaryOperatorVariable(self, op, operatorClass=None, opShape=None, canInline=True, unit=None, elementwise=True):
         """
         Check that getUnit() works for unOp
 
@@ -864,7 +975,8 @@ class Variable(object):
             canInline = False
 
         return unOp(op=op, var=[self], opShape=opShape, canInline=canInline, unit=unit, 
-                    inlineComment=inline._operatorVariableComment(canInline=canInline))
+                    inlineComment=inline._operatorVariableComment(canInline=canInline),
+                    elementwise=elementwise)
 
     def _shapeClassAndOther(self, opShape, operatorClass, other):
         """
@@ -884,13 +996,14 @@ class Variable(object):
 
         return (opShape, baseClass, other)
         
-    def _BinaryOperatorVariable(self, op, other, operatorClass=None, opShape=None, canInline=True, unit=None):
+    def _BinaryOperatorVariable(self, op, other, operatorClass=None, opShape=None, canInline=True, unit=None, elementwise=True):
         """
         :Parameters:
           - `op`: the operator function to apply (takes two arguments for `self` and `other`)
           - `other`: the quantity to be operated with
           - `operatorClass`: the `Variable` class that the binary operator should inherit from 
           - `opShape`: the shape that should result from the operation
+          - `elementwise`: whether each element of the result depends only on the same element of each operand
         """
         if not isinstance(other, Variable):
             from fipy.variables.constant import _Constant
@@ -911,7 +1024,8 @@ class Variable(object):
         binOp = binaryOperatorVariable._BinaryOperatorVariable(operatorClass)
         
         return binOp(op=op, var=[self, other], opShape=opShape, canInline=canInline, unit=unit, 
-                     inlineComment=inline._operatorVariableComment(canInline=canInline))
+                     inlineComment=inline._operatorVariableComment(canInline=canInline),
+                     elementwise=elementwise)
     
     def __add__(self, other):
         from fipy.terms.term import Term
@@ -1166,7 +1280,7 @@ class Variable(object):
             >>> print Variable(value=(0, 0, 1, 1)).any()
             1
         """
-        return self._UnaryOperatorVariable(lambda a: a.any(axis=axis))
+        return self._UnaryOperatorVariable(lambda a: a.any(axis=axis), elementwise=False)
 
     def all(self, axis=None):
         """
@@ -1175,7 +1289,7 @@ class Variable(object):
             >>> print Variable(value=(1, 1, 1, 1)).all()
             1
         """
-        return self._UnaryOperatorVariable(lambda a: a.all(axis=axis))
+        return self._UnaryOperatorVariable(lambda a: a.all(axis=axis), elementwise=False)
 
     def arccos(self):
         return self._UnaryOperatorVariable(lambda a: numerix.arccos(a))
@@ -1261,10 +1375,10 @@ class Variable(object):
                                             other, 
                                             opShape=opShape[:axis]+opShape[axis+1:],
                                             operatorClass=operatorClass,
-                                            canInline=False)
+                                            canInline=False, elementwise=False)
         
     def reshape(self, shape):
-        return self._BinaryOperatorVariable(lambda a,b: numerix.reshape(a,b), shape, opShape=shape, canInline=False)
+        return self._BinaryOperatorVariable(lambda a,b: numerix.reshape(a,b), shape, opShape=shape, canInline=False, elementwise=False)
         
     def transpose(self):
         """
@@ -1292,7 +1406,8 @@ class Variable(object):
             opdict[axis] = self._UnaryOperatorVariable(op,
                                                        operatorClass=self._axisClass(axis=axis), 
                                                        opShape=opShape,
-                                                       canInline=False)
+                                                       canInline=False,
+                                                       elementwise=False)
         
         return opdict[axis]
 
@@ -1333,7 +1448,8 @@ class Variable(object):
                                            operatorClass=self._getitemClass(index=index), 
                                            opShape=numerix._indexShape(index=index, arrayShape=self.shape),
                                            unit=self.getUnit(),
-                                           canInline=False)
+                                           canInline=False,
+                                           elementwise=False)
 
     def take(self, ids, axis=0):
         return numerix.take(self.getValue(), ids, axis)
@@ -1360,7 +1476,8 @@ class Variable(object):
                                             other, 
                                             operatorClass=operatorClass,
                                             opShape=(),
-                                            canInline=False)
+                                            canInline=False,
+                                            elementwise=False)
         
     def allequal(self, other):
         operatorClass = Variable._OperatorVariableClass(self, baseClass=Variable)
@@ -1368,7 +1485,8 @@ class Variable(object):
                                             other,
                                             operatorClass=operatorClass,
                                             opShape=(),
-                                            canInline=False)
+                                            canInline=False,
+                                            elementwise=False)
 
     def getMag(self):
         if not hasattr(self, "mag"):
@@ -352,8 +352,11 @@ class efficiency_test(Command):
                      ('inline', None, 'turn on inlining for the efficiency tests'),
                      ('cache', None, 'turn on variable caching'),
                      ('maximumelements=', None, 'maximum number of elements'),
-                     ('sampleTime=', None, 'sampling interval for memory high-water'),
-                     ('path=', None, 'directory to place output results in')]
+                     ('steps=', None, 'number of steps of the repeated phases'),
+                     ('cases=', None, 'comma-separated cases to run (default: all)'),
+                     ('path=', None, 'directory to place output results in'),
+                     ('compare=', None, 'earlier results to check the new results against'),
+                     ('tolerance=', None, 'fractional increase reported as a regression')]
     
     def initialize_options(self):
         self.factor = 10
@@ -361,86 +364,51 @@ class efficiency_test(Command):
         self.cache = 0
         self.maximumelements = 10000
         self.minimumelements = 100
-        self.sampleTime = 1
+        self.steps = 10
+        self.cases = None
         self.path = None
-        self.cases = ['examples/benchmarking/cahnHilliard.py', 'examples/benchmarking/superfill.py', 'examples/benchmarking/phaseImpingement.py', 'examples/benchmarking/mesh.py']
+        self.compare = None
+        self.tolerance = 0.1
         
     def finalize_options(self):
         self.factor = int(self.factor)
         self.maximumelements = int(self.maximumelements)
         self.minimumelements = int(self.minimumelements)
-        self.sampleTime = float(self.sampleTime)
+        self.steps = int(self.steps)
+        self.tolerance = float(self.tolerance)
+        if self.path is None:
+            self.path = os.path.join('examples', 'benchmarking')
 
     def run(self):
-
-        import time
-        import os
+        from examples.benchmarking import suite
         
-        for case in self.cases:
-            print "case: %s" % case
-            
-            if self.path is None:
-                testPath = os.path.split(case)[0]
-            else:
-                testPath = self.path
-                
-            if not os.access(testPath, os.F_OK):
-                os.makedirs(testPath)
-                
-            testPath = os.path.join(testPath, '%s.dat' % os.path.split(case)[1])
+        if self.cases is None:
+            cases = suite.cases
+        else:
+            cases = self.cases.split(',')
+
+        sizes = []
+        numberOfElements = self.minimumelements
+        while numberOfElements <= self.maximumelements:
+            sizes.append(numberOfElements)
+            numberOfElements *= self.factor
             
-            if not os.path.isfile(testPath):
-                f = open(testPath, 'w')
-
-                f.write("\t".join(["--inline", "--cache", "Date", "Elements", \
-                                  "mesh (s)", "variables (s)", "terms (s)", \
-                                  "solver (s)", "BCs (s)", "solve (s)", \
-                                  "total (s)", "per step (s)", \
-                                  \
-                                  "mesh (KiB)", "variables (KiB)", \
-                                  "terms (KiB)", "solver (KiB)", "BCs (KiB)", \
-                                  "solve (KiB)", "max (KiB)", \
-                                  "per element (KiB)"]))
-                f.write("\n")
-                f.flush()
-            else:
-                f = open(testPath, 'a')
-            
-            numberOfElements = self.minimumelements
-
-            while numberOfElements <= self.maximumelements:
-                print "\tnumberOfElements: %i" % numberOfElements
-                
-                cmd = [case, '--numberOfElements=%i' % numberOfElements]
-                
-                if self.inline:
-                    cmd += ['--inline']
-                    
-                if self.cache:
-                    cmd += ['--cache']
-                else:
-                    cmd += ['--no-cache']
-
-                output = "\t".join([str(self.inline), str(self.cache), time.ctime(), str(numberOfElements)])
-                
-                timeCmd = cmd + ['--measureTime']
-                w, r = os.popen4(' '.join(timeCmd))
-                output += '\t' + ''.join(r.readlines()).strip()
-                r.close()
-                w.close()
-
-                memCmd = cmd + ['--measureMemory', '--sampleTime=%f' % self.sampleTime]
-                w, r = os.popen4(' '.join(memCmd))
-                output += '\t' + ''.join(r.readlines()).strip()
-                r.close()
-                w.close()
-                    
-                f.write(output + '\n')
-                f.flush()
-
-                numberOfElements *= self.factor
-
-            f.close()
+        if not os.access(self.path, os.F_OK):
+            os.makedirs(self.path)
+        output = os.path.join(self.path, 'efficiency.tsv')
+        
+        print "\t".join(suite.columns)
+        for row in suite.run(cases=cases, sizes=sizes, steps=self.steps, 
+                             inline=self.inline, cache=self.cache, output=output):
+            print "\t".join(row)
+        print "results appended to %s" % output
+
+        if self.compare is not None:
+            regressions = suite.compare(self.compare, output, tolerance=self.tolerance)
+            for regression in regressions:
+                print "regression: %s\t%s\t%s\t%s\t%g\t%g" % regression
+            if len(regressions) > 0:
+                raise SystemExit, "%d regressions against %s" % (len(regressions), self.compare)
 
 try:            
     f = open('README.txt', 'r')